@@ -0,0 +1,45 @@
+import sys
+import json
+import argparse
+from typing import Any, Dict
+
+
+def load(path: str) -> Dict[str, Dict[str, Any]]:
+    with open(path) as f:
+        return {result["name"]: result for result in json.load(f)["results"]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.compare",
+        description="compares two json files written by benchmarks.run",
+    )
+    parser.add_argument("before", type=str)
+    parser.add_argument("after", type=str)
+    args = parser.parse_args()
+
+    before, after = load(args.before), load(args.after)
+
+    print(
+        f"{'case':<24} {'before rec/s':>14} {'after rec/s':>14} {'speed':>8} {'rss':>8}"
+    )
+    for name in before:
+        if name not in after:
+            continue
+        old, new = before[name], after[name]
+        # the same records on both sides, so the ratio of the times (startup cases
+        # have no records)
+        speed = old["seconds"] / new["seconds"]
+        rss = new["peak_rss_mb"] / old["peak_rss_mb"]
+        print(
+            f"{name:<24} {old['records_per_sec']:>14,.0f} "
+            f"{new['records_per_sec']:>14,.0f} {speed:>7.2f}x {rss:>7.2f}x"
+        )
+
+    missing = sorted(set(before) ^ set(after))
+    if missing:
+        print(f"only in one of the files: {', '.join(missing)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import random
+from itertools import accumulate
+from typing import List, TextIO
+
+HEADER: str = "time,user_id,x,y,color,mod"
+
+# r/place 2022 lasted about 3.5 days, in milliseconds since the first placement
+DURATION: int = 300_000_000
+
+# rows drawn at once
+BATCH: int = 10_000
+
+
+def user_weights(users: int, skew: float) -> List[float]:
+    """
+    Cumulative Zipf weights, the user of rank r places with weight 1 / (r + 1) ** skew
+    """
+    return list(accumulate(1 / (rank + 1) ** skew for rank in range(users)))
+
+
+def generate(
+    out: TextIO,
+    *,
+    rows: int,
+    users: int,
+    skew: float = 1.0,
+    mod_rate: float = 0.001,
+    seed: int = 0,
+) -> None:
+    """
+    Writes `rows` synthetic placements with the schema of the simplified csv.
+
+    Rows are in time order, spread over the length of the event. Users are drawn with
+    Zipf weights (`skew` 0 is uniform, the higher the more placements the top users
+    make) and their ids are shuffled so the heavy users are not the first ids. A
+    `mod_rate` share of the rows are moderator rectangles.
+    """
+    rng = random.Random(seed)
+
+    ids = list(range(users))
+    rng.shuffle(ids)
+    weights = user_weights(users, skew)
+
+    out.write(HEADER + "\n")
+
+    for start in range(0, rows, BATCH):
+        size = min(BATCH, rows - start)
+        drawn = rng.choices(ids, cum_weights=weights, k=size)
+        out.write(
+            "".join(
+                "%d,%d,%d,%d,%d,%d\n"
+                % (
+                    (start + i) * DURATION // rows,
+                    user_id,
+                    rng.randrange(2000),
+                    rng.randrange(2000),
+                    rng.randrange(32),
+                    rng.random() < mod_rate,
+                )
+                for i, user_id in enumerate(drawn)
+            )
+        )
@@ -0,0 +1,335 @@
+import os
+import sys
+import json
+import time
+import shlex
+import platform
+import argparse
+import tempfile
+import subprocess
+from fnmatch import fnmatch
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from benchmarks.data import generate
+
+ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN: str = os.path.join(ROOT, "main.py")
+
+
+@dataclass
+class Case:
+    """
+    A shell command to time, `input` is the file whose rows are the records processed
+    """
+
+    name: str
+    command: str
+    input: str
+    needs_numpy: bool = False
+
+
+@dataclass
+class Result:
+    name: str
+    records: int
+    seconds: float
+    records_per_sec: float
+    peak_rss_mb: float
+
+
+def main_py(args: str) -> str:
+    return f"{shlex.quote(sys.executable)} {shlex.quote(MAIN)} {args}"
+
+
+def count_records(path: str) -> int:
+    with open(path, "rb") as f:
+        rows = sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b""))
+    return rows - path.endswith(".csv")  # the csv header
+
+
+def run(command: str) -> Dict[str, float]:
+    """
+    Runs a shell command, returns its wall time and the peak RSS of its processes
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(command, shell=True, cwd=ROOT)
+    # the rusage of a child covers the processes it waited for, like a shell pipeline
+    _, status, usage = os.wait4(process.pid, 0)
+    seconds = time.perf_counter() - start
+    process.returncode = os.WEXITSTATUS(status)
+
+    if process.returncode:
+        raise RuntimeError(f"Benchmark command failed: {command}")
+
+    # ru_maxrss is in kilobytes on linux and bytes on macos
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {"seconds": seconds, "peak_rss_mb": usage.ru_maxrss * scale / 2**20}
+
+
+def prepare(folder: str, args: argparse.Namespace, numpy: bool) -> Dict[str, str]:
+    """
+    Generates the csv and the intermediate inputs of every stage (and the columnar
+    cache when numpy is available)
+    """
+    files = {
+        name: os.path.join(folder, name)
+        for name in (
+            "data.csv",
+            "user-mapped.tsv",
+            "user-reduced.tsv",
+            "quantity-mapped.tsv",
+            "cache",
+            "empty.tsv",
+        )
+    }
+    q = {name: shlex.quote(path) for name, path in files.items()}
+
+    open(files["empty.tsv"], "w").close()
+
+    with open(files["data.csv"], "w") as f:
+        generate(
+            f,
+            rows=args.rows,
+            users=args.users,
+            skew=args.skew,
+            mod_rate=args.mod_rate,
+            seed=args.seed,
+        )
+
+    for command in (
+        f"{main_py('--mapper=user --input ' + q['data.csv'])} | "
+        f"{main_py('--sort')} > {q['user-mapped.tsv']}",
+        f"{main_py('--reducer=user --input ' + q['user-mapped.tsv'])} "
+        f"> {q['user-reduced.tsv']}",
+        f"{main_py('--mapper=quantity --input ' + q['user-reduced.tsv'])} | "
+        f"{main_py('--sort')} > {q['quantity-mapped.tsv']}",
+    ):
+        run(command)
+
+    if numpy:
+        run(
+            main_py(
+                f"convert --input {q['data.csv']} --output {q['cache']} 2>/dev/null"
+            )
+        )
+
+    return files
+
+
+def cases(files: Dict[str, str], workers: int) -> List[Case]:
+    q = {name: shlex.quote(path) for name, path in files.items()}
+    csv = files["data.csv"]
+    null = "--output /dev/null"
+    empty = files["empty.tsv"]
+
+    chain = " | ".join(
+        [
+            main_py("--mapper=user --input {} {{format}}".format(q["data.csv"])),
+            main_py("--combiner=user {format}"),
+            main_py("--sort {format}"),
+            main_py("--reducer=user {format}"),
+            main_py("--mapper=quantity {format}"),
+            main_py("--reducer=quantity {input}"),
+        ]
+    )
+
+    return [
+        Case(
+            "mapper/user",
+            main_py(f"--mapper=user --input {q['data.csv']} {null}"),
+            csv,
+        ),
+        Case(
+            "reducer/user",
+            main_py(f"--reducer=user --input {q['user-mapped.tsv']} {null}"),
+            files["user-mapped.tsv"],
+        ),
+        Case(
+            "mapper/quantity",
+            main_py(f"--mapper=quantity --input {q['user-reduced.tsv']} {null}"),
+            files["user-reduced.tsv"],
+        ),
+        Case(
+            "reducer/quantity",
+            main_py(f"--reducer=quantity --input {q['quantity-mapped.tsv']} {null}"),
+            files["quantity-mapped.tsv"],
+        ),
+        Case(
+            "flow/shell",
+            chain.format(format="", input="") + " > /dev/null",
+            csv,
+        ),
+        Case(
+            "flow/shell-binary",
+            chain.format(format="--format=binary", input="--input-format=binary")
+            + " > /dev/null",
+            csv,
+        ),
+        Case(
+            "flow/pipeline",
+            main_py(f"--pipeline=user,quantity --input {q['data.csv']} {null}"),
+            csv,
+        ),
+        Case(
+            "flow/pipeline-unsorted",
+            main_py(
+                f"--pipeline=user,quantity --unsorted --input {q['data.csv']} {null}"
+            ),
+            csv,
+        ),
+        Case(
+            "flow/local",
+            main_py(
+                f"--pipeline=user,quantity --local --workers {workers} "
+                f"--input {q['data.csv']} {null}"
+            ),
+            csv,
+        ),
+        Case(
+            "flow/vectorized",
+            main_py(
+                f"--pipeline=user,quantity --engine=vectorized "
+                f"--input {q['data.csv']} {null}"
+            ),
+            csv,
+            needs_numpy=True,
+        ),
+        Case(
+            "flow/columnar",
+            main_py(
+                f"--pipeline=user,quantity --engine=vectorized "
+                f"--input {q['cache']} {null}"
+            ),
+            csv,
+            needs_numpy=True,
+        ),
+        # the time a Hadoop task needs before reading its first record
+        Case("startup/python", f"{shlex.quote(sys.executable)} -c pass", empty),
+        *(
+            Case(f"startup/{name}", main_py(f"--{stage}={flow} < /dev/null"), empty)
+            for name, stage, flow in (
+                ("user-mapper", "mapper", "user"),
+                ("user-combiner", "combiner", "user"),
+                ("user-reducer", "reducer", "user"),
+                ("quantity-mapper", "mapper", "quantity"),
+                ("quantity-reducer", "reducer", "quantity"),
+            )
+        ),
+    ]
+
+
+def has_numpy() -> bool:
+    return not subprocess.call(
+        [sys.executable, "-c", "import numpy, pandas"], stderr=subprocess.DEVNULL
+    )
+
+
+def benchmark(case: Case, repeat: int) -> Result:
+    """
+    Best wall time and highest peak RSS of `repeat` runs
+    """
+    runs = [run(case.command) for _ in range(repeat)]
+    records = count_records(case.input)
+    seconds = min(run["seconds"] for run in runs)
+
+    return Result(
+        name=case.name,
+        records=records,
+        seconds=round(seconds, 4),
+        records_per_sec=round(records / seconds, 1),
+        peak_rss_mb=round(max(run["peak_rss_mb"] for run in runs), 1),
+    )
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+            )
+            .decode()
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="records/sec and peak RSS of every mapper, reducer and flow",
+    )
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument(
+        "--skew",
+        type=float,
+        default=1.0,
+        help="zipf exponent of the users, 0 is uniform",
+    )
+    parser.add_argument("--mod-rate", type=float, default=0.001)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--cases",
+        type=str,
+        default="*",
+        help="comma separated glob patterns of the cases to run, e.g. mapper/*",
+    )
+    parser.add_argument("--tmp-dir", type=str, help="folder for the generated data")
+    parser.add_argument(
+        "--output", type=str, default="benchmark.json", help="json file of the results"
+    )
+    args = parser.parse_args()
+
+    patterns = args.cases.split(",")
+    numpy = has_numpy()
+    results: List[Dict[str, Any]] = []
+
+    with tempfile.TemporaryDirectory(prefix="bench-", dir=args.tmp_dir) as folder:
+        files = prepare(folder, args, numpy)
+
+        for case in cases(files, args.workers):
+            if not any(fnmatch(case.name, pattern) for pattern in patterns):
+                continue
+            if case.needs_numpy and not numpy:
+                print(f"{case.name:<24} skipped, needs numpy", file=sys.stderr)
+                continue
+
+            result = benchmark(case, args.repeat)
+            results.append(asdict(result))
+            print(
+                f"{result.name:<24} {result.records_per_sec:>14,.0f} rec/s "
+                f"{result.seconds:>9.3f} s {result.peak_rss_mb:>9.1f} MB",
+                file=sys.stderr,
+            )
+
+    report = {
+        "config": {
+            key: getattr(args, key)
+            for key in (
+                "rows",
+                "users",
+                "skew",
+                "mod_rate",
+                "seed",
+                "repeat",
+                "workers",
+            )
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "revision": git_revision(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,602 @@
 #!/usr/bin/python3
+import os
 import sys
 import argparse
-from typing import Dict, Tuple
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Iterator, List, Optional, TextIO, Tuple
 
-from src.mappers import Mapper, UserMapper, QuantityMapper
-from src.reducers import Reducer, UserReducer, QuantityReducer
+from src.lib import registry
+from src.lib.metrics import REPORT_INTERVAL, Metrics
+from src.lib.output import FileSink, Sink
+from src.lib.profiling import PROFILERS, SAMPLE_INTERVAL, ProfileConfig, profiled
+from src.lib.sort import SORT_MEMORY
 
+if TYPE_CHECKING:
+    from src.lib.columnar import ColumnarData
+    from src.mappers import Mapper
+    from src.reducers import Reducer
 
-def main():
+# Hadoop starts a process per task, so only what every stage needs is imported here,
+# the rest when the arguments ask for it (see `make startup`)
+
+VECTORIZED_PIPELINES: List[str] = ["user", "user,quantity"]
+
+
+def convert_main(argv: List[str]) -> None:
+    """
+    main.py convert: writes the columnar cache of the simplified csv, or with
+    --moderation the rectangles of the original export
+    """
+    from src.lib.columnar import CHUNK_ROWS, convert
+    from src.lib.compression import open_input
+
+    parser = argparse.ArgumentParser(prog="main.py convert")
+    parser.add_argument("--input", type=str, help="csv to convert instead of stdin")
+    parser.add_argument(
+        "--output", type=str, required=True, help="folder of the columnar cache"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=CHUNK_ROWS, help="rows parsed at once"
+    )
+    parser.add_argument(
+        "--moderation",
+        action="store_true",
+        help="the input is the original export, write its moderation rectangles",
+    )
+    args = parser.parse_args(argv)
+
+    source = open_input(args.input) if args.input else sys.stdin
+    if args.moderation:
+        from src.lib.moderation import ModerationIndex
+        from src.mappers.raw import RawPlacementMapper
+
+        mapper = RawPlacementMapper()
+        rectangles = (mapper.parse_rectangle(line.rstrip("\n")) for line in source)
+        index = ModerationIndex(rect for rect in rectangles if rect is not None)
+        index.save(args.output)
+        print(f"{len(index)} rectangles written to {args.output}", file=sys.stderr)
+        return
+
+    rows = convert(source, args.output, chunksize=args.chunk_size)
+    print(f"{rows} rows written to {args.output}", file=sys.stderr)
+
+
+def snapshots_main(argv: List[str]) -> None:
+    """
+    main.py snapshots: replays the placements and writes the canvas every --minutes
+    (see src/lib/canvas.py)
+    """
+    from src.lib.canvas import SNAPSHOT_INTERVAL, CanvasReplayer, line_chunks
+    from src.lib.columnar import ColumnarData, is_cache
+    from src.lib.compression import open_input
+
+    parser = argparse.ArgumentParser(prog="main.py snapshots")
+    parser.add_argument(
+        "--input", type=str, help="csv or columnar cache to replay instead of stdin"
+    )
+    parser.add_argument(
+        "--output", type=str, required=True, help="folder of the snapshots"
+    )
+    parser.add_argument(
+        "--minutes",
+        type=int,
+        default=SNAPSHOT_INTERVAL // 60000,
+        help="minutes between two snapshots",
+    )
+    parser.add_argument(
+        "--moderation",
+        type=str,
+        help="rectangles written by convert --moderation, painted instead of mod rows",
+    )
+    args = parser.parse_args(argv)
+
+    moderation = None
+    if args.moderation:
+        from src.lib.moderation import ModerationIndex
+
+        moderation = ModerationIndex.load(args.moderation)
+
+    data = ColumnarData(args.input) if is_cache(args.input) else None
+    replayer = CanvasReplayer(
+        args.output, data, moderation=moderation, interval=args.minutes * 60000
+    )
+    if data is not None:
+        written = replayer.build()
+    else:
+        source = open_input(args.input) if args.input else sys.stdin
+        written = replayer.build(line_chunks(source))
+    print(f"{written} snapshots written to {args.output}", file=sys.stderr)
+
+
+def history_main(argv: List[str]) -> None:
+    """
+    main.py history: writes the per pixel index of the placements (see
+    src/lib/history.py)
+    """
+    from src.lib.columnar import CHUNK_ROWS
+    from src.lib.history import PixelHistory
+
+    parser = argparse.ArgumentParser(prog="main.py history")
+    parser.add_argument(
+        "--input", type=str, required=True, help="csv or columnar cache to index"
+    )
+    parser.add_argument("--output", type=str, required=True, help="folder of the index")
+    parser.add_argument(
+        "--chunk-size", type=int, default=CHUNK_ROWS, help="rows read at once"
+    )
+    args = parser.parse_args(argv)
+
+    index = PixelHistory.build(args.input, args.output, chunksize=args.chunk_size)
+    print(f"{len(index)} placements indexed in {args.output}", file=sys.stderr)
+
+
+def build_main(argv: List[str]) -> None:
+    """
+    main.py build: writes the Hadoop Streaming scripts of every flow
+    """
+    from src.lib.bundle import build_all
 
-    AVAILABLE_FLOWS: Dict[str, Tuple[Mapper, Reducer]] = {
-        "user": (UserMapper(), UserReducer()),
-        "quantity": (QuantityMapper(), QuantityReducer()),
-    }
+    parser = argparse.ArgumentParser(prog="main.py build")
+    parser.add_argument(
+        "--output", type=str, default="output", help="folder of the scripts"
+    )
+    args = parser.parse_args(argv)
+
+    for path in build_all(args.output):
+        print(f"{path} written", file=sys.stderr)
+
+
+def stage_name(args: argparse.Namespace) -> str:
+    """
+    Name of the stage selected by the arguments, used by the metrics and profiles
+    """
+    if args.sort:
+        return "sort"
+    if args.combiner:
+        return f"{args.combiner}-combiner"
+    if args.mapper:
+        return f"{args.mapper}-mapper"
+    if args.reducer:
+        return f"{args.reducer}-reducer"
+    # hadoop counter groups cannot have commas
+    return "pipeline-" + args.pipeline.replace(",", "+")
+
+
+def main():
+    if sys.argv[1:2] == ["convert"]:
+        return convert_main(sys.argv[2:])
+    if sys.argv[1:2] == ["build"]:
+        return build_main(sys.argv[2:])
+    if sys.argv[1:2] == ["snapshots"]:
+        return snapshots_main(sys.argv[2:])
+    if sys.argv[1:2] == ["history"]:
+        return history_main(sys.argv[2:])
 
     parser = argparse.ArgumentParser()
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument("--mapper", type=str)
     group.add_argument("--reducer", type=str)
+    group.add_argument("--combiner", type=str)
+    group.add_argument(
+        "--sort",
+        action="store_true",
+        help="sort lines numerically by their first field (the shuffle between stages)",
+    )
+    group.add_argument(
+        "--pipeline",
+        type=str,
+        help="comma separated flows to run in a single process, e.g. user,quantity",
+    )
+    parser.add_argument(
+        "--output", type=str, help="write the results to this file instead of stdout"
+    )
+    parser.add_argument(
+        "--buffer-size",
+        type=int,
+        default=Sink.buffer_size,
+        help="number of lines written at once",
+    )
+    parser.add_argument(
+        "--local",
+        action="store_true",
+        help="run the pipeline over --input with a pool of --workers processes",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--input",
+        type=str,
+        help="file to read instead of stdin (gzip, bz2 and zstd are decompressed) or "
+        "a columnar cache (see main.py convert)",
+    )
+    parser.add_argument(
+        "--key-fields",
+        type=int,
+        default=1,
+        help="fields of the --sort key, 2 for the secondary sort of the timeline flow",
+    )
+    parser.add_argument(
+        "--sort-memory",
+        type=int,
+        default=SORT_MEMORY // (1024 * 1024),
+        help="memory budget of the sort, in MB",
+    )
+    parser.add_argument(
+        "--tmp-dir", type=str, help="folder for the sort runs and partitions"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["text", "binary"],
+        help="format of the records read and written, sets both of the following",
+    )
+    parser.add_argument("--input-format", choices=["text", "binary"])
+    parser.add_argument(
+        "--output-format",
+        choices=["text", "binary", "columnar"],
+        help="columnar writes the records of a reducer as a cache indexed by user_id, "
+        "in the --output folder",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["streaming", "vectorized"],
+        default="streaming",
+        help="vectorized runs the user and user,quantity pipelines with pandas/numpy",
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, help="rows read at once by the vectorized engine"
+    )
+    parser.add_argument(
+        "--unsorted",
+        action="store_true",
+        help="the user reducer hash aggregates its input, so it needs no sort before",
+    )
+    parser.add_argument(
+        "--ids",
+        type=str,
+        help="user id dictionary of the raw flow, loaded if the file exists, else "
+        "built while mapping and written there",
+    )
+    parser.add_argument(
+        "--metrics",
+        choices=["hadoop", "json"],
+        help="report record counters and timings as hadoop counters or a json summary",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=REPORT_INTERVAL,
+        help="seconds between two hadoop reports",
+    )
+    parser.add_argument(
+        "--metrics-output", type=str, help="write the metrics to this file, not stderr"
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="sampling",
+        choices=PROFILERS,
+        help="profile the stage (and every worker) into --profile-dir, sampling writes "
+        "flamegraph collapsed stacks and cprofile pstats files",
+    )
+    parser.add_argument(
+        "--profile-dir", type=str, default=".", help="folder of the profile files"
+    )
+    parser.add_argument(
+        "--profile-interval",
+        type=float,
+        default=SAMPLE_INTERVAL,
+        help="seconds of cpu time between two samples",
+    )
     args = parser.parse_args()
 
-    flow = AVAILABLE_FLOWS.get(args.mapper or args.reducer)
-    if not flow:
-        print(
-            "Invalid flow, please use one of the following: {}".format(
-                ", ".join(AVAILABLE_FLOWS.keys())
+    profile: Optional[ProfileConfig] = None
+    if args.profile:
+        profile = ProfileConfig(
+            mode=args.profile, folder=args.profile_dir, interval=args.profile_interval
+        )
+
+    with profiled(profile, stage_name(args)):
+        run(args, parser, profile)
+
+
+def run(
+    args: argparse.Namespace,
+    parser: argparse.ArgumentParser,
+    profile: Optional[ProfileConfig],
+) -> None:
+    input_format: str = args.input_format or args.format or "text"
+    output_format: str = args.output_format or args.format or "text"
+
+    if args.engine == "vectorized" and args.pipeline not in VECTORIZED_PIPELINES:
+        parser.error(
+            "--engine=vectorized supports --pipeline {}".format(
+                " or ".join(VECTORIZED_PIPELINES)
+            )
+        )
+
+    if args.engine == "vectorized" and input_format == "binary":
+        parser.error("--engine=vectorized reads the csv, not binary records")
+
+    if args.local and not (args.pipeline and args.input):
+        parser.error("--local needs --pipeline and --input")
+
+    if args.local and "sorter" in args.pipeline.split(","):
+        parser.error("--local cannot run the sorter flow, it changes the key")
+
+    if args.local and "raw" in args.pipeline.split(","):
+        if not (args.ids and os.path.exists(args.ids)):
+            parser.error(
+                "--local workers share the raw --ids dictionary, build it first with "
+                "--mapper=raw --ids"
+            )
+
+    columns: Optional["ColumnarData"] = None
+    if args.input and os.path.isdir(args.input):
+        from src.lib.columnar import ColumnarData, is_cache
+
+        if not is_cache(args.input):
+            parser.error(f"--input {args.input} is a folder but not a columnar cache")
+        if not (args.mapper or args.pipeline) or args.local:
+            parser.error(
+                "a columnar --input can only be read by --mapper or --pipeline"
+            )
+        columns = ColumnarData(args.input)
+    elif args.local:
+        from src.lib.compression import detect_compression
+
+        if detect_compression(args.input):
+            parser.error("--local needs an uncompressed --input, it is split in ranges")
+
+    if output_format == "columnar" and not (
+        args.output and (args.reducer or args.pipeline)
+    ):
+        parser.error(
+            "--output-format=columnar needs --output and a reducer or pipeline"
+        )
+
+    sink: Sink
+    if output_format == "columnar":
+        from src.lib.columnar import ColumnarSink
+
+        sink = ColumnarSink(args.output, index="user_id")
+    elif output_format == "binary":
+        from src.lib.binary import BinaryFileSink, BinarySink
+
+        sink = (
+            BinaryFileSink(args.output, buffer_size=args.buffer_size)
+            if args.output
+            else BinarySink(buffer_size=args.buffer_size)
+        )
+    else:
+        sink = (
+            FileSink(args.output, buffer_size=args.buffer_size)
+            if args.output
+            else Sink(buffer_size=args.buffer_size)
+        )
+
+    source: TextIO = sys.stdin
+    if args.input and not columns:
+        from src.lib.compression import open_input
+
+        source = open_input(args.input)
+
+    memory: int = args.sort_memory * 1024 * 1024
+
+    metrics: Optional[Metrics] = None
+    if args.metrics:
+        metrics = Metrics(
+            stage_name(args),
+            format=args.metrics,
+            interval=args.metrics_interval,
+            stream=open(args.metrics_output, "w") if args.metrics_output else None,
+        )
+
+    if args.sort:
+        from src.lib.binary import read_records
+        from src.lib.sort import sort_lines, sort_records
+
+        records: Iterator[Any]
+        lines: Iterator[str]
+        if input_format == "binary":
+            records = read_records(source.buffer)
+            if metrics is not None:
+                records = metrics.iterate(records, "input")
+            records = sort_records(
+                records, memory=memory, folder=args.tmp_dir, fields=args.key_fields
+            )
+            if metrics is not None:
+                records = metrics.iterate(records, "emitted")
+            with sink.buffered():
+                for record in records:
+                    sink.write_record(record, str)
+        else:
+            lines = (line.rstrip("\n") for line in source if line.strip())
+            if metrics is not None:
+                lines = metrics.iterate(lines, "input")
+            lines = sort_lines(
+                lines, memory=memory, folder=args.tmp_dir, fields=args.key_fields
+            )
+            if metrics is not None:
+                lines = metrics.iterate(lines, "emitted")
+            with sink.buffered():
+                for line in lines:
+                    sink.write(line)
+        sink.close()
+        if metrics is not None:
+            metrics.close()
+        return
+
+    names: List[str] = (
+        args.pipeline.split(",")
+        if args.pipeline
+        else [args.mapper or args.reducer or args.combiner]
+    )
+
+    paths: List[registry.FlowPaths] = []
+    for name in names:
+        flow = registry.get_flow(name)
+        if not flow or (args.combiner and not flow.combiner):
+            print(
+                "Invalid {}, please use one of the following: {}".format(
+                    "combiner" if args.combiner else "flow",
+                    ", ".join(
+                        name
+                        for name in registry.flow_names()
+                        if not args.combiner or registry.FLOWS[name].combiner
+                    ),
+                )
             )
+            sys.exit(1)
+        paths.append(flow)
+
+    # only the requested stages are imported and built
+    def mapper_factory(flow: registry.FlowPaths) -> Callable[[], Any]:
+        mapper = registry.load(flow.mapper)
+        return partial(mapper, ids=args.ids) if flow.ids else mapper
+
+    def reducer_factory(flow: registry.FlowPaths) -> Callable[[], Any]:
+        reducer = registry.load(flow.reducer)
+        if not flow.unsorted:
+            return reducer
+        # bound to the memory budget, so the reducer has to be built after parsing
+        return partial(
+            reducer, unsorted=args.unsorted, memory=memory, folder=args.tmp_dir
         )
-        sys.exit(1)
 
-    mapper, reducer = flow
+    if args.combiner:
+        combiner = registry.load(paths[0].combiner)()  # type: ignore[arg-type]
+        combiner.source = source
+        combiner.input_format = input_format
+        combiner.sink = sink
+        combiner.metrics = metrics
+        combiner.run()
+        sink.close()
+        return
 
     if args.mapper:
+        mapper = mapper_factory(paths[0])()
+        mapper.source = source
+        mapper.input_format = input_format
+        if columns is not None and not hasattr(mapper, "columns"):
+            parser.error(f"the {names[0]} mapper cannot read a columnar --input")
+        mapper.sink = sink
+        mapper.columns = columns
+        mapper.metrics = metrics
         mapper.run()
+        sink.close()
+        if paths[0].ids:
+            mapper.save_ids()
+        return
 
     if args.reducer:
+        reducer = reducer_factory(paths[0])()
+        reducer.source = source
+        reducer.input_format = input_format
+        reducer.sink = sink
+        reducer.metrics = metrics
         reducer.run()
+        sink.close()
+        return
+
+    factories: List[Tuple[Any, Any, Any]] = [
+        (
+            mapper_factory(flow),
+            reducer_factory(flow),
+            registry.load(flow.combiner) if flow.combiner else None,
+        )
+        for flow in paths
+    ]
+
+    if args.local:
+        from src.lib.local import run_local
+
+        try:
+            run_local(
+                args.input,
+                factories,
+                sink,
+                workers=args.workers,
+                memory=memory,
+                folder=args.tmp_dir,
+                metrics=metrics,
+                profile=profile,
+                input_format=input_format,
+            )
+            sink.close()
+        finally:
+            if metrics is not None:
+                metrics.close()
+        return
+
+    flows: List[Tuple["Mapper", "Reducer"]] = [
+        (mapper(), reducer()) for mapper, reducer, _ in factories
+    ]
+    combiners: List[Optional["Reducer"]] = [
+        combiner() if combiner else None for _, _, combiner in factories
+    ]
+
+    if args.engine == "vectorized":
+        from src.lib import vectorized
+
+        table = vectorized.aggregate_users(
+            args.input if columns else source,
+            first_ts=flows[0][0].first_ts,  # type: ignore[attr-defined]
+            chunksize=args.chunk_size or vectorized.CHUNK_SIZE,
+            metrics=metrics,
+        )
+        reducer = flows[-1][1]
+        records = (
+            vectorized.quantity_records(table, metrics)
+            if len(flows) > 1
+            else vectorized.user_records(table)
+        )
+        if metrics is not None:
+            records = metrics.iterate(records, "emitted")
+        with sink.buffered():
+            for record in records:
+                sink.write_record(record, reducer.format_record)
+        sink.close()
+        if metrics is not None:
+            metrics.close()
+        return
+
+    from src.lib.pipeline import run_pipeline
+
+    flows[0][0].source = flows[0][1].source = source
+    flows[0][0].input_format = flows[0][1].input_format = input_format
+
+    if columns is not None and not hasattr(flows[0][0], "columns"):
+        parser.error(f"the {names[0]} mapper cannot read a columnar --input")
+
+    if columns is not None:
+        inputs: Any = columns
+    elif input_format == "binary":
+        from src.lib.binary import read_records
+
+        inputs = read_records(flows[0][0].binary_source)
+    else:
+        inputs = flows[0][0].lines()
+
+    reducer = flows[-1][1]
+    reducer.sink = sink
+    try:
+        with sink.buffered():
+            for record in run_pipeline(
+                flows,
+                inputs,
+                combiners=combiners,
+                parsed=input_format == "binary",
+                columns=columns is not None,
+                memory=memory,
+                folder=args.tmp_dir,
+                metrics=metrics,
+            ):
+                reducer.emit(record)
+        sink.close()
+    finally:
+        if metrics is not None:
+            metrics.close()
+    if paths[0].ids:
+        flows[0][0].save_ids()  # type: ignore[attr-defined]
 
 
 if __name__ == "__main__":
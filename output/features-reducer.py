@@ -0,0 +1,266 @@
+#!/usr/bin/python3
+# Generated from src/ by `./main.py build`, do not edit.
+import sys
+from contextlib import contextmanager
+from itertools import groupby
+from math import log2, sqrt
+from operator import attrgetter
+
+
+class DataError(Exception):
+
+    def __init__(self, message, data):
+        self.data = data
+        super().__init__(message)
+
+    def __reduce__(self):
+        return (type(self), (str(self), self.data))
+
+
+class LineFormatError(DataError):
+
+    def __init__(self, message, data):
+        super().__init__(message, data)
+
+
+class Sink:
+    buffer_size = 8192
+    binary = False
+
+    def __init__(self, stream=None, *, buffer_size=None):
+        self._stream = stream
+        self._lines = []
+        self._buffering = False
+        if buffer_size is not None:
+            self.buffer_size = buffer_size
+
+    @property
+    def stream(self):
+        return self._stream if self._stream is not None else sys.stdout
+
+    def write(self, line):
+        lines = self._lines
+        lines.append(line)
+        if not self._buffering or len(lines) >= self.buffer_size:
+            self.flush()
+
+    def write_record(self, record, format):
+        self.write(format(record))
+
+    def flush(self):
+        if not self._lines:
+            return
+        self.stream.write('\n'.join(self._lines) + '\n')
+        self._lines = []
+
+    def sync(self):
+        self.stream.flush()
+
+    @contextmanager
+    def buffered(self):
+        previous, self._buffering = (self._buffering, True)
+        try:
+            yield self
+        finally:
+            self._buffering = previous
+            self.flush()
+            self.sync()
+
+
+class BaseReducer:
+    _source = sys.stdin
+    _sink = None
+    input_format = 'text'
+    grouped = False
+    filters = False
+    metrics = None
+
+    @property
+    def source(self):
+        return self._source
+
+    @source.setter
+    def source(self, source):
+        self._source = source
+
+    @property
+    def sink(self):
+        if self._sink is None:
+            self._sink = Sink()
+        return self._sink
+
+    @sink.setter
+    def sink(self, sink):
+        self._sink = sink
+
+    def emit(self, record):
+        self.sink.write_record(record, self.format_record)
+
+    def run(self):
+        with self.sink.buffered():
+            self.read()
+            for result in self.finish():
+                self.emit(result)
+
+    def finish(self):
+        return iter(())
+
+
+class TimelineReducer(BaseReducer):
+    grouped = True
+
+    def parse_line(self, line):
+        data = line.split('\t')
+        if len(data) != 2:
+            raise LineFormatError('Line should be user_id and timestamp by a tab', line)
+        if not (data[0].isdigit() and data[1].isdigit()):
+            raise LineFormatError('Line should be all integers', line)
+        return UserMoveMapped(user_id=int(data[0]), timestamp=int(data[1]), count=1)
+
+    def ordered(self, records):
+        previous = None
+        for record in records:
+            if previous is not None and record.timestamp < previous:
+                raise DataError('Timeline is not sorted', str(record.user_id))
+            previous = record.timestamp
+            yield record
+
+    def timelines(self, records):
+        metrics = self.metrics if self.filters else None
+        previous = None
+        for user_id, group in groupby(records, key=attrgetter('user_id')):
+            if previous is not None and user_id < previous:
+                raise DataError('Input is not sorted by user_id', str(user_id))
+            previous = user_id
+            results = self.reduce_placements(user_id, self.ordered(group))
+            yield from (results if metrics is None else metrics.skip_empty(results))
+
+    def reduce_placements(self, user_id, records):
+        return self.reduce_timeline(user_id, map(attrgetter('timestamp'), records))
+
+    def reduce_timeline(self, user_id, timestamps):
+        first = last = next(timestamps)
+        moves = 1
+        for last in timestamps:
+            moves += 1
+        yield UserMinMaxMove(user_id=user_id, min_ts=first, max_ts=last, moves=moves)
+
+    def read(self):
+        records = (self.parse_line(line.strip()) for line in self.source)
+        results = self.timelines(records)
+        for result in results:
+            self.emit(result)
+
+    def format_record(self, record):
+        return '%s\t%s#%s\t%s' % (record.user_id, record.min_ts, record.max_ts, record.moves)
+
+
+class FeaturesReducer(TimelineReducer):
+
+    def parse_line(self, line):
+        data = line.split('\t')
+        if len(data) != 5:
+            raise LineFormatError('Line should have 5 fields', line)
+        if not all(map(lambda x: x.isdigit(), data)):
+            raise LineFormatError('Line should be all integers', line)
+        user_id, timestamp, x, y, color = map(int, data)
+        return Placement(user_id, timestamp, x, y, color)
+
+    def reduce_placements(self, user_id, placements):
+        first = next(placements)
+        previous = first.timestamp
+        moves = 1
+        gap_mean = gap_m2 = 0.0
+        colors = [0] * PALETTE_SIZE
+        x_min = x_max = first.x
+        y_min = y_max = first.y
+        pixels = set()
+        try:
+            colors[first.color] += 1
+            pixels.add(first.y * CANVAS_SIZE + first.x)
+            for placement in placements:
+                gap = placement.timestamp - previous
+                previous = placement.timestamp
+                delta = gap - gap_mean
+                gap_mean += delta / moves
+                gap_m2 += delta * (gap - gap_mean)
+                moves += 1
+                colors[placement.color] += 1
+                x, y = (placement.x, placement.y)
+                if x < x_min:
+                    x_min = x
+                elif x > x_max:
+                    x_max = x
+                if y < y_min:
+                    y_min = y
+                elif y > y_max:
+                    y_max = y
+                pixels.add(y * CANVAS_SIZE + x)
+        except IndexError:
+            raise DataError('Color should be an index of the palette', str(user_id))
+        yield UserFeatures(user_id=user_id, moves=moves, span=previous - first.timestamp, gap_mean=gap_mean, gap_std=sqrt(gap_m2 / (moves - 1)) if moves > 1 else 0.0, color_entropy=sum((count / moves * log2(moves / count) for count in colors if count)), x_min=x_min, x_max=x_max, y_min=y_min, y_max=y_max, distinct_pixels=len(pixels), distinct_ratio=len(pixels) / moves)
+
+    def format_record(self, record):
+        return '%s\t%s\t%s\t%.4f\t%.4f\t%.4f\t%s\t%s\t%s\t%s\t%s\t%.4f' % (record.user_id, record.moves, record.span, record.gap_mean, record.gap_std, record.color_entropy, record.x_min, record.x_max, record.y_min, record.y_max, record.distinct_pixels, record.distinct_ratio)
+
+
+CANVAS_SIZE = 2000
+
+
+PALETTE_SIZE = 32
+
+
+class UserMoveMapped:
+    __slots__ = ('user_id', 'timestamp', 'count')
+    TAG = 2
+
+    def __init__(self, user_id, timestamp, count):
+        self.user_id = user_id
+        self.timestamp = timestamp
+        self.count = count
+
+
+class UserMinMaxMove:
+    __slots__ = ('user_id', 'min_ts', 'max_ts', 'moves')
+    TAG = 3
+
+    def __init__(self, user_id, min_ts, max_ts, moves):
+        self.user_id = user_id
+        self.min_ts = min_ts
+        self.max_ts = max_ts
+        self.moves = moves
+
+
+class Placement:
+    __slots__ = ('user_id', 'timestamp', 'x', 'y', 'color')
+    TAG = 7
+
+    def __init__(self, user_id, timestamp, x, y, color):
+        self.user_id = user_id
+        self.timestamp = timestamp
+        self.x = x
+        self.y = y
+        self.color = color
+
+
+class UserFeatures:
+    __slots__ = ('user_id', 'moves', 'span', 'gap_mean', 'gap_std', 'color_entropy', 'x_min', 'x_max', 'y_min', 'y_max', 'distinct_pixels', 'distinct_ratio')
+    TAG = 8
+
+    def __init__(self, user_id, moves, span, gap_mean, gap_std, color_entropy, x_min, x_max, y_min, y_max, distinct_pixels, distinct_ratio):
+        self.user_id = user_id
+        self.moves = moves
+        self.span = span
+        self.gap_mean = gap_mean
+        self.gap_std = gap_std
+        self.color_entropy = color_entropy
+        self.x_min = x_min
+        self.x_max = x_max
+        self.y_min = y_min
+        self.y_max = y_max
+        self.distinct_pixels = distinct_pixels
+        self.distinct_ratio = distinct_ratio
+
+
+if __name__ == "__main__":
+    FeaturesReducer().run()
@@ -1,119 +1,170 @@
 #!/usr/bin/python3
+# Generated from src/ by `./main.py build`, do not edit.
 import sys
-from abc import ABC, abstractmethod
-from typing import List, Union, TextIO
-from datetime import datetime
-from dataclasses import dataclass
-
-@dataclass
-class UserMinMaxMove:
-    """
-    Data class for a user with min ts and max ts, and number of move that the user made
-    """
-
-    user_id: str
-    min_ts: int
-    max_ts: int
-    moves: int
+from contextlib import contextmanager
 
 
 class DataError(Exception):
-    """Raises when there was an error trying to process data"""
 
-    def __init__(self, message: str, data: str):
+    def __init__(self, message, data):
         self.data = data
         super().__init__(message)
 
-
-class TimestampParseError(DataError):
-    """Raises when there was an error trying to parse a timestamp"""
-
-    def __init__(self, message: str, data: str):
-        super().__init__(message, data)
+    def __reduce__(self):
+        return (type(self), (str(self), self.data))
 
 
 class LineFormatError(DataError):
-    """Raises when there was an error trying to parse a line"""
 
-    def __init__(self, message: str, data: str):
+    def __init__(self, message, data):
         super().__init__(message, data)
 
 
-class Mapper(ABC):
+class Sink:
+    buffer_size = 8192
+    binary = False
+
+    def __init__(self, stream=None, *, buffer_size=None):
+        self._stream = stream
+        self._lines = []
+        self._buffering = False
+        if buffer_size is not None:
+            self.buffer_size = buffer_size
 
+    @property
+    def stream(self):
+        return self._stream if self._stream is not None else sys.stdout
+
+    def write(self, line):
+        lines = self._lines
+        lines.append(line)
+        if not self._buffering or len(lines) >= self.buffer_size:
+            self.flush()
+
+    def write_record(self, record, format):
+        self.write(format(record))
+
+    def flush(self):
+        if not self._lines:
+            return
+        self.stream.write('\n'.join(self._lines) + '\n')
+        self._lines = []
+
+    def sync(self):
+        self.stream.flush()
+
+    @contextmanager
+    def buffered(self):
+        previous, self._buffering = (self._buffering, True)
+        try:
+            yield self
+        finally:
+            self._buffering = previous
+            self.flush()
+            self.sync()
+
+
+class Mapper:
     _source = sys.stdin
+    _sink = None
+    input_format = 'text'
+    metrics = None
 
     @property
-    def source(self) -> TextIO:
+    def source(self):
         return self._source
 
     @source.setter
-    def source(self, source: TextIO) -> None:
+    def source(self, source):
         self._source = source
 
-    def read(self) -> None:
+    @property
+    def sink(self):
+        if self._sink is None:
+            self._sink = Sink()
+        return self._sink
+
+    @sink.setter
+    def sink(self, sink):
+        self._sink = sink
+
+    def emit(self, record):
+        self.sink.write_record(record, self.format_record)
+
+    def lines(self):
         for line in self.source:
             line = line.strip()
             if not line:
                 return
+            yield line
+
+    def read(self):
+        for line in self.lines():
             self.map(line)
 
-    def run(self) -> None:
-        self.read()
+    def run(self):
+        with self.sink.buffered():
+            self.read()
 
-    @abstractmethod
-    def map(self, line: str) -> None:
-        ...
+    def map(self, line):
+        record = self.parse_line(line)
+        if record is None:
+            return
+        for result in self.map_record(record):
+            self.emit(result)
 
 
 class QuantityMapper(Mapper):
-    @staticmethod
-    def calculate_max_moves(min_ts: int, max_ts: int) -> int:
-        return ((max_ts - min_ts) // (5 * 60 * 1000)) + 1
 
-    def parse_line(self, line: str) -> UserMinMaxMove:
-        data = line.split("\t")
+    @staticmethod
+    def calculate_max_moves(min_ts, max_ts):
+        return (max_ts - min_ts) // (5 * 60 * 1000) + 1
 
+    def parse_line(self, line):
+        data = line.split('\t')
         if len(data) != 3:
-            raise LineFormatError("Line should have 3 fields", line)
-
+            raise LineFormatError('Line should have 3 fields', line)
         user_id, ts, moves = data
-
         if not user_id.isdigit():
-            raise LineFormatError("User id should be an integer", line)
-
+            raise LineFormatError('User id should be an integer', line)
         if not moves.isdigit():
-            raise LineFormatError("Moves should be an integer", line)
-
-        ts_info = ts.split("#")
-
+            raise LineFormatError('Moves should be an integer', line)
+        ts_info = ts.split('#')
         if len(ts_info) != 2:
             raise LineFormatError("Timestamp should be separated by '#'", line)
-
         min_ts, max_ts = ts_info
-
         if not min_ts.isdigit() or not max_ts.isdigit():
-            raise LineFormatError("Timestamp should be an integer", line)
+            raise LineFormatError('Timestamp should be an integer', line)
+        return UserMinMaxMove(user_id=int(user_id), min_ts=int(min_ts), max_ts=int(max_ts), moves=int(moves))
+
+    def map_record(self, user):
+        yield UserMinMaxMoveMapped(user_id=user.user_id, diff_ts=user.max_ts - user.min_ts, max_moves=self.calculate_max_moves(user.min_ts, user.max_ts), moves=user.moves)
+
+    def format_record(self, record):
+        return f'{record.user_id}\t{record.diff_ts}\t{record.max_moves}\t{record.moves}'
+
+
+class UserMinMaxMove:
+    __slots__ = ('user_id', 'min_ts', 'max_ts', 'moves')
+    TAG = 3
 
-        return UserMinMaxMove(
-            user_id=user_id,
-            min_ts=int(min_ts),
-            max_ts=int(max_ts),
-            moves=int(moves),
-        )
+    def __init__(self, user_id, min_ts, max_ts, moves):
+        self.user_id = user_id
+        self.min_ts = min_ts
+        self.max_ts = max_ts
+        self.moves = moves
 
-    def map(self, line: str) -> None:
-        user = self.parse_line(line)
-        max_moves: int = self.calculate_max_moves(user.min_ts, user.max_ts)
-        # formatting to 10 characters for timestamp
-        ts_diff : str = str(user.max_ts - user.min_ts).zfill(10)
-        print(f"{user.user_id}\t{ts_diff}\t{max_moves}\t{user.moves}")
 
+class UserMinMaxMoveMapped:
+    __slots__ = ('user_id', 'diff_ts', 'max_moves', 'moves')
+    TAG = 4
 
-def main():
-    mapper = QuantityMapper()
-    mapper.run()
+    def __init__(self, user_id, diff_ts, max_moves, moves):
+        self.user_id = user_id
+        self.diff_ts = diff_ts
+        self.max_moves = max_moves
+        self.moves = moves
 
 
 if __name__ == "__main__":
-    main()
+    QuantityMapper().run()
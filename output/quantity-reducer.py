@@ -1,110 +1,153 @@
 #!/usr/bin/python3
+# Generated from src/ by `./main.py build`, do not edit.
 import sys
-from abc import ABC, abstractmethod
-from typing import Union, TextIO
-from dataclasses import dataclass
-
-
-@dataclass
-class UserMinMaxMoveMapped:
-    """
-    Data class when UserMinMaxMove was processed by the mapper
-    """
-
-    user_id: str
-    diff_ts: int
-    max_moves: int
-    moves: int
+from contextlib import contextmanager
 
 
 class DataError(Exception):
-    """Raises when there was an error trying to process data"""
 
-    def __init__(self, message: str, data: str):
+    def __init__(self, message, data):
         self.data = data
         super().__init__(message)
 
+    def __reduce__(self):
+        return (type(self), (str(self), self.data))
 
-class TimestampParseError(DataError):
-    """Raises when there was an error trying to parse a timestamp"""
 
-    def __init__(self, message: str, data: str):
+class LineFormatError(DataError):
+
+    def __init__(self, message, data):
         super().__init__(message, data)
 
 
-class LineFormatError(DataError):
-    """Raises when there was an error trying to parse a line"""
+class Sink:
+    buffer_size = 8192
+    binary = False
 
-    def __init__(self, message: str, data: str):
-        super().__init__(message, data)
+    def __init__(self, stream=None, *, buffer_size=None):
+        self._stream = stream
+        self._lines = []
+        self._buffering = False
+        if buffer_size is not None:
+            self.buffer_size = buffer_size
 
+    @property
+    def stream(self):
+        return self._stream if self._stream is not None else sys.stdout
 
-class Reducer(ABC):
+    def write(self, line):
+        lines = self._lines
+        lines.append(line)
+        if not self._buffering or len(lines) >= self.buffer_size:
+            self.flush()
 
+    def write_record(self, record, format):
+        self.write(format(record))
+
+    def flush(self):
+        if not self._lines:
+            return
+        self.stream.write('\n'.join(self._lines) + '\n')
+        self._lines = []
+
+    def sync(self):
+        self.stream.flush()
+
+    @contextmanager
+    def buffered(self):
+        previous, self._buffering = (self._buffering, True)
+        try:
+            yield self
+        finally:
+            self._buffering = previous
+            self.flush()
+            self.sync()
+
+
+class BaseReducer:
     _source = sys.stdin
-    _buffer = ""
+    _sink = None
+    input_format = 'text'
+    grouped = False
+    filters = False
+    metrics = None
 
     @property
-    def source(self) -> TextIO:
+    def source(self):
         return self._source
 
     @source.setter
-    def source(self, source: TextIO) -> None:
+    def source(self, source):
         self._source = source
 
-    def read(self) -> None:
-        for line in self.source:
-            line = line.strip()
+    @property
+    def sink(self):
+        if self._sink is None:
+            self._sink = Sink()
+        return self._sink
 
-            self.reduce(line)
+    @sink.setter
+    def sink(self, sink):
+        self._sink = sink
 
-    def run(self) -> None:
-        self.read()
+    def emit(self, record):
+        self.sink.write_record(record, self.format_record)
 
-        if self._buffer != "":
-            print(self._buffer)
+    def run(self):
+        with self.sink.buffered():
+            self.read()
+            for result in self.finish():
+                self.emit(result)
 
-    @abstractmethod
-    def reduce(self, data: str) -> None:
-        ...
+    def finish(self):
+        return iter(())
 
 
-class QuantityReducer(Reducer):
-    def parse_line(self, line: str) -> UserMinMaxMoveMapped:
-        data = line.split("\t")
+class Reducer(BaseReducer):
 
-        if len(data) != 4:
-            raise LineFormatError("Line should have 4 fields", line)
+    def read(self):
+        for line in self.source:
+            line = line.strip()
+            self.reduce(line)
 
-        if not all(map(lambda x: x.isdigit(), data)):
-            raise LineFormatError("Line should have only digits", line)
+    def reduce(self, line):
+        for result in self.reduce_record(self.parse_line(line)):
+            self.emit(result)
 
-        user_id, diff_ts, max_moves, moves = data
 
-        return UserMinMaxMoveMapped(
-            user_id=user_id,
-            diff_ts=int(diff_ts),
-            max_moves=int(max_moves),
-            moves=int(moves),
-        )
+class QuantityReducer(Reducer):
+    filters = True
 
-    def reduce(self, line: str) -> None:
-        user = self.parse_line(line)
+    def parse_line(self, line):
+        data = line.split('\t')
+        if len(data) != 4:
+            raise LineFormatError('Line should have 4 fields', line)
+        if not all(map(lambda x: x.isdigit(), data)):
+            raise LineFormatError('Line should have only digits', line)
+        user_id, diff_ts, max_moves, moves = data
+        return UserMinMaxMoveMapped(user_id=int(user_id), diff_ts=int(diff_ts), max_moves=int(max_moves), moves=int(moves))
 
+    def reduce_record(self, user):
         if user.diff_ts == 0 or user.max_moves - user.moves > 2:
             return
-
-        if user.moves < 10:
+        if user.moves < 5:
             return
+        yield user
 
-        out_ts : str = str(user.diff_ts).zfill(10)
-        print(f"{user.user_id}\t{out_ts}\t{user.max_moves}\t{user.moves}")
+    def format_record(self, record):
+        return f'{record.user_id}\t{record.diff_ts}\t{record.max_moves}\t{record.moves}'
 
 
-def main():
-    reducer = QuantityReducer()
-    reducer.run()
+class UserMinMaxMoveMapped:
+    __slots__ = ('user_id', 'diff_ts', 'max_moves', 'moves')
+    TAG = 4
+
+    def __init__(self, user_id, diff_ts, max_moves, moves):
+        self.user_id = user_id
+        self.diff_ts = diff_ts
+        self.max_moves = max_moves
+        self.moves = moves
 
 
 if __name__ == "__main__":
-    main()
+    QuantityReducer().run()
@@ -0,0 +1,368 @@
+#!/usr/bin/python3
+# Generated from src/ by `./main.py build`, do not edit.
+import binascii
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from contextlib import contextmanager
+
+
+class DataError(Exception):
+
+    def __init__(self, message, data):
+        self.data = data
+        super().__init__(message)
+
+    def __reduce__(self):
+        return (type(self), (str(self), self.data))
+
+
+class TimestampParseError(DataError):
+
+    def __init__(self, message, data):
+        super().__init__(message, data)
+
+
+class LineFormatError(DataError):
+
+    def __init__(self, message, data):
+        super().__init__(message, data)
+
+
+MAGIC = b'MDPI'
+
+
+VERSION = 1
+
+
+HEADER = struct.Struct('<4sBQQ')
+
+
+HEADER_SIZE = 64
+
+
+EMPTY = -1
+
+
+MAX_LOAD = 0.7
+
+
+def key_of(user):
+    if len(user) == 88 and user.endswith('=='):
+        try:
+            return int.from_bytes(binascii.a2b_base64(user[:12])[:8], 'little')
+        except binascii.Error:
+            pass
+    return int.from_bytes(hashlib.blake2b(user.encode(), digest_size=8).digest(), 'little')
+
+
+class IdDictionary:
+
+    def __init__(self, capacity=1024):
+        size = 1
+        while size < capacity:
+            size *= 2
+        self.keys = array('Q', [0]) * size
+        self.ids = array('i', [EMPTY]) * size
+        self.count = 0
+        self.frozen = False
+        self._mmap = None
+
+    def __len__(self):
+        return self.count
+
+    def _slot(self, key):
+        keys, ids = (self.keys, self.ids)
+        mask = len(ids) - 1
+        slot = key & mask
+        while ids[slot] != EMPTY and keys[slot] != key:
+            slot = slot + 1 & mask
+        return slot
+
+    def get(self, user):
+        user_id = self.ids[self._slot(key_of(user))]
+        return None if user_id == EMPTY else user_id
+
+    def intern(self, user):
+        key = key_of(user)
+        slot = self._slot(key)
+        user_id = self.ids[slot]
+        if user_id != EMPTY:
+            return user_id
+        if self.frozen:
+            raise DataError('User is not in the id dictionary', user)
+        user_id = self.count
+        self.keys[slot] = key
+        self.ids[slot] = user_id
+        self.count += 1
+        if self.count > MAX_LOAD * len(self.ids):
+            self._grow()
+        return user_id
+
+    def _grow(self):
+        keys, ids = (self.keys, self.ids)
+        self.keys = array('Q', [0]) * (2 * len(ids))
+        self.ids = array('i', [EMPTY]) * (2 * len(ids))
+        for key, user_id in zip(keys, ids):
+            if user_id != EMPTY:
+                slot = self._slot(key)
+                self.keys[slot] = key
+                self.ids[slot] = user_id
+
+    @classmethod
+    def load(cls, path, *, frozen=True):
+        with open(path, 'rb') as f:
+            magic, version, capacity, count = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise DataError('File is not an id dictionary', path)
+            if version != VERSION:
+                raise DataError('Unsupported id dictionary version', str(version))
+            if capacity & capacity - 1 or os.fstat(f.fileno()).st_size != HEADER_SIZE + capacity * 12:
+                raise DataError('Truncated id dictionary', path)
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        ids = cls(1)
+        ids._mmap = data
+        view = memoryview(data)
+        ids.keys = view[HEADER_SIZE:HEADER_SIZE + capacity * 8].cast('Q')
+        ids.ids = view[HEADER_SIZE + capacity * 8:].cast('i')
+        ids.count = count
+        ids.frozen = True
+        if not frozen:
+            keys, table = (array('Q'), array('i'))
+            keys.frombytes(ids.keys.cast('B'))
+            table.frombytes(ids.ids.cast('B'))
+            ids.keys, ids.ids, ids._mmap = (keys, table, None)
+            ids.frozen = False
+        return ids
+
+
+class Sink:
+    buffer_size = 8192
+    binary = False
+
+    def __init__(self, stream=None, *, buffer_size=None):
+        self._stream = stream
+        self._lines = []
+        self._buffering = False
+        if buffer_size is not None:
+            self.buffer_size = buffer_size
+
+    @property
+    def stream(self):
+        return self._stream if self._stream is not None else sys.stdout
+
+    def write(self, line):
+        lines = self._lines
+        lines.append(line)
+        if not self._buffering or len(lines) >= self.buffer_size:
+            self.flush()
+
+    def write_record(self, record, format):
+        self.write(format(record))
+
+    def flush(self):
+        if not self._lines:
+            return
+        self.stream.write('\n'.join(self._lines) + '\n')
+        self._lines = []
+
+    def sync(self):
+        self.stream.flush()
+
+    @contextmanager
+    def buffered(self):
+        previous, self._buffering = (self._buffering, True)
+        try:
+            yield self
+        finally:
+            self._buffering = previous
+            self.flush()
+            self.sync()
+
+
+MS_PER_DAY = 24 * 60 * 60 * 1000
+
+
+DAY_CACHE_SIZE = 4096
+
+
+_day_offsets = {}
+
+
+def days_from_civil(year, month, day):
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + 12 * (month <= 2) - 3) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def days_in_month(year, month):
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    return 30 + (month + month // 8) % 2 - (month == 2) * (2 - leap)
+
+
+def valid_date(year, month, day):
+    return (1 <= month) & (month <= 12) & (1 <= day) & (day <= days_in_month(year, month))
+
+
+def valid_time(hours, minutes, seconds):
+    return (hours <= 23) & (minutes <= 59) & (seconds <= 59)
+
+
+def day_offset(date):
+    offset = _day_offsets.get(date)
+    if offset is not None:
+        return offset
+    if not (len(date) == 10 and date[4] == date[7] == '-' and (date[:4] + date[5:7] + date[8:]).isdigit()):
+        raise TimestampParseError('Date should be YYYY-MM-DD', date)
+    year, month, day = (int(date[:4]), int(date[5:7]), int(date[8:]))
+    if not valid_date(year, month, day):
+        raise TimestampParseError('Date out of range', date)
+    if len(_day_offsets) >= DAY_CACHE_SIZE:
+        _day_offsets.clear()
+    offset = _day_offsets[date] = days_from_civil(year, month, day) * MS_PER_DAY
+    return offset
+
+
+def parse_timestamp(text):
+    if text.endswith(' UTC'):
+        text = text[:-4]
+    clock = text[11:19]
+    if not (len(text) >= 19 and text[10] in ' T' and (clock[2] == clock[5] == ':') and (clock[:2] + clock[3:5] + clock[6:]).isdigit()):
+        raise TimestampParseError('Timestamp should be YYYY-MM-DD HH:MM:SS', text)
+    hours, minutes, seconds = (int(clock[:2]), int(clock[3:5]), int(clock[6:]))
+    if not valid_time(hours, minutes, seconds):
+        raise TimestampParseError('Time out of range', text)
+    milliseconds = 0
+    if len(text) > 19:
+        fraction = text[20:]
+        if text[19] != '.' or not fraction.isdigit():
+            raise TimestampParseError('Fraction of second should be .fff', text)
+        milliseconds = int(fraction[:3].ljust(3, '0'))
+    return day_offset(text[:10]) + hours * 3600000 + minutes * 60000 + seconds * 1000 + milliseconds
+
+
+class Mapper:
+    _source = sys.stdin
+    _sink = None
+    input_format = 'text'
+    metrics = None
+
+    @property
+    def source(self):
+        return self._source
+
+    @source.setter
+    def source(self, source):
+        self._source = source
+
+    @property
+    def sink(self):
+        if self._sink is None:
+            self._sink = Sink()
+        return self._sink
+
+    @sink.setter
+    def sink(self, sink):
+        self._sink = sink
+
+    def emit(self, record):
+        self.sink.write_record(record, self.format_record)
+
+    def lines(self):
+        for line in self.source:
+            line = line.strip()
+            if not line:
+                return
+            yield line
+
+    def read(self):
+        for line in self.lines():
+            self.map(line)
+
+    def run(self):
+        with self.sink.buffered():
+            self.read()
+
+    def map(self, line):
+        record = self.parse_line(line)
+        if record is None:
+            return
+        for result in self.map_record(record):
+            self.emit(result)
+
+
+PALETTE = ['#6D001A', '#BE0039', '#FF4500', '#FFA800', '#FFD635', '#FFF8B8', '#00A368', '#00CC78', '#7EED56', '#00756F', '#009EAA', '#00CCC0', '#2450A4', '#3690EA', '#51E9F4', '#493AC1', '#6A5CFF', '#94B3FF', '#811E9F', '#B44AC0', '#E4ABFF', '#DE107F', '#FF3881', '#FF99AA', '#6D482F', '#9C6926', '#FFB470', '#000000', '#515252', '#898D90', '#D4D7D9', '#FFFFFF']
+
+
+COLORS = {color: index for index, color in enumerate(PALETTE)}
+
+
+class RawPlacementMapper(Mapper):
+
+    def __init__(self, ids=None):
+        self.ids_path = ids
+        self.ids = IdDictionary.load(ids) if ids is not None and os.path.exists(ids) else IdDictionary()
+
+    def split(self, line):
+        if line.startswith('timestamp,'):
+            return None
+        data = line.split(',')
+        if len(data) != 5 and len(data) != 7:
+            raise LineFormatError('Line should have 4 fields, the coordinate quoted', line)
+        data[3], data[-1] = (data[3].lstrip('"'), data[-1].rstrip('"'))
+        if not all((value.isdigit() for value in data[3:])):
+            raise LineFormatError('Coordinates should be integers', line)
+        color = COLORS.get(data[2].upper())
+        if color is None:
+            raise LineFormatError('Color should be one of the palette', line)
+        return (data[0], data[1], color, [int(value) for value in data[3:]])
+
+    def parse_line(self, line):
+        fields = self.split(line)
+        if fields is None:
+            return None
+        timestamp, user, color, coordinates = fields
+        return UserMove(timestamp=parse_timestamp(timestamp), user_id=self.ids.intern(user), x=coordinates[0], y=coordinates[1], color=color, is_mod=len(coordinates) == 4)
+
+    def map_record(self, move):
+        if move.is_mod:
+            return
+        yield UserMoveMapped(user_id=move.user_id, timestamp=move.timestamp, count=1)
+
+    def format_record(self, record):
+        return f'{record.user_id}\t{record.timestamp}\t{record.count}'
+
+
+class UserMove:
+    __slots__ = ('timestamp', 'user_id', 'x', 'y', 'color', 'is_mod')
+    TAG = 1
+
+    def __init__(self, timestamp, user_id, x, y, color, is_mod):
+        self.timestamp = timestamp
+        self.user_id = user_id
+        self.x = x
+        self.y = y
+        self.color = color
+        self.is_mod = is_mod
+
+
+class UserMoveMapped:
+    __slots__ = ('user_id', 'timestamp', 'count')
+    TAG = 2
+
+    def __init__(self, user_id, timestamp, count):
+        self.user_id = user_id
+        self.timestamp = timestamp
+        self.count = count
+
+
+if __name__ == "__main__":
+    mapper = RawPlacementMapper()
+    mapper.ids = IdDictionary.load("users.ids")
+    mapper.run()
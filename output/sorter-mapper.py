@@ -1,110 +1,147 @@
 #!/usr/bin/python3
+# Generated from src/ by `./main.py build`, do not edit.
 import sys
-from abc import ABC, abstractmethod
-from typing import List, Union, TextIO
-from datetime import datetime
-from dataclasses import dataclass
-
-@dataclass
-class UserMinMaxMoveReduced:
-    """
-    Data class when UserMinMaxMove was processed by the reducer
-    """
-
-    user_id: str
-    diff_ts: int
-    max_moves: int
-    moves: int
+from contextlib import contextmanager
 
 
 class DataError(Exception):
-    """Raises when there was an error trying to process data"""
 
-    def __init__(self, message: str, data: str):
+    def __init__(self, message, data):
         self.data = data
         super().__init__(message)
 
-
-class TimestampParseError(DataError):
-    """Raises when there was an error trying to parse a timestamp"""
-
-    def __init__(self, message: str, data: str):
-        super().__init__(message, data)
+    def __reduce__(self):
+        return (type(self), (str(self), self.data))
 
 
 class LineFormatError(DataError):
-    """Raises when there was an error trying to parse a line"""
 
-    def __init__(self, message: str, data: str):
+    def __init__(self, message, data):
         super().__init__(message, data)
 
 
-class Mapper(ABC):
+class Sink:
+    buffer_size = 8192
+    binary = False
+
+    def __init__(self, stream=None, *, buffer_size=None):
+        self._stream = stream
+        self._lines = []
+        self._buffering = False
+        if buffer_size is not None:
+            self.buffer_size = buffer_size
 
+    @property
+    def stream(self):
+        return self._stream if self._stream is not None else sys.stdout
+
+    def write(self, line):
+        lines = self._lines
+        lines.append(line)
+        if not self._buffering or len(lines) >= self.buffer_size:
+            self.flush()
+
+    def write_record(self, record, format):
+        self.write(format(record))
+
+    def flush(self):
+        if not self._lines:
+            return
+        self.stream.write('\n'.join(self._lines) + '\n')
+        self._lines = []
+
+    def sync(self):
+        self.stream.flush()
+
+    @contextmanager
+    def buffered(self):
+        previous, self._buffering = (self._buffering, True)
+        try:
+            yield self
+        finally:
+            self._buffering = previous
+            self.flush()
+            self.sync()
+
+
+class Mapper:
     _source = sys.stdin
+    _sink = None
+    input_format = 'text'
+    metrics = None
 
     @property
-    def source(self) -> TextIO:
+    def source(self):
         return self._source
 
     @source.setter
-    def source(self, source: TextIO) -> None:
+    def source(self, source):
         self._source = source
 
-    def read(self) -> None:
+    @property
+    def sink(self):
+        if self._sink is None:
+            self._sink = Sink()
+        return self._sink
+
+    @sink.setter
+    def sink(self, sink):
+        self._sink = sink
+
+    def emit(self, record):
+        self.sink.write_record(record, self.format_record)
+
+    def lines(self):
         for line in self.source:
             line = line.strip()
             if not line:
                 return
+            yield line
+
+    def read(self):
+        for line in self.lines():
             self.map(line)
 
-    def run(self) -> None:
-        self.read()
+    def run(self):
+        with self.sink.buffered():
+            self.read()
 
-    @abstractmethod
-    def map(self, line: str) -> None:
-        ...
+    def map(self, line):
+        record = self.parse_line(line)
+        if record is None:
+            return
+        for result in self.map_record(record):
+            self.emit(result)
 
 
-class MovesSorterMapper(Mapper):
-    def parse_line(self, line: str) -> UserMinMaxMoveReduced:
-        data = line.split("\t")
+class SorterMapper(Mapper):
 
+    def parse_line(self, line):
+        data = line.split('\t')
         if len(data) != 4:
-            raise LineFormatError("Line should have 4 fields", line)
-
+            raise LineFormatError('Line should have 4 fields', line)
+        if not all(map(lambda x: x.isdigit(), data)):
+            raise LineFormatError('Line should have only digits', line)
         user_id, diff_ts, max_moves, moves = data
+        return UserMinMaxMoveMapped(user_id=int(user_id), diff_ts=int(diff_ts), max_moves=int(max_moves), moves=int(moves))
 
-        if not user_id.isdigit():
-            raise LineFormatError("User id should be an integer", line)
-        
-        if not diff_ts.isdigit():
-            raise LineFormatError("Timestamp should be an integer", line)
-        
-        if not max_moves.isdigit():
-            raise LineFormatError("Moves should be an integer", line)
-
-        if not moves.isdigit():
-            raise LineFormatError("Moves should be an integer", line)
+    def map_record(self, user):
+        yield user
 
-        return UserMinMaxMoveReduced(
-            user_id=user_id,
-            diff_ts=int(diff_ts),
-            max_moves=int(max_moves),
-            moves=int(moves),
-        )
+    def format_record(self, record):
+        return f'{record.moves}\t{record.user_id}\t{record.diff_ts}\t{record.max_moves}'
 
-    def map(self, line: str) -> None:
-        user = self.parse_line(line)
-        # formatting to 10 characters for timestamp
-        ts_diff : str = str(user.diff_ts).zfill(10)
-        print(f"{user.moves}\t{user.user_id}\t{ts_diff}\t{user.max_moves}")
 
+class UserMinMaxMoveMapped:
+    __slots__ = ('user_id', 'diff_ts', 'max_moves', 'moves')
+    TAG = 4
 
-def main():
-    mapper = MovesSorterMapper()
-    mapper.run()
+    def __init__(self, user_id, diff_ts, max_moves, moves):
+        self.user_id = user_id
+        self.diff_ts = diff_ts
+        self.max_moves = max_moves
+        self.moves = moves
 
 
 if __name__ == "__main__":
-    main()
+    SorterMapper().run()
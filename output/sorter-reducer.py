@@ -1,112 +1,149 @@
 #!/usr/bin/python3
+# Generated from src/ by `./main.py build`, do not edit.
 import sys
-from abc import ABC, abstractmethod
-from typing import Union, TextIO
-from dataclasses import dataclass
-
-
-@dataclass
-class MoveUserDiffMaxMapped:
-    """
-    Data class when MoveUserDiffMax was processed by the mapper
-    """
-
-    moves: int
-    user_id: str
-    diff_ts: int
-    max_moves: int
+from contextlib import contextmanager
 
 
 class DataError(Exception):
-    """Raises when there was an error trying to process data"""
 
-    def __init__(self, message: str, data: str):
+    def __init__(self, message, data):
         self.data = data
         super().__init__(message)
 
-
-class TimestampParseError(DataError):
-    """Raises when there was an error trying to parse a timestamp"""
-
-    def __init__(self, message: str, data: str):
-        super().__init__(message, data)
+    def __reduce__(self):
+        return (type(self), (str(self), self.data))
 
 
 class LineFormatError(DataError):
-    """Raises when there was an error trying to parse a line"""
 
-    def __init__(self, message: str, data: str):
+    def __init__(self, message, data):
         super().__init__(message, data)
 
 
-class Reducer(ABC):
+class Sink:
+    buffer_size = 8192
+    binary = False
+
+    def __init__(self, stream=None, *, buffer_size=None):
+        self._stream = stream
+        self._lines = []
+        self._buffering = False
+        if buffer_size is not None:
+            self.buffer_size = buffer_size
 
+    @property
+    def stream(self):
+        return self._stream if self._stream is not None else sys.stdout
+
+    def write(self, line):
+        lines = self._lines
+        lines.append(line)
+        if not self._buffering or len(lines) >= self.buffer_size:
+            self.flush()
+
+    def write_record(self, record, format):
+        self.write(format(record))
+
+    def flush(self):
+        if not self._lines:
+            return
+        self.stream.write('\n'.join(self._lines) + '\n')
+        self._lines = []
+
+    def sync(self):
+        self.stream.flush()
+
+    @contextmanager
+    def buffered(self):
+        previous, self._buffering = (self._buffering, True)
+        try:
+            yield self
+        finally:
+            self._buffering = previous
+            self.flush()
+            self.sync()
+
+
+class BaseReducer:
     _source = sys.stdin
-    _buffer = ""
+    _sink = None
+    input_format = 'text'
+    grouped = False
+    filters = False
+    metrics = None
 
     @property
-    def source(self) -> TextIO:
+    def source(self):
         return self._source
 
     @source.setter
-    def source(self, source: TextIO) -> None:
+    def source(self, source):
         self._source = source
 
-    def read(self) -> None:
-        for line in self.source:
-            line = line.strip()
+    @property
+    def sink(self):
+        if self._sink is None:
+            self._sink = Sink()
+        return self._sink
 
-            self.reduce(line)
+    @sink.setter
+    def sink(self, sink):
+        self._sink = sink
+
+    def emit(self, record):
+        self.sink.write_record(record, self.format_record)
+
+    def run(self):
+        with self.sink.buffered():
+            self.read()
+            for result in self.finish():
+                self.emit(result)
+
+    def finish(self):
+        return iter(())
 
-    def run(self) -> None:
-        self.read()
 
-        if self._buffer != "":
-            print(self._buffer)
+class Reducer(BaseReducer):
+
+    def read(self):
+        for line in self.source:
+            line = line.strip()
+            self.reduce(line)
 
-    @abstractmethod
-    def reduce(self, data: str) -> None:
-        ...
+    def reduce(self, line):
+        for result in self.reduce_record(self.parse_line(line)):
+            self.emit(result)
 
 
-class QuantityReducer(Reducer):
-    def parse_line(self, line: str) -> MoveUserDiffMaxMapped:
-        data = line.split("\t")
+class SorterReducer(Reducer):
+    grouped = True
 
+    def parse_line(self, line):
+        data = line.split('\t')
         if len(data) != 4:
-            raise LineFormatError("Line should have 4 fields", line)
-        
+            raise LineFormatError('Line should have 4 fields', line)
+        if not all(map(lambda x: x.isdigit(), data)):
+            raise LineFormatError('Line should have only digits', line)
         moves, user_id, diff_ts, max_moves = data
-        
-        if not moves.isdigit():
-            raise LineFormatError("Moves should be an integer", line)
+        return UserMinMaxMoveMapped(user_id=int(user_id), diff_ts=int(diff_ts), max_moves=int(max_moves), moves=int(moves))
 
-        if not user_id.isdigit():
-            raise LineFormatError("User id should be an integer", line)
-        
-        if not diff_ts.isdigit():
-            raise LineFormatError("Timestamp should be an integer", line)
-        
-        if not max_moves.isdigit():
-            raise LineFormatError("Moves should be an integer", line)
+    def reduce_record(self, user):
+        yield user
 
-        return MoveUserDiffMaxMapped(
-            moves=int(moves),
-            user_id=user_id,
-            diff_ts=int(diff_ts),
-            max_moves=int(max_moves),
-        )
+    def format_record(self, record):
+        return f'{record.user_id}\t{record.diff_ts}\t{record.max_moves}\t{record.moves}'
 
-    def reduce(self, line: str) -> None:
-        user = self.parse_line(line)
-        out_ts : str = str(user.diff_ts).zfill(10)
-        print(f"{user.user_id}\t{out_ts}\t{user.max_moves}\t{user.moves}")
 
+class UserMinMaxMoveMapped:
+    __slots__ = ('user_id', 'diff_ts', 'max_moves', 'moves')
+    TAG = 4
 
-def main():
-    reducer = QuantityReducer()
-    reducer.run()
+    def __init__(self, user_id, diff_ts, max_moves, moves):
+        self.user_id = user_id
+        self.diff_ts = diff_ts
+        self.max_moves = max_moves
+        self.moves = moves
 
 
 if __name__ == "__main__":
-    main()
+    SorterReducer().run()
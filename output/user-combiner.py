@@ -0,0 +1,245 @@
+#!/usr/bin/python3
+# Generated from src/ by `./main.py build`, do not edit.
+import sys
+from contextlib import contextmanager
+
+
+class BaseReducer:
+    _source = sys.stdin
+    _sink = None
+    input_format = 'text'
+    grouped = False
+    filters = False
+    metrics = None
+
+    @property
+    def source(self):
+        return self._source
+
+    @source.setter
+    def source(self, source):
+        self._source = source
+
+    @property
+    def sink(self):
+        if self._sink is None:
+            self._sink = Sink()
+        return self._sink
+
+    @sink.setter
+    def sink(self, sink):
+        self._sink = sink
+
+    def emit(self, record):
+        self.sink.write_record(record, self.format_record)
+
+    def run(self):
+        with self.sink.buffered():
+            self.read()
+            for result in self.finish():
+                self.emit(result)
+
+    def finish(self):
+        return iter(())
+
+
+class Reducer(BaseReducer):
+
+    def read(self):
+        for line in self.source:
+            line = line.strip()
+            self.reduce(line)
+
+    def reduce(self, line):
+        for result in self.reduce_record(self.parse_line(line)):
+            self.emit(result)
+
+
+SORT_MEMORY = 256 * 1024 * 1024
+
+
+class UserReducer(Reducer):
+    grouped = True
+    unsorted = False
+    aggregator = None
+    current_user = None
+    current_min_timestamp = 0
+    current_max_timestamp = 0
+    current_count = 0
+
+    def __init__(self, *, unsorted=False, memory=SORT_MEMORY, folder=None):
+        self.unsorted = unsorted
+
+    @property
+    def result(self):
+        user_id = self.current_user
+        if user_id is None:
+            raise DataError('No user is being reduced', type(self).__name__)
+        return UserMinMaxMove(user_id=user_id, min_ts=self.current_min_timestamp, max_ts=self.current_max_timestamp, moves=self.current_count)
+
+    def parse_line(self, line):
+        data = line.split('\t')
+        if len(data) != 3:
+            raise LineFormatError('Line should be length of 3 separated by tabs', line)
+        user_id, ts, count = data
+        ts_info = ts.split('#')
+        if len(ts_info) > 2:
+            raise LineFormatError("Timestamp should be separated by '#'", line)
+        if not all(map(lambda x: x.isdigit(), [user_id, count, *ts_info])):
+            raise LineFormatError('Line should be all integers', line)
+        if len(ts_info) == 2:
+            return UserMinMaxMove(user_id=int(user_id), min_ts=int(ts_info[0]), max_ts=int(ts_info[1]), moves=int(count))
+        return UserMoveMapped(user_id=int(user_id), timestamp=int(ts), count=int(count))
+
+    def set_min_max_ts(self, ts):
+        if ts <= self.current_min_timestamp:
+            self.current_min_timestamp = ts
+        if ts >= self.current_max_timestamp:
+            self.current_max_timestamp = ts
+
+    def reduce_record(self, data):
+        if isinstance(data, UserMinMaxMove):
+            min_ts, max_ts, count = (data.min_ts, data.max_ts, data.moves)
+        else:
+            min_ts, max_ts, count = (data.timestamp, data.timestamp, data.count)
+        if data.user_id == self.current_user:
+            self.current_count += count
+            self.set_min_max_ts(min_ts)
+            self.set_min_max_ts(max_ts)
+            return
+        if self.current_user is not None:
+            yield self.result
+        self.current_count = count
+        self.current_user = data.user_id
+        self.current_min_timestamp = min_ts
+        self.current_max_timestamp = max_ts
+
+    def finish(self):
+        if self.current_user is not None:
+            yield self.result
+            self.current_user = None
+
+    def format_record(self, record):
+        return '%s\t%s#%s\t%s' % (record.user_id, record.min_ts, record.max_ts, record.moves)
+
+
+class UserCombiner(UserReducer):
+    grouped = False
+    max_entries = 100000
+
+    def __init__(self, max_entries=None):
+        super().__init__()
+        if max_entries is not None:
+            self.max_entries = max_entries
+        self.table = {}
+
+    def reduce_record(self, data):
+        if isinstance(data, UserMinMaxMove):
+            min_ts, max_ts, count = (data.min_ts, data.max_ts, data.moves)
+        else:
+            min_ts, max_ts, count = (data.timestamp, data.timestamp, data.count)
+        entry = self.table.get(data.user_id)
+        if entry is None:
+            if len(self.table) >= self.max_entries:
+                yield from self.flush()
+            self.table[data.user_id] = [min_ts, max_ts, count]
+            return
+        if min_ts < entry[0]:
+            entry[0] = min_ts
+        if max_ts > entry[1]:
+            entry[1] = max_ts
+        entry[2] += count
+
+    def flush(self):
+        table, self.table = (self.table, {})
+        for user_id in sorted(table):
+            min_ts, max_ts, count = table[user_id]
+            yield UserMinMaxMove(user_id=user_id, min_ts=min_ts, max_ts=max_ts, moves=count)
+
+    def finish(self):
+        yield from self.flush()
+
+
+class DataError(Exception):
+
+    def __init__(self, message, data):
+        self.data = data
+        super().__init__(message)
+
+    def __reduce__(self):
+        return (type(self), (str(self), self.data))
+
+
+class LineFormatError(DataError):
+
+    def __init__(self, message, data):
+        super().__init__(message, data)
+
+
+class Sink:
+    buffer_size = 8192
+    binary = False
+
+    def __init__(self, stream=None, *, buffer_size=None):
+        self._stream = stream
+        self._lines = []
+        self._buffering = False
+        if buffer_size is not None:
+            self.buffer_size = buffer_size
+
+    @property
+    def stream(self):
+        return self._stream if self._stream is not None else sys.stdout
+
+    def write(self, line):
+        lines = self._lines
+        lines.append(line)
+        if not self._buffering or len(lines) >= self.buffer_size:
+            self.flush()
+
+    def write_record(self, record, format):
+        self.write(format(record))
+
+    def flush(self):
+        if not self._lines:
+            return
+        self.stream.write('\n'.join(self._lines) + '\n')
+        self._lines = []
+
+    def sync(self):
+        self.stream.flush()
+
+    @contextmanager
+    def buffered(self):
+        previous, self._buffering = (self._buffering, True)
+        try:
+            yield self
+        finally:
+            self._buffering = previous
+            self.flush()
+            self.sync()
+
+
+class UserMoveMapped:
+    __slots__ = ('user_id', 'timestamp', 'count')
+    TAG = 2
+
+    def __init__(self, user_id, timestamp, count):
+        self.user_id = user_id
+        self.timestamp = timestamp
+        self.count = count
+
+
+class UserMinMaxMove:
+    __slots__ = ('user_id', 'min_ts', 'max_ts', 'moves')
+    TAG = 3
+
+    def __init__(self, user_id, min_ts, max_ts, moves):
+        self.user_id = user_id
+        self.min_ts = min_ts
+        self.max_ts = max_ts
+        self.moves = moves
+
+
+if __name__ == "__main__":
+    UserCombiner().run()
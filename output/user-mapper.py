@@ -1,143 +1,267 @@
 #!/usr/bin/python3
+# Generated from src/ by `./main.py build`, do not edit.
 import sys
-from abc import ABC, abstractmethod
-from typing import List, Union, TextIO
-from datetime import datetime
-from dataclasses import dataclass
-
-
-@dataclass
-class UserMove:
-    """
-    Data class for a user move in r/place canvas
-    """
-
-    timestamp: int
-    user_id: str
-    x: int
-    y: int
-    color: int
-    is_mod: bool
+from contextlib import contextmanager
 
 
 class DataError(Exception):
-    """Raises when there was an error trying to process data"""
 
-    def __init__(self, message: str, data: str):
+    def __init__(self, message, data):
         self.data = data
         super().__init__(message)
 
+    def __reduce__(self):
+        return (type(self), (str(self), self.data))
+
 
 class TimestampParseError(DataError):
-    """Raises when there was an error trying to parse a timestamp"""
 
-    def __init__(self, message: str, data: str):
+    def __init__(self, message, data):
         super().__init__(message, data)
 
 
 class LineFormatError(DataError):
-    """Raises when there was an error trying to parse a line"""
 
-    def __init__(self, message: str, data: str):
+    def __init__(self, message, data):
         super().__init__(message, data)
 
 
-class Mapper(ABC):
+class Sink:
+    buffer_size = 8192
+    binary = False
+
+    def __init__(self, stream=None, *, buffer_size=None):
+        self._stream = stream
+        self._lines = []
+        self._buffering = False
+        if buffer_size is not None:
+            self.buffer_size = buffer_size
+
+    @property
+    def stream(self):
+        return self._stream if self._stream is not None else sys.stdout
+
+    def write(self, line):
+        lines = self._lines
+        lines.append(line)
+        if not self._buffering or len(lines) >= self.buffer_size:
+            self.flush()
+
+    def write_record(self, record, format):
+        self.write(format(record))
+
+    def flush(self):
+        if not self._lines:
+            return
+        self.stream.write('\n'.join(self._lines) + '\n')
+        self._lines = []
+
+    def sync(self):
+        self.stream.flush()
+
+    @contextmanager
+    def buffered(self):
+        previous, self._buffering = (self._buffering, True)
+        try:
+            yield self
+        finally:
+            self._buffering = previous
+            self.flush()
+            self.sync()
+
+
+MS_PER_DAY = 24 * 60 * 60 * 1000
+
+
+DAY_CACHE_SIZE = 4096
+
+
+_day_offsets = {}
+
+
+def days_from_civil(year, month, day):
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + 12 * (month <= 2) - 3) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def days_in_month(year, month):
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    return 30 + (month + month // 8) % 2 - (month == 2) * (2 - leap)
 
+
+def valid_date(year, month, day):
+    return (1 <= month) & (month <= 12) & (1 <= day) & (day <= days_in_month(year, month))
+
+
+def valid_time(hours, minutes, seconds):
+    return (hours <= 23) & (minutes <= 59) & (seconds <= 59)
+
+
+def day_offset(date):
+    offset = _day_offsets.get(date)
+    if offset is not None:
+        return offset
+    if not (len(date) == 10 and date[4] == date[7] == '-' and (date[:4] + date[5:7] + date[8:]).isdigit()):
+        raise TimestampParseError('Date should be YYYY-MM-DD', date)
+    year, month, day = (int(date[:4]), int(date[5:7]), int(date[8:]))
+    if not valid_date(year, month, day):
+        raise TimestampParseError('Date out of range', date)
+    if len(_day_offsets) >= DAY_CACHE_SIZE:
+        _day_offsets.clear()
+    offset = _day_offsets[date] = days_from_civil(year, month, day) * MS_PER_DAY
+    return offset
+
+
+def parse_timestamp(text):
+    if text.endswith(' UTC'):
+        text = text[:-4]
+    clock = text[11:19]
+    if not (len(text) >= 19 and text[10] in ' T' and (clock[2] == clock[5] == ':') and (clock[:2] + clock[3:5] + clock[6:]).isdigit()):
+        raise TimestampParseError('Timestamp should be YYYY-MM-DD HH:MM:SS', text)
+    hours, minutes, seconds = (int(clock[:2]), int(clock[3:5]), int(clock[6:]))
+    if not valid_time(hours, minutes, seconds):
+        raise TimestampParseError('Time out of range', text)
+    milliseconds = 0
+    if len(text) > 19:
+        fraction = text[20:]
+        if text[19] != '.' or not fraction.isdigit():
+            raise TimestampParseError('Fraction of second should be .fff', text)
+        milliseconds = int(fraction[:3].ljust(3, '0'))
+    return day_offset(text[:10]) + hours * 3600000 + minutes * 60000 + seconds * 1000 + milliseconds
+
+
+class Mapper:
     _source = sys.stdin
+    _sink = None
+    input_format = 'text'
+    metrics = None
 
     @property
-    def source(self) -> TextIO:
+    def source(self):
         return self._source
 
     @source.setter
-    def source(self, source: TextIO) -> None:
+    def source(self, source):
         self._source = source
 
-    def read(self) -> None:
+    @property
+    def sink(self):
+        if self._sink is None:
+            self._sink = Sink()
+        return self._sink
+
+    @sink.setter
+    def sink(self, sink):
+        self._sink = sink
+
+    def emit(self, record):
+        self.sink.write_record(record, self.format_record)
+
+    def lines(self):
         for line in self.source:
             line = line.strip()
             if not line:
                 return
-            self.map(line)
-
-    def run(self) -> None:
-        self.read()
-
-    @abstractmethod
-    def map(self, line: str) -> None:
-        ...
+            yield line
 
+    def read(self):
+        for line in self.lines():
+            self.map(line)
 
-def str2timestamp(date: str, *, format: List[str]) -> int:
-    """
-    Converts a datetime string to a timestamp.
-    Must to be a datetime string in the format specified in the format argument. (or list of it)
-    """
-    result: Union[int, None] = None
-    for f in format:
-        try:
-            result = int(datetime.strptime(date, f).timestamp())
-        except ValueError:
-            pass
-
-    if result is None:
-        raise ValueError(f"Could not convert {date} to timestamp")
+    def run(self):
+        with self.sink.buffered():
+            self.read()
 
-    return result
+    def map(self, line):
+        record = self.parse_line(line)
+        if record is None:
+            return
+        for result in self.map_record(record):
+            self.emit(result)
 
 
 class UserMapper(Mapper):
-    in_sep: str = ","
-    out_sep: str = "\t"
-    first_time: str = "2022-04-01 12:44:10.315"
-    DATETIME_FORMAT_STRING: List[str] = ["%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S"]
-
-    def __init__(self):
-        # set the first timestamp from the string as seconds
-        self.first_ts = str2timestamp(
-            self.first_time, format=self.DATETIME_FORMAT_STRING
-        )
-        # now to miliseconds
-        self.first_ts *= 1000
-
-    def parse_line(self, line: str) -> Union[UserMove, None]:
+    in_sep = ','
+    out_sep = '\t'
+    ts_sep = '#'
+    first_time = '2022-04-01 12:44:10.315'
+    first_ts = parse_timestamp(first_time)
+    fast_parse = True
+    columns = None
+
+    def parse_line(self, line):
         data = line.split(self.in_sep)
         if not len(data) == 6:
-            raise LineFormatError("Line should have 6 fields", line)
-
-        if all(not x.isdigit() for x in data):
+            raise LineFormatError('Line should have 6 fields', line)
+        if all((not x.isdigit() for x in data)):
             return None
+        if not all((x.isdigit() for x in data)):
+            raise LineFormatError('All fields should be all integers or all strings', line)
+        return UserMove(timestamp=int(data[0]) + self.first_ts, user_id=int(data[1]), x=int(data[2]), y=int(data[3]), color=int(data[4]), is_mod=bool(int(data[5])))
+
+    def parse_moves(self, lines):
+        sep = self.in_sep
+        first_ts = self.first_ts
+        for line in lines:
+            fields = line.split(sep)
+            if len(fields) == 6 and all(fields) and line.replace(sep, '').isdigit():
+                try:
+                    if not int(fields[5]):
+                        yield (int(fields[1]), int(fields[0]) + first_ts)
+                    continue
+                except ValueError:
+                    pass
+            move = self.parse_line(line)
+            if move is not None and (not move.is_mod):
+                yield (move.user_id, move.timestamp)
+
+    def moves(self):
+        return self.parse_moves(self.lines())
+
+    def read(self):
+        write = self.sink.write
+        for user_id, timestamp in self.moves():
+            write(f'{user_id}\t{timestamp}\t1')
+
+    def map(self, line):
+        for user_id, timestamp in self.parse_moves((line,)):
+            self.sink.write(f'{user_id}\t{timestamp}\t1')
+
+    def map_record(self, move):
+        if move.is_mod:
+            return
+        yield UserMoveMapped(user_id=move.user_id, timestamp=move.timestamp, count=1)
 
-        if not all(x.isdigit() for x in data):
-            raise LineFormatError(
-                "All fields should be all integers or all strings", line
-            )
+    def format_record(self, record):
+        return f'{record.user_id}\t{record.timestamp}\t{record.count}'
 
-        return UserMove(
-            timestamp=int(data[0]) + self.first_ts,
-            user_id=data[1],
-            x=int(data[2]),
-            y=int(data[3]),
-            color=int(data[4]),
-            is_mod=bool(int(data[5])),
-        )
 
-    def map(self, line: str) -> None:
-        move = self.parse_line(line)
+class UserMove:
+    __slots__ = ('timestamp', 'user_id', 'x', 'y', 'color', 'is_mod')
+    TAG = 1
+
+    def __init__(self, timestamp, user_id, x, y, color, is_mod):
+        self.timestamp = timestamp
+        self.user_id = user_id
+        self.x = x
+        self.y = y
+        self.color = color
+        self.is_mod = is_mod
 
-        if not move or move.is_mod:
-            return
-        
-        # formatting to 10 characters for timestamp
-        out_ts : str = str(move.timestamp).zfill(10)
-        print(f"{move.user_id}\t{out_ts}\t1")
 
+class UserMoveMapped:
+    __slots__ = ('user_id', 'timestamp', 'count')
+    TAG = 2
 
-def main():
-    mapper = UserMapper()
-    mapper.run()
+    def __init__(self, user_id, timestamp, count):
+        self.user_id = user_id
+        self.timestamp = timestamp
+        self.count = count
 
 
 if __name__ == "__main__":
-    main()
+    UserMapper().run()
@@ -1,137 +1,208 @@
 #!/usr/bin/python3
+# Generated from src/ by `./main.py build`, do not edit.
 import sys
-from abc import ABC, abstractmethod
-from typing import Union, TextIO
-from dataclasses import dataclass
-
-
-@dataclass
-class UserMoveMapped:
-    """
-    Data class when UserMove was processed by the mapper
-    """
-
-    user_id: str
-    timestamp: int
-    count: int
+from contextlib import contextmanager
 
 
 class DataError(Exception):
-    """Raises when there was an error trying to process data"""
 
-    def __init__(self, message: str, data: str):
+    def __init__(self, message, data):
         self.data = data
         super().__init__(message)
 
+    def __reduce__(self):
+        return (type(self), (str(self), self.data))
+
 
-class TimestampParseError(DataError):
-    """Raises when there was an error trying to parse a timestamp"""
+class LineFormatError(DataError):
 
-    def __init__(self, message: str, data: str):
+    def __init__(self, message, data):
         super().__init__(message, data)
 
 
-class LineFormatError(DataError):
-    """Raises when there was an error trying to parse a line"""
+class Sink:
+    buffer_size = 8192
+    binary = False
 
-    def __init__(self, message: str, data: str):
-        super().__init__(message, data)
+    def __init__(self, stream=None, *, buffer_size=None):
+        self._stream = stream
+        self._lines = []
+        self._buffering = False
+        if buffer_size is not None:
+            self.buffer_size = buffer_size
+
+    @property
+    def stream(self):
+        return self._stream if self._stream is not None else sys.stdout
 
+    def write(self, line):
+        lines = self._lines
+        lines.append(line)
+        if not self._buffering or len(lines) >= self.buffer_size:
+            self.flush()
 
-class Reducer(ABC):
+    def write_record(self, record, format):
+        self.write(format(record))
 
+    def flush(self):
+        if not self._lines:
+            return
+        self.stream.write('\n'.join(self._lines) + '\n')
+        self._lines = []
+
+    def sync(self):
+        self.stream.flush()
+
+    @contextmanager
+    def buffered(self):
+        previous, self._buffering = (self._buffering, True)
+        try:
+            yield self
+        finally:
+            self._buffering = previous
+            self.flush()
+            self.sync()
+
+
+SORT_MEMORY = 256 * 1024 * 1024
+
+
+class BaseReducer:
     _source = sys.stdin
-    _buffer = ""
+    _sink = None
+    input_format = 'text'
+    grouped = False
+    filters = False
+    metrics = None
 
     @property
-    def source(self) -> TextIO:
+    def source(self):
         return self._source
 
     @source.setter
-    def source(self, source: TextIO) -> None:
+    def source(self, source):
         self._source = source
 
-    def read(self) -> None:
-        for line in self.source:
-            line = line.strip()
-
-            self.reduce(line)
+    @property
+    def sink(self):
+        if self._sink is None:
+            self._sink = Sink()
+        return self._sink
 
-    def run(self) -> None:
-        self.read()
+    @sink.setter
+    def sink(self, sink):
+        self._sink = sink
 
-        if self._buffer != "":
-            print(self._buffer)
+    def emit(self, record):
+        self.sink.write_record(record, self.format_record)
 
-    @abstractmethod
-    def reduce(self, data: str) -> None:
-        ...
+    def run(self):
+        with self.sink.buffered():
+            self.read()
+            for result in self.finish():
+                self.emit(result)
 
+    def finish(self):
+        return iter(())
 
-class UserReducer(Reducer):
 
-    current_user: Union[str, None] = None
-    current_min_timestamp: int = 0
-    current_max_timestamp: int = 0
-    current_count: int = 0
+class Reducer(BaseReducer):
 
-    @property
-    def current_timestamp(self) -> str:
-        # formatting to 10 characters for timestamp
-        out_min_ts : str = str(self.current_min_timestamp).zfill(10)
-        out_max_ts : str = str(self.current_max_timestamp).zfill(10)
-        return f"{out_min_ts}#{out_max_ts}"
-
-    @property
-    def result(self) -> str:
-        return "%s\t%s\t%s" % (
-            self.current_user,
-            self.current_timestamp,
-            self.current_count,
-        )
+    def read(self):
+        for line in self.source:
+            line = line.strip()
+            self.reduce(line)
 
-    def parse_line(self, line: str) -> UserMoveMapped:
-        data = line.split("\t")
+    def reduce(self, line):
+        for result in self.reduce_record(self.parse_line(line)):
+            self.emit(result)
 
-        if len(data) != 3:
-            raise LineFormatError("Line should be length of 3 separated by tabs", line)
 
-        if not all(map(lambda x: x.isdigit(), data)):
-            raise LineFormatError("Line should be all integers", line)
+class UserReducer(Reducer):
+    grouped = True
+    unsorted = False
+    aggregator = None
+    current_user = None
+    current_min_timestamp = 0
+    current_max_timestamp = 0
+    current_count = 0
 
-        return UserMoveMapped(
-            user_id=data[0], timestamp=int(data[1]), count=int(data[2])
-        )
+    def __init__(self, *, unsorted=False, memory=SORT_MEMORY, folder=None):
+        self.unsorted = unsorted
 
-    def set_min_max_ts(self, ts: int) -> None:
+    @property
+    def result(self):
+        user_id = self.current_user
+        if user_id is None:
+            raise DataError('No user is being reduced', type(self).__name__)
+        return UserMinMaxMove(user_id=user_id, min_ts=self.current_min_timestamp, max_ts=self.current_max_timestamp, moves=self.current_count)
+
+    def parse_line(self, line):
+        data = line.split('\t')
+        if len(data) != 3:
+            raise LineFormatError('Line should be length of 3 separated by tabs', line)
+        user_id, ts, count = data
+        ts_info = ts.split('#')
+        if len(ts_info) > 2:
+            raise LineFormatError("Timestamp should be separated by '#'", line)
+        if not all(map(lambda x: x.isdigit(), [user_id, count, *ts_info])):
+            raise LineFormatError('Line should be all integers', line)
+        if len(ts_info) == 2:
+            return UserMinMaxMove(user_id=int(user_id), min_ts=int(ts_info[0]), max_ts=int(ts_info[1]), moves=int(count))
+        return UserMoveMapped(user_id=int(user_id), timestamp=int(ts), count=int(count))
+
+    def set_min_max_ts(self, ts):
         if ts <= self.current_min_timestamp:
             self.current_min_timestamp = ts
         if ts >= self.current_max_timestamp:
             self.current_max_timestamp = ts
 
-    def reduce(self, line: str) -> None:
-        data = self.parse_line(line)
-
-        if data.user_id == self.current_user:
-            self.current_count += data.count
-            self.set_min_max_ts(data.timestamp)
+    def reduce_record(self, data):
+        if isinstance(data, UserMinMaxMove):
+            min_ts, max_ts, count = (data.min_ts, data.max_ts, data.moves)
         else:
-            if self.current_user is not None:
-                print(self.result)
-                self._buffer = ""
-                self.current_user = None
+            min_ts, max_ts, count = (data.timestamp, data.timestamp, data.count)
+        if data.user_id == self.current_user:
+            self.current_count += count
+            self.set_min_max_ts(min_ts)
+            self.set_min_max_ts(max_ts)
+            return
+        if self.current_user is not None:
+            yield self.result
+        self.current_count = count
+        self.current_user = data.user_id
+        self.current_min_timestamp = min_ts
+        self.current_max_timestamp = max_ts
+
+    def finish(self):
+        if self.current_user is not None:
+            yield self.result
+            self.current_user = None
+
+    def format_record(self, record):
+        return '%s\t%s#%s\t%s' % (record.user_id, record.min_ts, record.max_ts, record.moves)
+
+
+class UserMoveMapped:
+    __slots__ = ('user_id', 'timestamp', 'count')
+    TAG = 2
+
+    def __init__(self, user_id, timestamp, count):
+        self.user_id = user_id
+        self.timestamp = timestamp
+        self.count = count
 
-            self.current_count = data.count
-            self.current_user = data.user_id
-            self.current_min_timestamp = data.timestamp
-            self.current_max_timestamp = data.timestamp
-            self._buffer = self.result
 
+class UserMinMaxMove:
+    __slots__ = ('user_id', 'min_ts', 'max_ts', 'moves')
+    TAG = 3
 
-def main():
-    reducer = UserReducer()
-    reducer.run()
+    def __init__(self, user_id, min_ts, max_ts, moves):
+        self.user_id = user_id
+        self.min_ts = min_ts
+        self.max_ts = max_ts
+        self.moves = moves
 
 
 if __name__ == "__main__":
-    main()
+    UserReducer().run()
@@ -0,0 +1,15 @@
+from importlib import import_module
+from typing import Any
+
+# combiners are imported on first use, so a stage only loads its own module
+MODULES = {
+    "UserCombiner": ".user",
+}
+
+__all__ = list(MODULES)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(MODULES[name], __name__), name)
@@ -0,0 +1,59 @@
+from typing import Dict, Iterator, List, Union
+
+from src.reducers.user import UserReducer
+from src.schemas.data import UserMinMaxMove, UserMoveMapped
+
+
+class UserCombiner(UserReducer):
+    """
+    Map side reducer for the user flow.
+
+    Keeps a bounded table of user_id -> [min_ts, max_ts, count] and emits it as
+    `user_id\\tmin#max\\tcount` lines (the same format UserReducer writes and reads)
+    whenever the table is full or the input ends, so the input does not need to be sorted.
+    The table is a dict, so its memory follows `max_entries` whatever the user ids.
+    """
+
+    grouped: bool = False
+
+    max_entries: int = 100_000
+
+    def __init__(self, max_entries: Union[int, None] = None):
+        super().__init__()
+        if max_entries is not None:
+            self.max_entries = max_entries
+        self.table: Dict[int, List[int]] = {}
+
+    def reduce_record(
+        self, data: Union[UserMoveMapped, UserMinMaxMove]
+    ) -> Iterator[UserMinMaxMove]:
+        if isinstance(data, UserMinMaxMove):
+            min_ts, max_ts, count = data.min_ts, data.max_ts, data.moves
+        else:
+            min_ts, max_ts, count = data.timestamp, data.timestamp, data.count
+
+        entry = self.table.get(data.user_id)
+
+        if entry is None:
+            if len(self.table) >= self.max_entries:
+                yield from self.flush()
+            self.table[data.user_id] = [min_ts, max_ts, count]
+            return
+
+        if min_ts < entry[0]:
+            entry[0] = min_ts
+        if max_ts > entry[1]:
+            entry[1] = max_ts
+        entry[2] += count
+
+    def flush(self) -> Iterator[UserMinMaxMove]:
+        table, self.table = self.table, {}
+
+        for user_id in sorted(table):
+            min_ts, max_ts, count = table[user_id]
+            yield UserMinMaxMove(
+                user_id=user_id, min_ts=min_ts, max_ts=max_ts, moves=count
+            )
+
+    def finish(self) -> Iterator[UserMinMaxMove]:
+        yield from self.flush()
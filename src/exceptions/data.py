@@ -5,6 +5,10 @@ class DataError(Exception):
         self.data = data
         super().__init__(message)
 
+    def __reduce__(self) -> tuple:
+        # both arguments, so the error of a --local worker can be rebuilt in the parent
+        return type(self), (str(self), self.data)
+
 
 class TimestampParseError(DataError):
     """Raises when there was an error trying to parse a timestamp"""
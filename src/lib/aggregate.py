@@ -0,0 +1,271 @@
+import os
+import tempfile
+from array import array
+from collections import OrderedDict
+from contextlib import ExitStack
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from src.exceptions.data import DataError
+from src.lib.binary import BinaryFileSink, BinarySink, read_file
+from src.schemas.data import UserMinMaxMove
+
+if TYPE_CHECKING:
+    import numpy as np
+
+INT64_MAX: int = 2**63 - 1
+INT64_MIN: int = -(2**63)
+
+# partition files of a SpillingUserAggregator open at once, the others are closed
+# and appended to when they get records again
+OPEN_PARTITIONS: int = 64
+
+
+class UserAggregateTable:
+    """
+    min_ts, max_ts and count per user, in three int64 arrays indexed by user_id.
+
+    User ids in the simplified dataset are dense integers starting at 0, so this takes
+    24 bytes per user instead of a dict entry plus a record. Arrays grow on demand. The
+    ids touched since the last `clear` are tracked, so iterating and clearing only cost
+    as much as the users seen. NumPy is only needed by the bulk methods.
+    """
+
+    def __init__(self, size: int = 0, *, max_size: Optional[int] = None):
+        self.max_size = max_size
+        self.min_ts = array("q", [INT64_MAX]) * size
+        self.max_ts = array("q", [INT64_MIN]) * size
+        self.count = array("q", [0]) * size
+        self.touched = array("q")
+
+    def __len__(self) -> int:
+        return len(self.touched)
+
+    @property
+    def size(self) -> int:
+        return len(self.count)
+
+    @property
+    def nbytes(self) -> int:
+        return self.size * 3 * self.count.itemsize
+
+    def grow(self, size: int) -> None:
+        if size <= self.size:
+            return
+        target = max(size, 2 * self.size)
+        if self.max_size is not None:
+            target = max(size, min(target, self.max_size))
+        extra = target - self.size
+        self.min_ts.extend(array("q", [INT64_MAX]) * extra)
+        self.max_ts.extend(array("q", [INT64_MIN]) * extra)
+        self.count.extend(array("q", [0]) * extra)
+
+    def add(self, user_id: int, min_ts: int, max_ts: int, count: int = 1) -> None:
+        if user_id >= len(self.count):
+            self.grow(user_id + 1)
+
+        if not self.count[user_id]:
+            self.touched.append(user_id)
+        self.count[user_id] += count
+
+        if min_ts < self.min_ts[user_id]:
+            self.min_ts[user_id] = min_ts
+        if max_ts > self.max_ts[user_id]:
+            self.max_ts[user_id] = max_ts
+
+    def get(self, user_id: int) -> Tuple[int, int, int]:
+        """
+        (min_ts, max_ts, count) of a user, count is 0 for users never added
+        """
+        if user_id >= self.size or not self.count[user_id]:
+            return INT64_MAX, INT64_MIN, 0
+        return self.min_ts[user_id], self.max_ts[user_id], self.count[user_id]
+
+    def user_ids(self) -> List[int]:
+        """
+        The users in the table, in user_id order
+        """
+        return sorted(self.touched)
+
+    def items(self) -> Iterator[Tuple[int, int, int, int]]:
+        """
+        Yields (user_id, min_ts, max_ts, count) in user_id order
+        """
+        min_ts, max_ts, count = self.min_ts, self.max_ts, self.count
+        for user_id in self.user_ids():
+            yield user_id, min_ts[user_id], max_ts[user_id], count[user_id]
+
+    def clear(self) -> None:
+        """
+        Resets the users touched so far, keeping the arrays allocated
+        """
+        for user_id in self.touched:
+            self.min_ts[user_id] = INT64_MAX
+            self.max_ts[user_id] = INT64_MIN
+            self.count[user_id] = 0
+        self.touched = array("q")
+
+    def arrays(self) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """
+        Zero copy NumPy views of (min_ts, max_ts, count).
+
+        The table cannot grow while a view is alive, drop them before adding users.
+        """
+        import numpy as np
+
+        return (
+            np.frombuffer(self.min_ts, dtype=np.int64),
+            np.frombuffer(self.max_ts, dtype=np.int64),
+            np.frombuffer(self.count, dtype=np.int64),
+        )
+
+    def update_many(
+        self,
+        user_id: "np.ndarray",
+        min_ts: "np.ndarray",
+        max_ts: "np.ndarray",
+        count: "np.ndarray",
+    ) -> None:
+        """
+        Vectorized `add` of many (possibly repeated) users at once
+        """
+        import numpy as np
+
+        if not len(user_id):
+            return
+
+        self.grow(int(user_id.max()) + 1)
+
+        table_min, table_max, table_count = self.arrays()
+        new = np.unique(user_id)
+        new = new[table_count[new] == 0]
+
+        np.minimum.at(table_min, user_id, min_ts)
+        np.maximum.at(table_max, user_id, max_ts)
+        np.add.at(table_count, user_id, count)
+        del table_min, table_max, table_count
+
+        self.touched.frombytes(new.astype(np.int64).tobytes())
+
+
+class SpillingUserAggregator:
+    """
+    Hash aggregation per user over unsorted input, with a memory limit.
+
+    Users are aggregated in a UserAggregateTable until it would need more than `memory`
+    bytes. Then the table and every following record are spilled to binary files
+    partitioned by user_id range. Each range fits in `memory`, so at the end the
+    partitions are aggregated one at a time, in user_id order.
+
+    When every user_id is `residue` modulo `stride` (a partition of the local mode),
+    users are stored at user_id // stride, so the table only spends memory on them.
+    """
+
+    def __init__(
+        self,
+        *,
+        memory: int,
+        folder: Optional[str] = None,
+        stride: int = 1,
+        residue: int = 0,
+    ):
+        self.memory = memory
+        self.folder = folder
+        self.stride = stride
+        self.residue = residue
+        # users per table (and per partition once spilled)
+        self.width = max(1, memory // 24)
+        self.table: Optional[UserAggregateTable] = UserAggregateTable(
+            max_size=self.width
+        )
+        self.tmp: Optional[tempfile.TemporaryDirectory] = None
+        # index -> path of every partition, and the open ones, least recently used first
+        self.partitions: Dict[int, str] = {}
+        self.open: "OrderedDict[int, Tuple[BinarySink, ExitStack]]" = OrderedDict()
+
+    @property
+    def spilled(self) -> bool:
+        return self.table is None
+
+    def add(self, user_id: int, min_ts: int, max_ts: int, count: int = 1) -> None:
+        slot, residue = divmod(user_id, self.stride)
+        if residue != self.residue:
+            raise DataError(
+                f"User id should be {self.residue} modulo {self.stride}", str(user_id)
+            )
+        self.add_slot(slot, min_ts, max_ts, count)
+
+    def add_slot(self, slot: int, min_ts: int, max_ts: int, count: int) -> None:
+        table = self.table
+        if table is not None:
+            if slot < self.width:
+                table.add(slot, min_ts, max_ts, count)
+                return
+            self.spill()
+
+        self.partition(slot // self.width).write_values(
+            UserMinMaxMove, (slot, min_ts, max_ts, count)
+        )
+
+    def partition(self, index: int) -> BinarySink:
+        opened = self.open.get(index)
+        if opened is not None:
+            self.open.move_to_end(index)
+            return opened[0]
+
+        if len(self.open) >= OPEN_PARTITIONS:
+            _, (_, stack) = self.open.popitem(last=False)
+            stack.close()
+
+        path = self.partitions.get(index)
+        if path is None:
+            assert self.tmp is not None
+            path = self.partitions[index] = os.path.join(
+                self.tmp.name, f"users-{index}.bin"
+            )
+        sink = BinaryFileSink(path, append=True)
+        stack = ExitStack()
+        stack.callback(sink.close)
+        stack.enter_context(sink.buffered())
+        self.open[index] = sink, stack
+        return sink
+
+    def spill(self) -> None:
+        table, self.table = self.table, None
+        self.tmp = tempfile.TemporaryDirectory(prefix="users-", dir=self.folder)
+
+        assert table is not None
+        for slot, min_ts, max_ts, count in table.items():
+            self.add_slot(slot, min_ts, max_ts, count)
+
+    def items(self, ordered: bool = True) -> Iterator[Tuple[int, int, int, int]]:
+        """
+        Yields (user_id, min_ts, max_ts, count), in user_id order unless not `ordered`
+        (only honoured while nothing was spilled)
+        """
+        stride, residue = self.stride, self.residue
+        if self.table is not None:
+            table = self.table
+            slots = table.user_ids() if ordered else table.touched
+            for slot in slots:
+                yield (slot * stride + residue, *table.get(slot))
+            return
+
+        while self.open:
+            _, (_, stack) = self.open.popitem()
+            stack.close()
+
+        for index in sorted(self.partitions):
+            offset = index * self.width
+            table = UserAggregateTable()
+            for record in read_file(self.partitions[index]):
+                table.add(
+                    record.user_id - offset,  # type: ignore[attr-defined]
+                    record.min_ts,  # type: ignore[attr-defined]
+                    record.max_ts,  # type: ignore[attr-defined]
+                    record.moves,  # type: ignore[attr-defined]
+                )
+            for slot, min_ts, max_ts, count in table.items():
+                yield (slot + offset) * stride + residue, min_ts, max_ts, count
+
+        assert self.tmp is not None
+        self.tmp.cleanup()
@@ -0,0 +1,224 @@
+import os
+import sys
+import struct
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Tuple, Type, Union
+
+from src.exceptions.data import DataError
+from src.lib.output import Sink
+from src.schemas.data import (
+    ModerationRect,
+    Placement,
+    Record,
+    UserCooldown,
+    UserFeatures,
+    UserMinMaxMove,
+    UserMinMaxMoveMapped,
+    UserMove,
+    UserMoveMapped,
+)
+
+MAGIC: bytes = b"MDPB"
+
+# magic and tag of the records that follow
+HEADER = struct.Struct("<4sB")
+
+SCHEMAS: Dict[int, Type[Record]] = {
+    schema.TAG: schema
+    for schema in (
+        UserMove,
+        UserMoveMapped,
+        UserMinMaxMove,
+        UserMinMaxMoveMapped,
+        ModerationRect,
+        UserCooldown,
+        Placement,
+        UserFeatures,
+    )
+}
+
+# records read at once from a binary stream
+READ_RECORDS: int = 8192
+
+
+class BinarySink(Sink):
+    """
+    Sink writing records with the fixed width binary framing.
+
+    The stream starts with a header holding the record type, so all the records of a
+    stream must share the same schema. When no stream is given sys.stdout.buffer is used.
+    """
+
+    binary: bool = True
+
+    def __init__(
+        self,
+        stream: Union[BinaryIO, None] = None,
+        *,
+        buffer_size: Union[int, None] = None,
+    ):
+        super().__init__(buffer_size=buffer_size)
+        self._binary_stream = stream
+        self._chunks: List[bytes] = []
+        self.schema: Union[Type[Record], None] = None
+
+    @property
+    def stream(self) -> BinaryIO:  # type: ignore[override]
+        if self._binary_stream is not None:
+            return self._binary_stream
+        return sys.stdout.buffer
+
+    def write(self, line: str) -> None:
+        raise DataError("Binary sinks can only write records", line)
+
+    def write_record(
+        self, record: Record, format: Union[Callable[[Any], str], None] = None
+    ) -> None:
+        self.write_values(type(record), record.values())
+
+    def write_values(self, schema: Type[Record], values: Tuple[int, ...]) -> None:
+        """
+        Writes a record of `schema` from its field values, without building the record
+        """
+        if schema is not self.schema:
+            if self.schema is not None:
+                raise DataError(
+                    "All the records of a binary stream should have the same type",
+                    repr(values),
+                )
+            self.schema = schema
+            self._pack = schema.struct().pack
+            self._chunks.append(HEADER.pack(MAGIC, schema.TAG))
+
+        chunks = self._chunks
+        chunks.append(self._pack(*values))
+        if not self._buffering or len(chunks) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._chunks:
+            return
+        self.stream.write(b"".join(self._chunks))
+        self._chunks = []
+
+
+class BinaryFileSink(BinarySink):
+    """
+    Binary sink writing to a file, the file is truncated when the sink is created
+    unless `append`, then the records go after the ones already in it (which must have
+    the same schema)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        buffer_size: Union[int, None] = None,
+        append: bool = False,
+    ):
+        stream = open(path, "ab" if append else "wb")
+        super().__init__(stream, buffer_size=buffer_size)
+
+        if stream.tell():
+            try:
+                with open(path, "rb") as f:
+                    schema = read_header(f)
+            except DataError:
+                stream.close()
+                raise
+            assert schema is not None
+            self.schema = schema
+            self._pack = schema.struct().pack
+
+    def close(self) -> None:
+        super().close()
+        self.stream.close()
+
+
+def read_header(stream: BinaryIO) -> Union[Type[Record], None]:
+    """
+    Schema of the records of a binary stream, from its header (None when empty)
+    """
+    header = stream.read(HEADER.size)
+    if not header:
+        return None
+
+    if len(header) != HEADER.size:
+        raise DataError("Binary stream is truncated", repr(header))
+
+    magic, tag = HEADER.unpack(header)
+    schema = SCHEMAS.get(tag)
+
+    if magic != MAGIC or schema is None:
+        raise DataError("Stream is not a binary record stream", repr(header))
+
+    return schema
+
+
+def read_records(
+    stream: BinaryIO, *, schema: Union[Type[Record], None] = None, limit: int = -1
+) -> Iterator[Record]:
+    """
+    Reads the records written by a BinarySink, an empty stream has no records.
+
+    With `schema` the header was already read and the stream is anywhere on a record
+    boundary, `limit` then stops after that many bytes.
+    """
+    if schema is None:
+        schema = read_header(stream)
+        if schema is None:
+            return
+
+    size = schema.struct().size
+    pending = b""
+
+    while limit:
+        chunk = stream.read(
+            size * READ_RECORDS if limit < 0 else min(limit, size * READ_RECORDS)
+        )
+        if not chunk:
+            break
+        if limit > 0:
+            limit -= len(chunk)
+
+        chunk = pending + chunk
+        usable = len(chunk) - len(chunk) % size
+        pending = chunk[usable:]
+        yield from schema.unpack_many(chunk[:usable])
+
+    if pending:
+        raise DataError("Binary stream is truncated", repr(pending))
+
+
+def read_file(path: str) -> Iterator[Record]:
+    with open(path, "rb") as f:
+        yield from read_records(f)
+
+
+def split_records(path: str, parts: int) -> List[Tuple[int, int]]:
+    """
+    Splits a binary record file in (at most) `parts` byte ranges of whole records,
+    read with `read_record_range`
+    """
+    with open(path, "rb") as f:
+        schema = read_header(f)
+    if schema is None:
+        return []
+
+    size = schema.struct().size
+    end = os.path.getsize(path)
+    count = (end - HEADER.size) // size
+    bounds = [HEADER.size + count * i // parts * size for i in range(parts)] + [end]
+
+    return [(start, stop) for start, stop in zip(bounds, bounds[1:]) if stop > start]
+
+
+def read_record_range(path: str, start: int, end: int) -> Iterator[Record]:
+    """
+    Yields the records of a binary record file in the byte range [start, end)
+    """
+    with open(path, "rb") as f:
+        schema = read_header(f)
+        if schema is None:
+            return
+        f.seek(start)
+        yield from read_records(f, schema=schema, limit=end - start)
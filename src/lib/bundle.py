@@ -0,0 +1,670 @@
+import os
+import ast
+import builtins
+import importlib.util
+from dataclasses import dataclass, field
+from typing import AbstractSet, Any, Dict, List, Optional, Set, Tuple
+
+HEADER = """#!/usr/bin/python3
+# Generated from src/ by `./main.py build`, do not edit.
+"""
+
+# bases only needed by the framework, the bundled classes do without them
+DROPPED_BASES = {"ABC", "Record"}
+
+
+@dataclass
+class Bundle:
+    """
+    A single file Hadoop Streaming script, `entry` runs the stage (statements, their
+    own variables allowed).
+
+    The names used by `entry` are looked up in `module` and copied into the script
+    along with what they use, following the imports of src. `pins` are attributes of
+    the stages (`self.x`, `self.sink.x` in the methods of a Mapper or Reducer) with a
+    known value in the script, the branches depending on them are resolved at build
+    time, so only the text fast path is left.
+    """
+
+    module: str
+    entry: str
+    pins: Dict[str, Any] = field(default_factory=dict)
+
+
+# what a streaming task never has: metrics, columnar caches or binary records
+STREAMING_PINS: Dict[str, Any] = {
+    "self.metrics": None,
+    "self.columns": None,
+    "self.input_format": "text",
+    "self.sink.binary": False,
+    "self.fast_parse": True,
+}
+
+BUNDLES: Dict[str, Bundle] = {
+    "user-mapper.py": Bundle("src.mappers.user", "UserMapper().run()"),
+    "user-combiner.py": Bundle(
+        "src.combiners.user",
+        "UserCombiner().run()",
+        pins={"self.unsorted": False, "self.aggregator": None},
+    ),
+    "user-reducer.py": Bundle(
+        "src.reducers.user",
+        "UserReducer().run()",
+        pins={"self.unsorted": False, "self.aggregator": None},
+    ),
+    "timeline-mapper.py": Bundle("src.mappers.timeline", "TimelineMapper().run()"),
+    "timeline-reducer.py": Bundle("src.reducers.timeline", "TimelineReducer().run()"),
+    "cooldown-reducer.py": Bundle("src.reducers.cooldown", "CooldownReducer().run()"),
+    "features-mapper.py": Bundle(
+        "src.mappers.features",
+        "FeaturesMapper().run()",
+        pins={"self.fast_parse": False},
+    ),
+    "features-reducer.py": Bundle("src.reducers.features", "FeaturesReducer().run()"),
+    "quantity-mapper.py": Bundle("src.mappers.quantity", "QuantityMapper().run()"),
+    "quantity-reducer.py": Bundle("src.reducers.quantity", "QuantityReducer().run()"),
+    "sorter-mapper.py": Bundle("src.mappers.sorter", "SorterMapper().run()"),
+    "sorter-reducer.py": Bundle("src.reducers.sorter", "SorterReducer().run()"),
+    # the tasks share the dictionary of a `--mapper=raw --ids users.ids` pass, shipped
+    # with -files, a missing one fails instead of numbering the users per task
+    "raw-mapper.py": Bundle(
+        "src.mappers.raw",
+        "mapper = RawPlacementMapper()\n"
+        'mapper.ids = IdDictionary.load("users.ids")\n'
+        "mapper.run()",
+    ),
+}
+
+Definition = ast.stmt
+
+
+class BundleError(Exception):
+    """Raises when a bundle cannot be built from the sources"""
+
+
+class Module:
+    """
+    Top level definitions and imports of a source file
+    """
+
+    def __init__(self, name: str):
+        spec = importlib.util.find_spec(name)
+        if spec is None or spec.origin is None:
+            raise BundleError(f"Module {name} not found")
+
+        self.name = name
+        self.package = (
+            name if spec.submodule_search_locations else name.rpartition(".")[0]
+        )
+        with open(spec.origin) as f:
+            tree = ast.parse(f.read(), spec.origin)
+
+        self.definitions: Dict[str, Definition] = {}
+        # bound name -> (module, imported name), the name is None for `import x`
+        self.imports: Dict[str, Tuple[str, Optional[str]]] = {}
+        self.star_imports: List[str] = []
+
+        for node in tree.body:
+            if isinstance(node, (ast.ClassDef, ast.FunctionDef)):
+                self.definitions[node.name] = node
+            elif isinstance(node, ast.Assign) and len(node.targets) == 1:
+                if isinstance(node.targets[0], ast.Name):
+                    self.definitions[node.targets[0].id] = node
+            elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+                self.definitions[node.target.id] = node
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    bound = alias.asname or alias.name.partition(".")[0]
+                    self.imports[bound] = (alias.asname and alias.name or bound, None)
+            elif isinstance(node, ast.ImportFrom):
+                module = self.absolute(node)
+                for alias in node.names:
+                    if alias.name == "*":
+                        self.star_imports.append(module)
+                    else:
+                        self.imports[alias.asname or alias.name] = (module, alias.name)
+
+    def absolute(self, node: ast.ImportFrom) -> str:
+        if not node.level:
+            return node.module or ""
+        package = self.package.rsplit(".", node.level - 1)[0]
+        return f"{package}.{node.module}" if node.module else package
+
+
+def is_local(module: str) -> bool:
+    return module == "src" or module.startswith("src.")
+
+
+def decorator_name(node: ast.expr) -> str:
+    if isinstance(node, ast.Call):
+        node = node.func
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return node.id if isinstance(node, ast.Name) else ""
+
+
+def attribute_path(node: ast.expr) -> str:
+    """
+    Dotted path of an attribute of `self` (e.g. "self.sink.binary"), "" for any other
+    expression
+    """
+    parts: List[str] = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not (parts and isinstance(node, ast.Name) and node.id == "self"):
+        return ""
+    return ".".join(["self", *reversed(parts)])
+
+
+def is_stage(module_name: str, name: str) -> bool:
+    """
+    Whether `name` in a module is a Mapper or Reducer class, the only definitions
+    whose `self` the pins describe
+    """
+    from src.mappers.abstracts import Mapper
+    from src.reducers.abstracts import BaseReducer
+
+    definition = getattr(importlib.import_module(module_name), name, None)
+    return isinstance(definition, type) and issubclass(
+        definition, (Mapper, BaseReducer)
+    )
+
+
+class Folder(ast.NodeTransformer):
+    """
+    Resolves the `if` statements whose test only depends on pinned values.
+
+    A test is known when it compares pinned attributes (`self.x`, `self.sink.x`, pinned
+    by that dotted path) to constants with `is`, `is not`, `==` or `!=`, through `not`,
+    `and`, `or`. Names and the attributes of other objects are never pinned.
+    """
+
+    UNKNOWN = object()
+
+    def __init__(self, pins: Dict[str, Any]):
+        self.pins = pins
+
+    def value(self, node: ast.expr) -> Any:
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.Attribute):
+            path = attribute_path(node)
+            return self.pins[path] if path in self.pins else self.UNKNOWN
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            value = self.value(node.operand)
+            return self.UNKNOWN if value is self.UNKNOWN else not value
+        if isinstance(node, ast.BoolOp):
+            return self.bool_op(node)
+        if isinstance(node, ast.Compare) and len(node.ops) == 1:
+            left, right = self.value(node.left), self.value(node.comparators[0])
+            if left is self.UNKNOWN or right is self.UNKNOWN:
+                return self.UNKNOWN
+            op = node.ops[0]
+            if isinstance(op, ast.Is):
+                return left is right
+            if isinstance(op, ast.IsNot):
+                return left is not right
+            if isinstance(op, ast.Eq):
+                return left == right
+            if isinstance(op, ast.NotEq):
+                return left != right
+        return self.UNKNOWN
+
+    def bool_op(self, node: ast.BoolOp) -> Any:
+        # short circuits like python does, an unknown operand is fine if another
+        # decides the result
+        decisive = isinstance(node.op, ast.Or)
+        unknown = False
+        for operand in node.values:
+            value = self.value(operand)
+            if value is self.UNKNOWN:
+                unknown = True
+            elif bool(value) is decisive:
+                return decisive
+        return self.UNKNOWN if unknown else not decisive
+
+    def generic_visit(self, node: ast.AST) -> Any:
+        super().generic_visit(node)
+        # a folded `if` can leave a return in the middle of a block, or the block empty
+        for field in ("body", "orelse", "finalbody"):
+            block = getattr(node, field, None)
+            if isinstance(block, list):
+                for i, statement in enumerate(block):
+                    if isinstance(statement, (ast.Return, ast.Raise, ast.Continue)):
+                        del block[i + 1 :]
+                        break
+        if isinstance(node, ast.Try) and not (node.handlers or node.finalbody):
+            return [*node.body, *node.orelse]
+        if isinstance(getattr(node, "body", None), list) and not node.body:  # type: ignore
+            node.body = [ast.Pass()]  # type: ignore[attr-defined]
+        return node
+
+    def visit_If(self, node: ast.If) -> Any:
+        self.generic_visit(node)
+        value = self.value(node.test)
+        if value is self.UNKNOWN:
+            return node
+        return (node.body if value else node.orelse) or None
+
+
+class Lowerer(ast.NodeTransformer):
+    """
+    Removes what only matters to type checkers and the framework: annotations, abstract
+    methods and the ABC and Record bases. Dataclasses become classes with __slots__.
+    """
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> Any:
+        if any(decorator_name(d) == "abstractmethod" for d in node.decorator_list):
+            return None
+        node.returns = None
+        arguments = node.args
+        for arg in [*arguments.posonlyargs, *arguments.args, *arguments.kwonlyargs]:
+            arg.annotation = None
+        for extra in (arguments.vararg, arguments.kwarg):
+            if extra is not None:
+                extra.annotation = None
+        self.generic_visit(node)
+        return node
+
+    def visit_AnnAssign(self, node: ast.AnnAssign) -> Any:
+        if node.value is None:
+            return None
+        return ast.copy_location(
+            ast.Assign(targets=[node.target], value=node.value), node
+        )
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> Any:
+        node.bases = [
+            base
+            for base in node.bases
+            if not (isinstance(base, ast.Name) and base.id in DROPPED_BASES)
+        ]
+        if any(decorator_name(d) == "dataclass" for d in node.decorator_list):
+            self.lower_dataclass(node)
+        self.generic_visit(node)
+        return node
+
+    @staticmethod
+    def lower_dataclass(node: ast.ClassDef) -> None:
+        fields: List[str] = []
+        defaults: List[ast.expr] = []
+        body: List[ast.stmt] = []
+        for statement in node.body:
+            if (
+                isinstance(statement, ast.AnnAssign)
+                and isinstance(statement.target, ast.Name)
+                and "ClassVar" not in ast.unparse(statement.annotation)
+            ):
+                fields.append(statement.target.id)
+                if statement.value is not None:
+                    defaults.append(statement.value)
+            else:
+                body.append(statement)
+
+        if len(node.decorator_list) != 1 or ast.unparse(node.decorator_list[0]) != (
+            "dataclass"
+        ):
+            raise BundleError(f"Only plain @dataclass can be bundled, see {node.name}")
+
+        slots = ast.parse(f"__slots__ = {tuple(fields)!r}").body[0]
+        init = ast.parse(
+            "def __init__(self, {}):\n    {}".format(
+                ", ".join(fields),
+                "\n    ".join(f"self.{name} = {name}" for name in fields) or "pass",
+            )
+        ).body[0]
+        init.args.defaults = defaults  # type: ignore[attr-defined]
+
+        docstring = body[:1] if body and is_docstring(body[0]) else []
+        node.body = [*docstring, slots, *body[len(docstring) :], init]
+        node.decorator_list = []
+
+
+def is_docstring(node: ast.stmt) -> bool:
+    return (
+        isinstance(node, ast.Expr)
+        and isinstance(node.value, ast.Constant)
+        and isinstance(node.value.value, str)
+    )
+
+
+def strip_docstrings(node: ast.AST) -> None:
+    for child in ast.walk(node):
+        if isinstance(child, (ast.ClassDef, ast.FunctionDef)):
+            if child.body and is_docstring(child.body[0]) and len(child.body) > 1:
+                child.body = child.body[1:]
+
+
+def bound_names(node: ast.AST) -> Set[str]:
+    """
+    Names assigned anywhere inside a function, its arguments included
+    """
+    names: Set[str] = set()
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name) and not isinstance(child.ctx, ast.Load):
+            names.add(child.id)
+        elif isinstance(child, ast.arg):
+            names.add(child.arg)
+        elif isinstance(child, (ast.FunctionDef, ast.ClassDef)) and child is not node:
+            names.add(child.name)
+        elif isinstance(child, (ast.Import, ast.ImportFrom)):
+            for alias in child.names:
+                names.add(alias.asname or alias.name.partition(".")[0])
+        elif isinstance(child, ast.ExceptHandler) and child.name:
+            names.add(child.name)
+    return names
+
+
+def loaded_names(node: ast.AST) -> Set[str]:
+    return {
+        child.id
+        for child in ast.walk(node)
+        if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Load)
+    }
+
+
+def free_names(node: ast.AST, local: AbstractSet[str] = frozenset()) -> Set[str]:
+    """
+    Global names a definition uses, over approximated like the compiler would not
+    """
+    if isinstance(node, ast.FunctionDef):
+        outer = set()
+        for decorator in node.decorator_list:
+            outer |= loaded_names(decorator)
+        for default in [*node.args.defaults, *node.args.kw_defaults]:
+            if default is not None:
+                outer |= loaded_names(default)
+        inner = set()
+        for statement in node.body:
+            inner |= loaded_names(statement)
+        return (outer - local) | (inner - bound_names(node))
+
+    if isinstance(node, ast.ClassDef):
+        names = set()
+        for expression in [*node.bases, *node.decorator_list]:
+            names |= loaded_names(expression)
+        # the body of a class sees its own names, its methods do not
+        class_names = {
+            statement.name
+            for statement in node.body
+            if isinstance(statement, (ast.FunctionDef, ast.ClassDef))
+        } | {
+            target.id
+            for statement in node.body
+            if isinstance(statement, ast.Assign)
+            for target in statement.targets
+            if isinstance(target, ast.Name)
+        }
+        for statement in node.body:
+            if isinstance(statement, ast.FunctionDef):
+                names |= free_names(statement, class_names)
+            else:
+                names |= loaded_names(statement) - class_names
+        return names
+
+    # the targets of a comprehension are local to it
+    targets = {
+        name
+        for child in ast.walk(node)
+        if isinstance(child, ast.comprehension)
+        for name in bound_names(child.target)
+    }
+    return loaded_names(node) - targets
+
+
+def eager_names(node: ast.AST) -> Set[str]:
+    """
+    Names a definition needs when it is executed, so they have to be defined before it
+    """
+    if isinstance(node, ast.FunctionDef):
+        names = set()
+        for expression in [*node.decorator_list, *node.args.defaults]:
+            names |= loaded_names(expression)
+        for default in node.args.kw_defaults:
+            if default is not None:
+                names |= loaded_names(default)
+        return names
+    if isinstance(node, ast.ClassDef):
+        names = set()
+        for expression in [*node.bases, *node.decorator_list]:
+            names |= loaded_names(expression)
+        for statement in node.body:
+            if isinstance(statement, ast.FunctionDef):
+                names |= eager_names(statement)
+            elif not isinstance(statement, ast.ClassDef):
+                names |= loaded_names(statement)
+        return names
+    return loaded_names(node)
+
+
+def attributes(node: ast.AST) -> Set[str]:
+    return {child.attr for child in ast.walk(node) if isinstance(child, ast.Attribute)}
+
+
+class Builder:
+    """
+    Copies the definitions reachable from the entry of a bundle, see `build`
+    """
+
+    BUILTINS = set(dir(builtins))
+
+    def __init__(self, bundle: Bundle):
+        self.bundle = bundle
+        self.modules: Dict[str, Module] = {}
+        # name -> lowered definition, the same name from two modules is an error
+        self.definitions: Dict[str, Definition] = {}
+        self.origins: Dict[str, str] = {}
+        self.imports: Dict[str, Tuple[str, Optional[str]]] = {}
+
+    def module(self, name: str) -> Module:
+        if name not in self.modules:
+            self.modules[name] = Module(name)
+        return self.modules[name]
+
+    def resolve(self, module_name: str, name: str, seen: Set[str]) -> Set[str]:
+        """
+        Adds the definition `name` refers to in a module, returns the names to resolve
+        next (the ones its members use are only resolved once they are needed)
+        """
+        key = f"{module_name}:{name}"
+        if key in seen:
+            return set()
+        seen.add(key)
+
+        if name in self.BUILTINS and name not in self.module(module_name).imports:
+            return set()
+
+        module = self.module(module_name)
+        if name in module.definitions:
+            if name in self.definitions:
+                if self.origins[name] != module_name:
+                    raise BundleError(
+                        f"{name} is defined in {self.origins[name]} and {module_name}"
+                    )
+                return set()
+            node = module.definitions[name]
+            if isinstance(node, ast.ClassDef) and is_stage(module_name, name):
+                node = Folder(self.bundle.pins).visit(node)
+            node = Lowerer().visit(node)
+            strip_docstrings(node)
+            self.definitions[name] = node
+            self.origins[name] = module_name
+            return {name}
+
+        if name in module.imports:
+            source, imported = module.imports[name]
+            if not is_local(source):
+                previous = self.imports.setdefault(name, (source, imported))
+                if previous != (source, imported):
+                    raise BundleError(f"{name} is imported from two places")
+                return set()
+            if imported is None:
+                raise BundleError(f"Bundles cannot use `import {source}`")
+            if imported != name:
+                raise BundleError(f"Bundles cannot rename {imported} to {name}")
+            return self.resolve(source, imported, seen)
+
+        for source in module.star_imports:
+            try:
+                found = self.resolve(source, name, seen)
+            except BundleError:
+                continue
+            if found or name in self.definitions:
+                return found
+
+        raise BundleError(f"{name} is not defined in {module_name}")
+
+    def members(self, node: Definition, live: Set[str]) -> List[ast.stmt]:
+        """
+        The statements of a class that are kept: everything but the methods whose
+        name is not used as an attribute anywhere in the bundle
+        """
+        assert isinstance(node, ast.ClassDef)
+        return [
+            statement
+            for statement in node.body
+            if not isinstance(statement, ast.FunctionDef)
+            or statement.name.startswith("__")
+            or statement.name in live
+        ]
+
+    def collect(self) -> Tuple[List[str], Set[str]]:
+        """
+        Resolves definitions until every used name is defined, pruning methods
+        """
+        entry = ast.parse(self.bundle.entry)
+        live = attributes(entry)
+        # the names the entry assigns are its own
+        needed = loaded_names(entry) - bound_names(entry)
+        pending = {(self.bundle.module, name) for name in needed}
+        seen: Set[str] = set()
+        used: Dict[str, None] = {}
+
+        while True:
+            while pending:
+                module_name, name = pending.pop()
+                for found in self.resolve(module_name, name, seen):
+                    used[found] = None
+
+            # the names and attributes used by what is kept so far
+            names: Set[Tuple[str, str]] = set()
+            attrs = set(live)
+            for name in used:
+                node = self.kept(self.definitions[name], live)
+                attrs |= attributes(node)
+                origin = self.origins[name]
+                names |= {(origin, free) for free in free_names(node)}
+
+            pending = {
+                (module_name, name)
+                for module_name, name in names
+                if f"{module_name}:{name}" not in seen
+            }
+            if not pending and attrs == live:
+                return list(used), live
+            live = attrs
+
+    def kept(self, node: Definition, live: Set[str]) -> Definition:
+        if not isinstance(node, ast.ClassDef):
+            return node
+        copy = ast.ClassDef(
+            name=node.name,
+            bases=node.bases,
+            keywords=node.keywords,
+            body=self.members(node, live) or [ast.Pass()],
+            decorator_list=node.decorator_list,
+        )
+        return ast.copy_location(copy, node)
+
+    def order(self, names: List[str]) -> List[str]:
+        """
+        Orders the definitions so the names used at definition time come first
+        """
+        ordered: List[str] = []
+        visiting: Set[str] = set()
+
+        def visit(name: str) -> None:
+            if name in ordered or name not in self.definitions:
+                return
+            if name in visiting:
+                raise BundleError(f"Definition cycle through {name}")
+            visiting.add(name)
+            for needed in sorted(eager_names(self.definitions[name])):
+                visit(needed)
+            visiting.discard(name)
+            ordered.append(name)
+
+        # by source position, so the scripts do not depend on the resolution order
+        for name in sorted(
+            names, key=lambda name: (self.origins[name], self.definitions[name].lineno)
+        ):
+            visit(name)
+        return ordered
+
+    def import_lines(self, used: Set[str]) -> List[str]:
+        plain = sorted(
+            f"import {source}" if name == source else f"import {source} as {name}"
+            for name, (source, imported) in self.imports.items()
+            if imported is None and name in used
+        )
+        grouped: Dict[str, List[str]] = {}
+        for name, (source, imported) in sorted(self.imports.items()):
+            if imported is not None and name in used:
+                grouped.setdefault(source, []).append(
+                    imported if imported == name else f"{imported} as {name}"
+                )
+        return plain + [
+            f"from {source} import {', '.join(names)}"
+            for source, names in sorted(grouped.items())
+        ]
+
+    def build(self) -> str:
+        names, live = self.collect()
+        nodes = [self.kept(self.definitions[name], live) for name in self.order(names)]
+
+        entry = ast.parse(self.bundle.entry)
+        used = loaded_names(entry) - bound_names(entry)
+        for node in nodes:
+            used |= free_names(node)
+        unknown = used - set(self.definitions) - set(self.imports) - self.BUILTINS
+        if unknown:
+            raise BundleError(
+                f"Undefined names in bundle: {', '.join(sorted(unknown))}"
+            )
+
+        parts = [HEADER + "\n".join(self.import_lines(used))]
+        parts += [ast.unparse(ast.fix_missing_locations(node)) for node in nodes]
+        parts.append(
+            'if __name__ == "__main__":\n'
+            + "\n".join("    " + line for line in self.bundle.entry.splitlines())
+        )
+        return "\n\n\n".join(parts) + "\n"
+
+
+def build(bundle: Bundle) -> str:
+    """
+    Source of the single file script of a bundle.
+
+    Only the definitions reachable from the entry are copied, methods included (a
+    method is kept when its name is used as an attribute somewhere in the bundle).
+    Annotations, abstract methods and dataclasses are lowered to plain python, so the
+    script imports nothing it does not run.
+    """
+    pins = {**STREAMING_PINS, **bundle.pins}
+    return Builder(Bundle(bundle.module, bundle.entry, pins)).build()
+
+
+def build_all(folder: str, bundles: Dict[str, Bundle] = BUNDLES) -> List[str]:
+    """
+    Writes the script of every bundle into `folder`, returns their paths
+    """
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for name, bundle in bundles.items():
+        path = os.path.join(folder, name)
+        with open(path, "w") as f:
+            f.write(build(bundle))
+        os.chmod(path, 0o755)
+        paths.append(path)
+    return paths
@@ -0,0 +1,275 @@
+import os
+from bisect import bisect_right
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional
+
+from src.exceptions.data import DataError
+from src.lib.columnar import CHUNK_ROWS, ColumnarData
+from src.mappers.user import UserMapper
+from src.schemas.data import CANVAS_SIZE
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from src.lib.moderation import ModerationIndex
+
+# white, the index of #FFFFFF in the palette (see src/mappers/raw.py), the color of a
+# pixel nobody placed yet
+BLANK: int = 31
+
+# milliseconds between two snapshots
+SNAPSHOT_INTERVAL: int = 15 * 60 * 1000
+
+# columns of a chunk of placements, times in UTC milliseconds like UserMove
+CHUNK_COLUMNS: List[str] = ["time", "x", "y", "color", "mod"]
+
+
+def line_chunks(
+    lines: Iterable[str],
+    mapper: Optional[UserMapper] = None,
+    *,
+    size: int = CHUNK_ROWS,
+) -> Iterator[Dict[str, "np.ndarray"]]:
+    """
+    Chunks of `size` placements of the simplified csv, parsed by `UserMapper.parse_line`
+    """
+    import numpy as np
+
+    mapper = mapper or UserMapper()
+    rows: List[tuple] = []
+    for line in lines:
+        move = mapper.parse_line(line.rstrip("\n"))
+        if move is None:
+            continue
+        rows.append((move.timestamp, move.x, move.y, move.color, move.is_mod))
+        if len(rows) == size:
+            yield dict(zip(CHUNK_COLUMNS, np.array(rows, dtype=np.int64).T))
+            rows = []
+
+    if rows:
+        yield dict(zip(CHUNK_COLUMNS, np.array(rows, dtype=np.int64).T))
+
+
+def column_chunks(
+    data: ColumnarData,
+    start: int = 0,
+    end: Optional[int] = None,
+    *,
+    first_ts: int = UserMapper.first_ts,
+    size: int = CHUNK_ROWS,
+) -> Iterator[Dict[str, "np.ndarray"]]:
+    """
+    Chunks of the rows `start` to `end` of a columnar cache, with UTC times
+    """
+    end = len(data) if end is None else end
+    columns = {name: data.column(name) for name in CHUNK_COLUMNS}
+    for low in range(start, end, size):
+        high = min(low + size, end)
+        chunk = {name: column[low:high] for name, column in columns.items()}
+        chunk["time"] = chunk["time"] + first_ts
+        yield chunk
+
+
+def empty_chunk() -> Dict[str, "np.ndarray"]:
+    import numpy as np
+
+    return {name: np.zeros(0, dtype=np.int64) for name in CHUNK_COLUMNS}
+
+
+class CanvasReplayer:
+    """
+    Canvas of r/place at any time, replayed from the placements (in time order) and the
+    rectangles of the moderation tool.
+
+    Placements are applied a block at a time with numpy, a block being the placements
+    between two rectangles, so the last one of a pixel wins without a loop in python.
+    `build` saves a compressed snapshot of the canvas to `folder` every `interval`
+    milliseconds, and `state_at` starts from the latest one before the time it is asked
+    for, replaying at most an interval of placements from the columnar cache `data`.
+
+    The mod rows of the simplified csv are the pixels of the rectangles, they are
+    painted unless `moderation` is given (then the rectangles are).
+    """
+
+    def __init__(
+        self,
+        folder: str,
+        data: Optional[ColumnarData] = None,
+        *,
+        moderation: Optional["ModerationIndex"] = None,
+        interval: int = SNAPSHOT_INTERVAL,
+        first_ts: int = UserMapper.first_ts,
+    ):
+        self.folder = folder
+        self.data = data
+        self.moderation = moderation
+        self.interval = interval
+        self.first_ts = first_ts
+        self.snapshots: List[int] = self.list_snapshots()
+
+    @staticmethod
+    def blank() -> "np.ndarray":
+        import numpy as np
+
+        return np.full((CANVAS_SIZE, CANVAS_SIZE), BLANK, dtype=np.uint8)
+
+    def snapshot_path(self, timestamp: int) -> str:
+        return os.path.join(self.folder, f"{timestamp:013d}.npz")
+
+    def list_snapshots(self) -> List[int]:
+        """
+        Times of the snapshots in `folder`, in order
+        """
+        if not os.path.isdir(self.folder):
+            return []
+        names = (name[:-4] for name in os.listdir(self.folder) if name.endswith(".npz"))
+        return sorted(int(name) for name in names if name.isdigit())
+
+    def save(self, canvas: "np.ndarray", timestamp: int) -> None:
+        """
+        Writes the canvas as it is at `timestamp` (through a temporary file, so a
+        snapshot is never partial)
+        """
+        import numpy as np
+
+        path = self.snapshot_path(timestamp)
+        with open(f"{path}.tmp", "wb") as f:
+            np.savez_compressed(f, canvas=canvas)
+        os.replace(f"{path}.tmp", path)
+
+    def load(self, timestamp: int) -> "np.ndarray":
+        import numpy as np
+
+        with np.load(self.snapshot_path(timestamp)) as snapshot:
+            return snapshot["canvas"]
+
+    def paint(
+        self, canvas: "np.ndarray", chunk: Dict[str, "np.ndarray"], start: int, end: int
+    ) -> None:
+        """
+        Applies the placements of a chunk and the rectangles from `start` to `end`
+        (exclusive) to the canvas, in time order. The chunk holds placements of that
+        time span; a rectangle is painted after the placements of its millisecond.
+        """
+        import numpy as np
+
+        times, x, y, color = chunk["time"], chunk["x"], chunk["y"], chunk["color"]
+        if self.moderation is not None:
+            placed = chunk["mod"] == 0
+            times, x, y, color = times[placed], x[placed], y[placed], color[placed]
+
+        pixels = canvas.reshape(-1)
+        rectangles = self.moderation.between(start, end) if self.moderation else ()
+        low = 0
+        for rect in rectangles:
+            high = int(np.searchsorted(times, rect.timestamp, side="right"))
+            self.paint_block(pixels, x[low:high], y[low:high], color[low:high])
+            canvas[rect.y1 : rect.y2 + 1, rect.x1 : rect.x2 + 1] = rect.color
+            low = high
+        self.paint_block(pixels, x[low:], y[low:], color[low:])
+
+    @staticmethod
+    def paint_block(
+        pixels: "np.ndarray", x: "np.ndarray", y: "np.ndarray", color: "np.ndarray"
+    ) -> None:
+        import numpy as np
+
+        if not len(x):
+            return
+        flat = y.astype(np.int64) * CANVAS_SIZE + x
+        # repeated indices of an assignment get an unspecified value, keep the last
+        _, first = np.unique(flat[::-1], return_index=True)
+        last = len(flat) - 1 - first
+        pixels[flat[last]] = color[last]
+
+    def chunks(self) -> Iterator[Dict[str, "np.ndarray"]]:
+        if self.data is None:
+            raise DataError("Replaying needs a columnar cache", self.folder)
+        return column_chunks(self.data, first_ts=self.first_ts)
+
+    def build(self, chunks: Optional[Iterable[Dict[str, "np.ndarray"]]] = None) -> int:
+        """
+        Replays all the placements (the cache by default, or chunks of `line_chunks`)
+        and writes a snapshot at every multiple of `interval` followed by placements,
+        and at the first one after the last placement or rectangle, replacing the
+        snapshots of `folder`, returns their number
+        """
+        import numpy as np
+
+        os.makedirs(self.folder, exist_ok=True)
+        for timestamp in self.list_snapshots():
+            os.remove(self.snapshot_path(timestamp))
+
+        canvas = self.blank()
+        written = 0
+        start = 0
+        snapshot: Optional[int] = None
+
+        for chunk in self.chunks() if chunks is None else chunks:
+            times = chunk["time"]
+            if not len(times):
+                continue
+            if times[0] < start or (np.diff(times) < 0).any():
+                raise DataError("Placements should be in time order", str(times[0]))
+
+            low = 0
+            while low < len(times):
+                if snapshot is None:
+                    snapshot = (int(times[low]) // self.interval + 1) * self.interval
+                high = int(np.searchsorted(times, snapshot))
+                part = {name: values[low:high] for name, values in chunk.items()}
+                if high == len(times):
+                    # rectangles of the last millisecond wait for its next placements
+                    self.paint(canvas, part, start, int(times[-1]))
+                    start = int(times[-1])
+                    break
+
+                self.paint(canvas, part, start, snapshot)
+                self.save(canvas, snapshot)
+                written += 1
+                # nothing happens in between, no need to save the same canvas twice
+                start, snapshot, low = snapshot, None, high
+
+        # the last millisecond and the rectangles after it go in a final snapshot, so
+        # every event is painted into one
+        last = start if snapshot is not None else None
+        if self.moderation is not None and len(self.moderation):
+            if self.moderation.times[-1] >= start:
+                last = max(start, self.moderation.times[-1])
+        if last is not None:
+            end = (last // self.interval + 1) * self.interval
+            self.paint(canvas, empty_chunk(), start, end)
+            self.save(canvas, end)
+            written += 1
+
+        self.snapshots = self.list_snapshots()
+        return written
+
+    def state_at(self, timestamp: int) -> "np.ndarray":
+        """
+        Canvas before the placements of `timestamp` (UTC milliseconds), from the latest
+        snapshot and the placements since
+        """
+        import numpy as np
+
+        found = bisect_right(self.snapshots, timestamp) - 1
+        if found >= 0:
+            start = self.snapshots[found]
+            canvas = self.load(start)
+        else:
+            start = 0
+            canvas = self.blank()
+
+        if self.data is None:
+            raise DataError("Replaying needs a columnar cache", self.folder)
+        relative = self.data.column("time")
+        low, high = np.searchsorted(
+            relative, [start - self.first_ts, timestamp - self.first_ts]
+        )
+
+        for chunk in column_chunks(self.data, low, high, first_ts=self.first_ts):
+            # rectangles of the last millisecond wait for its next placements
+            end = int(chunk["time"][-1])
+            self.paint(canvas, chunk, start, end)
+            start = end
+        self.paint(canvas, empty_chunk(), start, timestamp)
+        return canvas
@@ -0,0 +1,334 @@
+import os
+import json
+import struct
+from array import array
+from dataclasses import fields
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Type,
+    Union,
+)
+
+from src.exceptions.data import DataError
+from src.lib.output import Sink
+from src.schemas.data import Record
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+MAGIC: bytes = b"MDPC"
+VERSION: int = 1
+
+# magic, version, numpy dtype string and number of rows
+HEADER = struct.Struct("<4sB3sQ")
+# the data starts here, so every column is aligned for any dtype
+HEADER_SIZE: int = 64
+
+META: str = "meta.json"
+
+# columns of the simplified csv and the narrowest (numpy) type that fits them
+COLUMNS: Dict[str, str] = {
+    "time": "<i8",
+    "user_id": "<i4",
+    "x": "<i2",
+    "y": "<i2",
+    "color": "<i1",
+    "mod": "<i1",
+}
+
+# rows parsed (and handed out by `ColumnarData.chunks`) at once
+CHUNK_ROWS: int = 1_000_000
+
+
+def column_path(folder: str, name: str) -> str:
+    return os.path.join(folder, f"{name}.col")
+
+
+def is_cache(path: Union[str, None]) -> bool:
+    """
+    Whether path is a complete cache written by `convert`
+    """
+    return path is not None and os.path.isfile(os.path.join(path, META))
+
+
+def convert(source: Union[str, IO], folder: str, *, chunksize: int = CHUNK_ROWS) -> int:
+    """
+    Writes the simplified csv as one typed binary file per column, returns the rows.
+
+    The metadata is written last, so an interrupted conversion is never taken for a
+    cache. Values that do not fit the type of their column raise a DataError.
+    """
+    import numpy as np
+    import pandas as pd
+
+    os.makedirs(folder, exist_ok=True)
+    if is_cache(folder):
+        os.remove(os.path.join(folder, META))
+
+    files = {name: open(column_path(folder, name), "wb") for name in COLUMNS}
+    rows = 0
+
+    try:
+        for f in files.values():
+            f.write(bytes(HEADER_SIZE))
+
+        chunks = pd.read_csv(
+            source,
+            header=0,
+            usecols=list(COLUMNS),
+            dtype=np.int64,
+            chunksize=chunksize,
+        )
+        for chunk in chunks:
+            for name, dtype in COLUMNS.items():
+                values = chunk[name].to_numpy()
+                info = np.iinfo(dtype)
+                if len(values) and (values.min() < info.min or values.max() > info.max):
+                    raise DataError(f"Column {name} does not fit in {dtype}", str(rows))
+                files[name].write(values.astype(dtype).tobytes())
+            rows += len(chunk)
+
+        for name, f in files.items():
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, VERSION, COLUMNS[name].encode(), rows))
+    finally:
+        for f in files.values():
+            f.close()
+
+    write_meta(folder, rows, COLUMNS, source if isinstance(source, str) else None)
+    return rows
+
+
+def write_meta(
+    folder: str, rows: int, columns: Dict[str, str], source: Optional[str] = None
+) -> None:
+    meta = {"version": VERSION, "rows": rows, "columns": columns, "source": source}
+    with open(os.path.join(folder, META), "w") as f:
+        json.dump(meta, f, indent=2)
+
+
+def write_columns(
+    folder: str, columns: Dict[str, "np.ndarray"], source: Optional[str] = None
+) -> None:
+    """
+    Writes arrays of the same length as a cache `ColumnarData` can read, for tables
+    built in memory instead of converted from a csv
+    """
+    os.makedirs(folder, exist_ok=True)
+    if is_cache(folder):
+        os.remove(os.path.join(folder, META))
+
+    rows = len(next(iter(columns.values()))) if columns else 0
+    dtypes: Dict[str, str] = {}
+    for name, values in columns.items():
+        if len(values) != rows:
+            raise DataError("Columns should have the same length", name)
+        dtype = values.dtype.newbyteorder("<")
+        dtypes[name] = dtype.str
+        with open(column_path(folder, name), "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, dtype.str.encode(), rows))
+            f.write(bytes(HEADER_SIZE - HEADER.size))
+            f.write(values.astype(dtype).tobytes())
+
+    write_meta(folder, rows, dtypes, source)
+
+
+def create_columns(
+    folder: str, dtypes: Dict[str, str], rows: int
+) -> Dict[str, "np.ndarray"]:
+    """
+    Writable memory mapped columns of `rows` zeros, for tables filled in place (e.g.
+    out of order) that do not fit in memory. The cache is complete, and readable by
+    `ColumnarData`, once the caller writes its metadata with `write_meta`.
+    """
+    import numpy as np
+
+    os.makedirs(folder, exist_ok=True)
+    if is_cache(folder):
+        os.remove(os.path.join(folder, META))
+
+    columns: Dict[str, "np.ndarray"] = {}
+    for name, dtype in dtypes.items():
+        path = column_path(folder, name)
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, dtype.encode(), rows))
+            f.write(bytes(HEADER_SIZE - HEADER.size))
+            f.truncate(HEADER_SIZE + rows * np.dtype(dtype).itemsize)
+        columns[name] = (
+            np.memmap(path, dtype=dtype, mode="r+", offset=HEADER_SIZE, shape=(rows,))
+            if rows
+            else np.zeros(0, dtype=dtype)
+        )
+    return columns
+
+
+class ColumnarData:
+    """
+    Read only view of a cache written by `convert`.
+
+    Columns are memory mapped, so slicing them is zero copy and only the pages touched
+    are read from disk.
+    """
+
+    def __init__(self, folder: str):
+        import numpy as np
+
+        if not is_cache(folder):
+            raise DataError("Folder is not a columnar cache", folder)
+
+        with open(os.path.join(folder, META)) as f:
+            meta = json.load(f)
+
+        if meta["version"] != VERSION:
+            raise DataError("Unsupported columnar cache version", str(meta["version"]))
+
+        self.folder = folder
+        self.rows: int = meta["rows"]
+        self.dtypes: Dict[str, "np.dtype"] = {
+            name: np.dtype(dtype) for name, dtype in meta["columns"].items()
+        }
+        self._columns: Dict[str, "np.ndarray"] = {}
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, name: str) -> "np.ndarray":
+        return self.column(name)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.dtypes)
+
+    def column(self, name: str) -> "np.ndarray":
+        import numpy as np
+
+        column = self._columns.get(name)
+        if column is not None:
+            return column
+
+        dtype = self.dtypes.get(name)
+        if dtype is None:
+            raise DataError("Unknown column", name)
+
+        path = column_path(self.folder, name)
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+
+        magic, version, dtype_str, rows = HEADER.unpack(header)
+        if magic != MAGIC or np.dtype(dtype_str.decode()) != dtype or rows != self.rows:
+            raise DataError("Column file does not match the cache metadata", path)
+
+        if not rows:
+            column = np.empty(0, dtype=dtype)
+        else:
+            column = np.memmap(
+                path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(rows,)
+            )
+
+        self._columns[name] = column
+        return column
+
+    def chunks(
+        self, size: int = CHUNK_ROWS, columns: Optional[Sequence[str]] = None
+    ) -> Iterator[Dict[str, "np.ndarray"]]:
+        """
+        Yields {column: slice} for consecutive blocks of `size` rows
+        """
+        arrays = {name: self.column(name) for name in (columns or self.columns)}
+        for start in range(0, self.rows, size):
+            yield {name: array[start : start + size] for name, array in arrays.items()}
+
+    def to_frame(self, columns: Optional[Sequence[str]] = None) -> "pd.DataFrame":
+        import pandas as pd
+
+        return pd.DataFrame(
+            {name: self.column(name) for name in (columns or self.columns)}
+        )
+
+
+class ColumnarSink(Sink):
+    """
+    Sink collecting records into columns, written as a cache to `folder` on close.
+
+    Every field of the records becomes a column, int fields in the narrowest type that
+    fits them. With `index` a row goes at the position given by that field instead of
+    after the previous one, e.g. a table of users read by user_id, and the missing rows
+    are zeros.
+    """
+
+    def __init__(self, folder: str, *, index: Optional[str] = None):
+        super().__init__()
+        self.folder = folder
+        self.index = index
+        self.schema: Optional[Type[Record]] = None
+        self._columns: List[array] = []
+
+    def write(self, line: str) -> None:
+        raise DataError("Columnar sinks can only write records", line)
+
+    def write_record(self, record: Record, format: Any = None) -> None:
+        if type(record) is not self.schema:
+            if self.schema is not None:
+                raise DataError(
+                    "All the records of a columnar sink should have the same type",
+                    repr(record),
+                )
+            self.schema = type(record)
+            codes = self.schema.struct().format[1:]
+            self._columns = [array(code) for code in codes]
+
+        for column, value in zip(self._columns, record.values()):
+            column.append(value)
+
+    def flush(self) -> None:
+        pass
+
+    def sync(self) -> None:
+        pass
+
+    def close(self) -> None:
+        import numpy as np
+
+        names = [field.name for field in fields(self.schema)] if self.schema else []
+        columns = {
+            name: np.frombuffer(column, dtype=column.typecode)
+            for name, column in zip(names, self._columns)
+        }
+
+        if self.index is not None and columns:
+            if self.index not in columns:
+                raise DataError("Records have no index field", self.index)
+            positions = columns[self.index]
+            if positions.min() < 0 or len(np.unique(positions)) != len(positions):
+                raise DataError("Index should be unique and not negative", self.index)
+            for name, values in columns.items():
+                dense = np.zeros(positions.max() + 1, dtype=values.dtype)
+                dense[positions] = values
+                columns[name] = dense
+
+        write_columns(self.folder, {name: narrowest(v) for name, v in columns.items()})
+
+
+def narrowest(values: "np.ndarray") -> "np.ndarray":
+    """
+    Integer values in the narrowest type that holds them, other values as they are
+    """
+    import numpy as np
+
+    if values.dtype.kind != "i" or not len(values):
+        return values
+
+    low, high = values.min(), values.max()
+    for dtype in ("<i1", "<i2", "<i4"):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return values.astype(dtype)
+    return values
@@ -0,0 +1,194 @@
+import io
+import bz2
+import gzip
+import queue
+import threading
+from typing import Any, BinaryIO, Dict, TextIO, Union
+
+from src.exceptions.data import DataError
+
+# bytes read at once from the input files (and buffered by the text layer)
+READ_BUFFER: int = 1024 * 1024
+
+# chunks decompressed ahead of the reader
+PREFETCH: int = 4
+
+MAGIC_BYTES: Dict[str, bytes] = {
+    "gzip": b"\x1f\x8b",
+    "bz2": b"BZh",
+    "zstd": b"\x28\xb5\x2f\xfd",
+}
+
+
+def detect_compression(path: str) -> Union[str, None]:
+    """
+    Name of the compression of a file from its first bytes, None when it is plain
+    """
+    with open(path, "rb") as f:
+        return compression_of(f.read(4))
+
+
+def compression_of(head: bytes) -> Union[str, None]:
+    for name, magic in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return name
+
+    return None
+
+
+def decompressed(stream: BinaryIO, compression: str) -> BinaryIO:
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=stream)  # type: ignore[return-value]
+
+    if compression == "bz2":
+        return bz2.BZ2File(stream)  # type: ignore[return-value]
+
+    try:
+        import zstandard
+    except ImportError:
+        stream.close()
+        raise DataError("Reading zstd files needs the zstandard package", compression)
+
+    return zstandard.ZstdDecompressor().stream_reader(  # type: ignore[return-value]
+        stream, read_size=READ_BUFFER, closefd=True
+    )
+
+
+class ThreadedReader(io.RawIOBase):
+    """
+    Reads a binary stream from a background thread, `prefetch` chunks ahead.
+
+    zlib, bz2 and zstandard release the GIL while decompressing, so the decompression
+    of the next chunks overlaps with the parsing of the current one. Errors of the
+    thread are raised by the reader.
+    """
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        *,
+        chunk_size: int = READ_BUFFER,
+        prefetch: int = PREFETCH,
+    ):
+        super().__init__()
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=prefetch)
+        self._pending = memoryview(b"")
+        self._done = False
+        self._closing = threading.Event()
+        self._thread = threading.Thread(target=self._fill, daemon=True)
+        self._thread.start()
+
+    def _put(self, item: Any) -> None:
+        while not self._closing.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _fill(self) -> None:
+        try:
+            while not self._closing.is_set():
+                chunk = self._stream.read(self._chunk_size)
+                self._put(chunk)
+                if not chunk:
+                    return
+        except Exception as error:
+            self._put(error)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        if not self._pending:
+            if self._done:
+                return 0
+
+            item = self._queue.get()
+            if isinstance(item, Exception):
+                self._done = True
+                raise item
+            if not item:
+                self._done = True
+                return 0
+            self._pending = memoryview(item)
+
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def close(self) -> None:
+        if not self.closed:
+            self._closing.set()
+            self._thread.join()
+            self._stream.close()
+        super().close()
+
+
+class PrefixedReader(io.RawIOBase):
+    """
+    Raw stream giving the bytes already read from `raw` (its `head`) before the rest
+    """
+
+    def __init__(self, head: bytes, raw: io.RawIOBase):
+        super().__init__()
+        self.head = head
+        self.raw = raw
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        if self.head:
+            size = min(len(buffer), len(self.head))
+            buffer[:size] = self.head[:size]
+            self.head = self.head[size:]
+            return size
+        return self.raw.readinto(buffer) or 0
+
+    def close(self) -> None:
+        self.raw.close()
+        super().close()
+
+
+def read_head(raw: io.RawIOBase, size: int) -> bytes:
+    """
+    First `size` bytes of a stream (fewer only at its end), a pipe can return less
+    than asked for by a single read
+    """
+    head = b""
+    while len(head) < size:
+        chunk = raw.read(size - len(head))
+        if not chunk:
+            break
+        head += chunk
+    return head
+
+
+def open_input(
+    path: str, *, threaded: bool = True, buffer_size: int = READ_BUFFER
+) -> TextIO:
+    """
+    Opens a text file for reading, decompressing gzip, bz2 or zstd files on the fly.
+
+    The compression is detected from the magic bytes, not the extension, reading them
+    ahead and giving them back to the reader so pipes work too. Compressed files are
+    decompressed in a background thread unless `threaded` is False.
+    """
+    raw = open(path, "rb", buffering=0)
+    head = read_head(raw, 4)
+    stream = io.BufferedReader(PrefixedReader(head, raw), buffer_size=buffer_size)
+    compression = compression_of(head)
+
+    if compression is None:
+        return io.TextIOWrapper(stream)
+
+    # a file object of the compression module, or the thread reading it ahead
+    decoded: Any = decompressed(stream, compression)
+    if threaded:
+        decoded = ThreadedReader(decoded, chunk_size=buffer_size)
+
+    return io.TextIOWrapper(io.BufferedReader(decoded, buffer_size=buffer_size))
@@ -2,10 +2,16 @@ import os
 
 import pandas as pd
 
+from src.lib.columnar import ColumnarData, is_cache
+
 
 def read_data(name: str, *, folder: str) -> pd.DataFrame:
     """
-    Reads data from a csv file.
+    Reads data from a csv file, or from a columnar cache (see src/lib/columnar.py).
     """
+    path = os.path.join(os.getcwd(), folder, name)
+
+    if is_cache(path):
+        return ColumnarData(path).to_frame()
 
-    return pd.read_csv(os.path.join(os.getcwd(), folder, name), header=0)
+    return pd.read_csv(path, header=0)
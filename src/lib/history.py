@@ -0,0 +1,201 @@
+import os
+from typing import TYPE_CHECKING, Dict, Iterator
+
+from src.exceptions.data import DataError
+from src.lib.columnar import (
+    CHUNK_ROWS,
+    ColumnarData,
+    create_columns,
+    is_cache,
+    write_meta,
+)
+from src.lib.compression import open_input
+from src.mappers.user import UserMapper
+from src.schemas.data import CANVAS_SIZE
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# columns of the placements of the index, in pixel and then time order
+COLUMNS: Dict[str, str] = {
+    "time": "<i8",
+    "user_id": "<i4",
+    "color": "<i1",
+    "mod": "<i1",
+}
+
+PIXELS: int = CANVAS_SIZE * CANVAS_SIZE
+
+
+def source_chunks(
+    source: str, *, chunksize: int = CHUNK_ROWS
+) -> Iterator[Dict[str, "np.ndarray"]]:
+    """
+    Chunks of the columns of the simplified csv at `source`, or of its columnar cache
+    """
+    import numpy as np
+    import pandas as pd
+
+    names = ["time", "user_id", "x", "y", "color", "mod"]
+    if is_cache(source):
+        yield from ColumnarData(source).chunks(chunksize, columns=names)
+        return
+
+    with open_input(source) as f:
+        for chunk in pd.read_csv(
+            f, header=0, usecols=names, dtype=np.int64, chunksize=chunksize
+        ):
+            yield {name: chunk[name].to_numpy() for name in names}
+
+
+class PixelHistory:
+    """
+    Placements of every pixel in time order, so the history of a pixel is a slice and
+    not a scan of the whole dataset.
+
+    Placements are stored sorted by (y * CANVAS_SIZE + x, time) in memory mapped
+    columns (time in UTC milliseconds, user_id, color and mod), and `offsets` holds
+    where the placements of every pixel start, the CSR layout of a sparse matrix of
+    pixels by placements. Loading maps the files without reading them, so a notebook
+    or the workers of a flow only touch the pages of the pixels they look at.
+    """
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.offsets = ColumnarData(os.path.join(folder, "offsets")).column("offsets")
+        placements = ColumnarData(os.path.join(folder, "placements"))
+        self.columns = {name: placements.column(name) for name in COLUMNS}
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    def pixel(self, x: int, y: int) -> int:
+        if not (0 <= x < CANVAS_SIZE and 0 <= y < CANVAS_SIZE):
+            raise DataError("Pixel out of the canvas", f"{x},{y}")
+        return y * CANVAS_SIZE + x
+
+    def count(self, x: int, y: int) -> int:
+        pixel = self.pixel(x, y)
+        return int(self.offsets[pixel + 1] - self.offsets[pixel])
+
+    def history(self, x: int, y: int) -> Dict[str, "np.ndarray"]:
+        """
+        {column: values} of the placements of (x, y), in time order (zero copy)
+        """
+        pixel = self.pixel(x, y)
+        start, end = int(self.offsets[pixel]), int(self.offsets[pixel + 1])
+        return {name: column[start:end] for name, column in self.columns.items()}
+
+    @classmethod
+    def build(
+        cls,
+        source: str,
+        folder: str,
+        *,
+        chunksize: int = CHUNK_ROWS,
+        first_ts: int = UserMapper.first_ts,
+    ) -> "PixelHistory":
+        """
+        Indexes the simplified csv (or its columnar cache) at `source` into `folder`.
+
+        A counting sort in two passes over the source, a chunk at a time: the first
+        counts the placements of every pixel, giving the offsets, and the second writes
+        each placement after the ones of its pixel already written. Memory holds a
+        chunk and a few arrays of a number per pixel (32 MB each), whatever the size
+        of the source. Rows in time order, like the dataset, leave every pixel in time
+        order; otherwise the placements of every pixel are sorted afterwards, see
+        `sort_pixels`.
+        """
+        import numpy as np
+
+        counts = np.zeros(PIXELS, dtype=np.int64)
+        last = None
+        in_order = True
+        for chunk in source_chunks(source, chunksize=chunksize):
+            times = chunk["time"]
+            if not len(times):
+                continue
+            if (last is not None and times[0] < last) or (np.diff(times) < 0).any():
+                in_order = False
+            last = times[-1]
+            counts += np.bincount(cls.pixels(chunk), minlength=PIXELS)
+
+        offsets = np.zeros(PIXELS + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        rows = int(offsets[-1])
+
+        placements = os.path.join(folder, "placements")
+        columns = create_columns(placements, COLUMNS, rows)
+        # next free row of every pixel
+        cursor = offsets[:-1].copy()
+        for chunk in source_chunks(source, chunksize=chunksize):
+            pixels = cls.pixels(chunk)
+            counts = np.bincount(pixels, minlength=PIXELS)
+            if (counts > offsets[1:] - cursor).any():
+                raise DataError("Source changed while indexing it", source)
+
+            order = np.argsort(pixels, kind="stable")
+            ordered = pixels[order]
+            # position of every row among the rows of its pixel in this chunk
+            rank = np.arange(len(ordered)) - np.searchsorted(ordered, ordered)
+            slots = cursor[ordered] + rank
+            cursor += counts
+
+            for name, column in columns.items():
+                values = chunk[name][order]
+                column[slots] = values + first_ts if name == "time" else values
+
+        if (cursor != offsets[1:]).any():
+            raise DataError("Source changed while indexing it", source)
+        if not in_order:
+            cls.sort_pixels(columns, offsets, size=chunksize)
+
+        index = os.path.join(folder, "offsets")
+        columns.update(create_columns(index, {"offsets": "<i8"}, len(offsets)))
+        columns["offsets"][:] = offsets
+        for column in columns.values():
+            if isinstance(column, np.memmap):
+                column.flush()
+
+        write_meta(placements, rows, COLUMNS, source)
+        write_meta(index, len(offsets), {"offsets": "<i8"}, source)
+        return cls(folder)
+
+    @staticmethod
+    def sort_pixels(
+        columns: Dict[str, "np.ndarray"], offsets: "np.ndarray", *, size: int
+    ) -> None:
+        """
+        Sorts the placements of every pixel by time, in place and keeping the order of
+        the ones of the same millisecond. Pixels are sorted a block of about `size`
+        rows at a time (a pixel with more rows is a block of its own), with a single
+        lexsort by pixel and time.
+        """
+        import numpy as np
+
+        rows = int(offsets[-1])
+        low = start = 0
+        while start < rows:
+            # the last pixel starting within `size` rows, at least the next one
+            high = int(np.searchsorted(offsets, start + size, side="right")) - 1
+            high = max(high, low + 1)
+            end = int(offsets[high])
+
+            segments = np.repeat(
+                np.arange(high - low), np.diff(offsets[low : high + 1])
+            )
+            order = np.lexsort((columns["time"][start:end], segments))
+            for column in columns.values():
+                column[start:end] = column[start:end][order]
+            low, start = high, end
+
+    @staticmethod
+    def pixels(chunk: Dict[str, "np.ndarray"]) -> "np.ndarray":
+        import numpy as np
+
+        x, y = chunk["x"].astype(np.int64), chunk["y"].astype(np.int64)
+        outside = (x < 0) | (x >= CANVAS_SIZE) | (y < 0) | (y >= CANVAS_SIZE)
+        if outside.any():
+            row = np.argmax(outside)
+            raise DataError("Pixel out of the canvas", f"{x[row]},{y[row]}")
+        return y * CANVAS_SIZE + x
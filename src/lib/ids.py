@@ -0,0 +1,156 @@
+import os
+import mmap
+import struct
+import hashlib
+import binascii
+from array import array
+from typing import Any, Optional
+
+from src.exceptions.data import DataError
+
+MAGIC: bytes = b"MDPI"
+VERSION: int = 1
+
+# magic, version, capacity of the table and number of ids
+HEADER = struct.Struct("<4sBQQ")
+# the tables start here, aligned for the 8 byte keys
+HEADER_SIZE: int = 64
+
+# slot of the ids table that holds no key
+EMPTY: int = -1
+
+# the table doubles past this fraction of used slots
+MAX_LOAD: float = 0.7
+
+
+def key_of(user: str) -> int:
+    """
+    64 bit key of a user hash.
+
+    The hashes of the dataset are base64 digests, so their first 8 bytes are already
+    uniformly distributed and are used as they are. Other strings are hashed. Two users
+    sharing a key is unlikely (about 3 in a million for the 10 million users of 2022).
+    """
+    if len(user) == 88 and user.endswith("=="):
+        try:
+            return int.from_bytes(binascii.a2b_base64(user[:12])[:8], "little")
+        except binascii.Error:
+            pass
+    return int.from_bytes(
+        hashlib.blake2b(user.encode(), digest_size=8).digest(), "little"
+    )
+
+
+class IdDictionary:
+    """
+    Interns user hashes into dense ids (0, 1, 2... in order of first appearance).
+
+    An open addressing table of 64 bit keys (see `key_of`) and 32 bit ids in two arrays,
+    about 12 bytes per slot instead of a hundred and more for a dict of strings. It is
+    saved as a single file; `load` maps it read only, so the workers of a machine share
+    its pages, and a loaded dictionary does not accept new users unless `frozen` is
+    False (then it is copied).
+    """
+
+    def __init__(self, capacity: int = 1024):
+        size = 1
+        while size < capacity:
+            size *= 2
+        self.keys: Any = array("Q", [0]) * size
+        self.ids: Any = array("i", [EMPTY]) * size
+        self.count = 0
+        self.frozen = False
+        self._mmap: Optional[mmap.mmap] = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def capacity(self) -> int:
+        return len(self.ids)
+
+    def _slot(self, key: int) -> int:
+        keys, ids = self.keys, self.ids
+        mask = len(ids) - 1
+        slot = key & mask
+        while ids[slot] != EMPTY and keys[slot] != key:
+            slot = (slot + 1) & mask
+        return slot
+
+    def get(self, user: str) -> Optional[int]:
+        user_id = self.ids[self._slot(key_of(user))]
+        return None if user_id == EMPTY else user_id
+
+    def intern(self, user: str) -> int:
+        """
+        Id of a user, a new one the first time it is seen
+        """
+        key = key_of(user)
+        slot = self._slot(key)
+        user_id = self.ids[slot]
+        if user_id != EMPTY:
+            return user_id
+
+        if self.frozen:
+            raise DataError("User is not in the id dictionary", user)
+
+        user_id = self.count
+        self.keys[slot] = key
+        self.ids[slot] = user_id
+        self.count += 1
+        if self.count > MAX_LOAD * len(self.ids):
+            self._grow()
+        return user_id
+
+    def _grow(self) -> None:
+        keys, ids = self.keys, self.ids
+        self.keys = array("Q", [0]) * (2 * len(ids))
+        self.ids = array("i", [EMPTY]) * (2 * len(ids))
+        for key, user_id in zip(keys, ids):
+            if user_id != EMPTY:
+                slot = self._slot(key)
+                self.keys[slot] = key
+                self.ids[slot] = user_id
+
+    def save(self, path: str) -> None:
+        """
+        Writes the table to `path` (through a temporary file, so readers never see a
+        partial dictionary)
+        """
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.capacity, self.count))
+            f.write(b"\0" * (HEADER_SIZE - HEADER.size))
+            f.write(memoryview(self.keys).cast("B"))
+            f.write(memoryview(self.ids).cast("B"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, *, frozen: bool = True) -> "IdDictionary":
+        with open(path, "rb") as f:
+            magic, version, capacity, count = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise DataError("File is not an id dictionary", path)
+            if version != VERSION:
+                raise DataError("Unsupported id dictionary version", str(version))
+            if capacity & (capacity - 1) or os.fstat(f.fileno()).st_size != (
+                HEADER_SIZE + capacity * 12
+            ):
+                raise DataError("Truncated id dictionary", path)
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        ids = cls(1)
+        ids._mmap = data
+        view = memoryview(data)
+        ids.keys = view[HEADER_SIZE : HEADER_SIZE + capacity * 8].cast("Q")
+        ids.ids = view[HEADER_SIZE + capacity * 8 :].cast("i")
+        ids.count = count
+        ids.frozen = True
+
+        if not frozen:
+            keys, table = array("Q"), array("i")
+            keys.frombytes(ids.keys.cast("B"))
+            table.frombytes(ids.ids.cast("B"))
+            ids.keys, ids.ids, ids._mmap = keys, table, None
+            ids.frozen = False
+        return ids
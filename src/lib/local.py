@@ -0,0 +1,330 @@
+import os
+import zlib
+import heapq
+import tempfile
+import multiprocessing
+from contextlib import ExitStack
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.exceptions.data import DataError
+from src.lib.aggregate import SpillingUserAggregator
+from src.lib.binary import (
+    BinaryFileSink,
+    BinarySink,
+    read_file,
+    read_record_range,
+    split_records,
+)
+from src.lib.metrics import Metrics
+from src.lib.output import Sink
+from src.lib.pipeline import Flow, map_stage, reduce_stage, run_pipeline
+from src.lib.profiling import ProfileConfig, profiled
+from src.lib.sort import SORT_MEMORY, record_key
+from src.mappers.abstracts import Mapper
+from src.reducers.abstracts import BaseReducer
+
+# mapper, reducer and combiner factories (classes or partials, they must pickle)
+FlowTypes = Tuple[
+    Callable[[], Mapper], Callable[[], BaseReducer], Optional[Callable[[], BaseReducer]]
+]
+
+
+def split_ranges(path: str, parts: int) -> List[Tuple[int, int]]:
+    """
+    Splits a file in (at most) `parts` byte ranges, every range starting on a new line
+    """
+    size = os.path.getsize(path)
+    bounds = [0]
+
+    with open(path, "rb") as f:
+        for i in range(1, parts):
+            offset = max(size * i // parts, bounds[-1])
+            if offset == 0:
+                continue
+            # the first line starting at or after offset
+            f.seek(offset - 1)
+            f.readline()
+            bounds.append(min(f.tell(), size))
+
+    bounds.append(size)
+
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def read_range(path: str, start: int, end: int) -> Iterator[str]:
+    """
+    Yields the stripped, non empty lines starting inside [start, end)
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        position = start
+        while position < end:
+            line = f.readline()
+            if not line:
+                return
+            position += len(line)
+            text = line.decode().strip()
+            if text:
+                yield text
+
+
+def build_flows(
+    flow_types: Sequence[FlowTypes],
+) -> Tuple[List[Flow], List[Optional[BaseReducer]]]:
+    flows: List[Flow] = [(mapper(), reducer()) for mapper, reducer, _ in flow_types]
+    combiners = [combiner() if combiner else None for _, _, combiner in flow_types]
+    return flows, combiners
+
+
+def map_task(
+    path: str,
+    start: int,
+    end: int,
+    flow_types: Sequence[FlowTypes],
+    folder: str,
+    index: int,
+    partitions: int,
+    profile: Optional[ProfileConfig] = None,
+    input_format: str = "text",
+    metered: bool = False,
+) -> Dict[str, int]:
+    """
+    Maps (and combines) a byte range of the input, hash partitioning the output by key.
+    Returns the counters of the range: the lines (or binary records) read as "input",
+    and when `metered` the ones the mapper dropped as "skipped".
+    """
+    with profiled(profile, f"map-{index}"):
+        return map_range(
+            path,
+            start,
+            end,
+            flow_types,
+            folder,
+            index,
+            partitions,
+            input_format,
+            metered,
+        )
+
+
+def partition_of(key: Any, partitions: int) -> int:
+    """
+    Partition of a key, the same in every process: the hash of a str (or bytes) is
+    salted per interpreter unless PYTHONHASHSEED is set, so they go through crc32
+    """
+    if isinstance(key, int):
+        return key % partitions
+    if isinstance(key, str):
+        key = key.encode()
+    elif not isinstance(key, bytes):
+        key = repr(key).encode()
+    return zlib.crc32(key) % partitions
+
+
+def map_range(
+    path: str,
+    start: int,
+    end: int,
+    flow_types: Sequence[FlowTypes],
+    folder: str,
+    index: int,
+    partitions: int,
+    input_format: str = "text",
+    metered: bool = False,
+) -> Dict[str, int]:
+    flows, combiners = build_flows(flow_types[:1])
+    mapper, _ = flows[0]
+    combiner = combiners[0]
+
+    with ExitStack() as stack:
+        sinks: List[BinarySink] = []
+        for partition in range(partitions):
+            sink = BinaryFileSink(os.path.join(folder, f"map-{index}-{partition}.bin"))
+            stack.callback(sink.close)
+            stack.enter_context(sink.buffered())
+            sinks.append(sink)
+
+        read = 0
+        binary = input_format == "binary"
+
+        def lines() -> Iterator[Any]:
+            nonlocal read
+            items = (read_record_range if binary else read_range)(path, start, end)
+            for read, line in enumerate(items, 1):
+                yield line
+
+        metrics = Metrics(f"map-{index}") if metered else None
+        stage = partial(map_stage, mapper, lines=not binary)
+        records = (
+            stage(lines()) if metrics is None else metrics.skipping(lines(), stage)
+        )
+        if combiner is not None:
+            records = combiner.process(records)
+        for record in records:
+            sinks[partition_of(mapper.key(record), partitions)].write_record(record)
+
+    return {"input": read, "skipped": metrics.counters["skipped"] if metrics else 0}
+
+
+def reduce_task(
+    flow_types: Sequence[FlowTypes],
+    folder: str,
+    maps: int,
+    partition: int,
+    partitions: int,
+    memory: int,
+    profile: Optional[ProfileConfig] = None,
+    metered: bool = False,
+) -> Tuple[str, int]:
+    """
+    Reduces one partition and runs the rest of the flows over it, returns the output
+    path and (when `metered`) the number of records the stages dropped
+    """
+    with profiled(profile, f"reduce-{partition}"):
+        return reduce_partition(
+            flow_types, folder, maps, partition, partitions, memory, metered
+        )
+
+
+def reduce_partition(
+    flow_types: Sequence[FlowTypes],
+    folder: str,
+    maps: int,
+    partition: int,
+    partitions: int,
+    memory: int,
+    metered: bool = False,
+) -> Tuple[str, int]:
+    flows, combiners = build_flows(flow_types)
+    mapper, reducer = flows[0]
+    metrics = Metrics(f"reduce-{partition}") if metered else None
+    reducer.metrics = metrics
+
+    aggregator = getattr(reducer, "aggregator", None)
+    if isinstance(aggregator, SpillingUserAggregator):
+        # the user_ids of this partition are all `partition` modulo `partitions` (see
+        # partition_of), the hash aggregation only allocates a slot for each of them
+        aggregator.stride, aggregator.residue = partitions, partition
+
+    def parsed() -> Iterator[Any]:
+        for index in range(maps):
+            yield from read_file(os.path.join(folder, f"map-{index}-{partition}.bin"))
+
+    records = reduce_stage(
+        mapper,
+        reducer,
+        parsed(),
+        memory=memory,
+        folder=folder,
+    )
+    if len(flows) > 1:
+        records = run_pipeline(
+            flows[1:],
+            records,
+            combiners=combiners[1:],
+            parsed=True,
+            memory=memory,
+            folder=folder,
+            metrics=metrics,
+        )
+
+    output = os.path.join(folder, f"reduce-{partition}.bin")
+    sink = BinaryFileSink(output)
+    with sink.buffered():
+        for record in records:
+            sink.write_record(record)
+    sink.close()
+
+    return output, metrics.counters["skipped"] if metrics else 0
+
+
+def run_local(
+    path: str,
+    flow_types: Sequence[FlowTypes],
+    sink: Sink,
+    *,
+    workers: int = 1,
+    memory: int = SORT_MEMORY,
+    folder: Optional[str] = None,
+    metrics: Optional[Metrics] = None,
+    profile: Optional[ProfileConfig] = None,
+    input_format: str = "text",
+) -> None:
+    """
+    Runs the flows over a file using a pool of `workers` processes.
+
+    The file is split in byte ranges aligned on new lines (or on whole records when
+    `input_format` is "binary", see src/lib/binary.py), every range is mapped in
+    its own process and the output is hash partitioned by key. Then every partition is
+    shuffled, reduced and passed through the rest of the flows in parallel, which
+    assumes the following flows keep the key of the first one (as the user ->
+    quantity chain does). Partition outputs are merged by key, so the result is the
+    same as running the pipeline in a single process. `memory` is the sort budget of
+    every reduce process and `folder` where temporary files go. `metrics` counts the
+    lines read, the records the workers dropped or failed on and the merged records,
+    `profile` profiles every task on its own.
+    """
+    metered = metrics is not None
+    if input_format == "binary":
+        ranges = split_records(path, workers)
+    else:
+        ranges = split_ranges(path, workers)
+
+    with tempfile.TemporaryDirectory(prefix="local-", dir=folder) as tmp:
+        with multiprocessing.Pool(workers) as pool:
+            try:
+                mapped = pool.starmap(
+                    map_task,
+                    [
+                        (
+                            path,
+                            start,
+                            end,
+                            flow_types,
+                            tmp,
+                            index,
+                            workers,
+                            profile,
+                            input_format,
+                            metered,
+                        )
+                        for index, (start, end) in enumerate(ranges)
+                    ],
+                )
+                reduced = pool.starmap(
+                    reduce_task,
+                    [
+                        (
+                            flow_types,
+                            tmp,
+                            len(ranges),
+                            partition,
+                            workers,
+                            memory,
+                            profile,
+                            metered,
+                        )
+                        for partition in range(workers)
+                    ],
+                )
+            except (DataError, ValueError):
+                # raised by a worker, see DataError.__reduce__
+                if metrics is not None:
+                    metrics.count("errored")
+                raise
+
+        outputs = [output for output, _ in reduced]
+        last = flow_types[-1][1]()
+        merged: Iterator[Any] = heapq.merge(
+            *(read_file(output) for output in outputs), key=record_key
+        )
+        if metrics is not None:
+            for counters in mapped:
+                metrics.count("input", counters["input"])
+                metrics.count("skipped", counters["skipped"])
+            metrics.count("skipped", sum(skipped for _, skipped in reduced))
+            merged = metrics.iterate(merged, "emitted")
+        with sink.buffered():
+            for record in merged:
+                sink.write_record(record, last.format_record)
@@ -0,0 +1,257 @@
+import sys
+import json
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, TextIO, Union
+
+from src.exceptions.data import DataError
+
+COUNTERS = ("input", "emitted", "skipped", "errored")
+PHASES = ("parse", "compute", "emit")
+
+# seconds between two reports, Hadoop kills tasks silent for 10 minutes by default
+REPORT_INTERVAL: float = 10.0
+
+# records processed between two looks at the clock
+REPORT_EVERY: int = 4096
+
+
+class Metrics:
+    """
+    Record counters and phase timings of a stage, reported to stderr.
+
+    With the "hadoop" format the counters are written as Hadoop Streaming
+    `reporter:counter:` lines (the increments since the previous report) every
+    `interval` seconds and on `close`, timings in milliseconds. With "json" a single
+    summary object is written on `close`.
+    """
+
+    def __init__(
+        self,
+        stage: str,
+        *,
+        format: str = "json",
+        interval: float = REPORT_INTERVAL,
+        stream: Union[TextIO, None] = None,
+    ):
+        if format not in ("hadoop", "json"):
+            raise ValueError(f"Unknown metrics format {format}")
+
+        self.stage = stage
+        self.format = format
+        self.interval = interval
+        self._stream = stream
+        self.counters: Dict[str, int] = dict.fromkeys(COUNTERS, 0)
+        self.seconds: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.started = perf_counter()
+        self._next_report = self.started + interval
+        self._reported: Dict[str, int] = {}
+        # time spent in the innermost `iterate` calls, see there
+        self._inner = 0.0
+
+    @property
+    def stream(self) -> TextIO:
+        return self._stream if self._stream is not None else sys.stderr
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def tick(self) -> None:
+        """
+        Reports when `interval` seconds passed since the previous report
+        """
+        if self.format == "hadoop" and perf_counter() >= self._next_report:
+            self.report()
+
+    def summary(self) -> Dict[str, Any]:
+        total = perf_counter() - self.started
+        return {
+            "stage": self.stage,
+            "counters": dict(self.counters),
+            "seconds": {
+                **{name: round(value, 6) for name, value in self.seconds.items()},
+                "total": round(total, 6),
+            },
+            "records_per_sec": round(self.counters["input"] / total, 1) if total else 0,
+        }
+
+    def report(self) -> None:
+        values = dict(self.counters)
+        values.update(
+            {f"{name}_ms": int(value * 1000) for name, value in self.seconds.items()}
+        )
+
+        lines = []
+        for name, value in values.items():
+            increment = value - self._reported.get(name, 0)
+            if increment:
+                lines.append(f"reporter:counter:{self.stage},{name},{increment}\n")
+            self._reported[name] = value
+        lines.append(
+            f"reporter:status:{self.stage} {self.counters['input']} records read\n"
+        )
+
+        self.stream.write("".join(lines))
+        self.stream.flush()
+        self._next_report = perf_counter() + self.interval
+
+    def close(self) -> None:
+        if self.format == "hadoop":
+            self.report()
+            return
+
+        self.stream.write(json.dumps(self.summary()) + "\n")
+        self.stream.flush()
+
+    def iterate(self, items: Iterable[Any], name: str) -> Iterator[Any]:
+        """
+        Yields the items counting them as `name`, the time spent producing them is
+        added to the `name` timing.
+
+        When the items come from other iterated items (chained stages), the time of
+        those is only added to their own timing, so every stage gets its own share.
+        """
+        clock = perf_counter
+        counters, seconds = self.counters, self.seconds
+        counters.setdefault(name, 0)
+        seconds.setdefault(name, 0.0)
+
+        iterator = iter(items)
+        while True:
+            outer, self._inner = self._inner, 0.0
+            start = clock()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                item = StopIteration
+            elapsed = clock() - start
+            seconds[name] += elapsed - self._inner
+            self._inner = outer + elapsed
+
+            if item is StopIteration:
+                return
+            counters[name] += 1
+            if not counters[name] % REPORT_EVERY:
+                self.tick()
+            yield item
+
+    def skipping(
+        self, items: Iterable[Any], stage: Callable[[Iterable[Any]], Iterable[Any]]
+    ) -> Iterator[Any]:
+        """
+        Yields what `stage` makes of the items, counting the items it yields nothing
+        for as skipped. The stage must map an item at a time (a mapper, not a
+        combiner): of the items read since its previous result, all but the last had
+        none.
+        """
+        read = 0
+
+        def counted() -> Iterator[Any]:
+            nonlocal read
+            for read, item in enumerate(items, 1):
+                yield item
+
+        seen = 0
+        for result in stage(counted()):
+            if read > seen:
+                self.counters["skipped"] += read - seen - 1
+                seen = read
+            yield result
+
+        self.counters["skipped"] += read - seen
+
+    def skip_empty(self, results: Iterable[Any]) -> Iterator[Any]:
+        """
+        Yields the results of an item, counting it as skipped when there are none
+        """
+        empty = True
+        for result in results:
+            empty = False
+            yield result
+
+        if empty:
+            self.counters["skipped"] += 1
+
+    def erroring(self, items: Iterable[Any]) -> Iterator[Any]:
+        """
+        Yields the items, counting an error of the data raised while producing them
+        (DataError or ValueError, like `metered_read`)
+        """
+        try:
+            yield from items
+        except (DataError, ValueError):
+            self.counters["errored"] += 1
+            raise
+
+
+def metered_read(
+    metrics: Metrics,
+    items: Iterable[Any],
+    *,
+    parse: Union[Callable[[Any], Any], None],
+    compute: Callable[[Any], Iterable[Any]],
+    emit: Callable[[Any], None],
+    skips: bool = True,
+) -> None:
+    """
+    The read loop of a stage, counting and timing every record.
+
+    Items are parsed with `parse` (unless already records), turned into results with
+    `compute` and written with `emit`. With `skips` an item without results (or parsed
+    to None) counts as skipped. Errors of the data (DataError and ValueError) are
+    counted and raised.
+    """
+    clock = perf_counter
+    counters, seconds = metrics.counters, metrics.seconds
+
+    for item in items:
+        start = clock()
+        counters["input"] += 1
+
+        try:
+            record = item if parse is None else parse(item)
+            parsed = clock()
+            results = list(compute(record)) if record is not None else []
+        except (DataError, ValueError):
+            # int() of a malformed field raises a ValueError
+            counters["errored"] += 1
+            raise
+        computed = clock()
+
+        for result in results:
+            emit(result)
+        emitted = clock()
+
+        seconds["parse"] += parsed - start
+        seconds["compute"] += computed - parsed
+        seconds["emit"] += emitted - computed
+        counters["emitted"] += len(results)
+        if skips and not results:
+            counters["skipped"] += 1
+
+        if not counters["input"] % REPORT_EVERY:
+            metrics.tick()
+
+
+def metered_finish(
+    metrics: Metrics, results: Iterable[Any], emit: Callable[[Any], None]
+) -> None:
+    """
+    Emits what a stage yields once its input ends, counting and timing it
+    """
+    clock = perf_counter
+    counters, seconds = metrics.counters, metrics.seconds
+
+    iterator = iter(results)
+    while True:
+        start = clock()
+        try:
+            result = next(iterator)
+        except StopIteration:
+            seconds["compute"] += clock() - start
+            return
+        computed = clock()
+        emit(result)
+
+        seconds["compute"] += computed - start
+        seconds["emit"] += clock() - computed
+        counters["emitted"] += 1
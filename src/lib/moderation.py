@@ -0,0 +1,158 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.lib.columnar import ColumnarData, write_columns
+from src.schemas.data import ModerationRect
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# columns of a saved index, one row per rectangle in time order
+COLUMNS: Dict[str, str] = {
+    "time": "<i8",
+    "x1": "<i2",
+    "y1": "<i2",
+    "x2": "<i2",
+    "y2": "<i2",
+    "color": "<i1",
+}
+
+
+class SegmentTree:
+    """
+    Rows of intervals [start, end] (inclusive) found by the points they contain.
+
+    Interval ends cut the axis into elementary segments, the leaves of a tree, and each
+    interval is stored in the O(log n) nodes that cover it exactly, so the intervals
+    containing a point are in the nodes from its leaf to the root. Rows are added in
+    increasing order, so the rows of a node stay sorted.
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[int, int, Any]]):
+        intervals = list(intervals)
+        self.bounds: List[int] = sorted(
+            {start for start, _, _ in intervals} | {end + 1 for _, end, _ in intervals}
+        )
+        self.size = 1
+        while self.size < len(self.bounds):
+            self.size *= 2
+        self.nodes: Dict[int, List[Any]] = {}
+
+        for start, end, row in intervals:
+            low = bisect_left(self.bounds, start) + self.size
+            high = bisect_left(self.bounds, end + 1) + self.size
+            while low < high:
+                if low & 1:
+                    self.nodes.setdefault(low, []).append(row)
+                    low += 1
+                if high & 1:
+                    high -= 1
+                    self.nodes.setdefault(high, []).append(row)
+                low //= 2
+                high //= 2
+
+    def path(self, point: int) -> Iterator[int]:
+        """
+        Nodes holding the intervals that contain `point`
+        """
+        leaf = bisect_right(self.bounds, point) - 1
+        if leaf < 0 or leaf >= len(self.bounds) - 1:
+            return
+        node = leaf + self.size
+        while node:
+            if node in self.nodes:
+                yield node
+            node //= 2
+
+
+class ModerationIndex:
+    """
+    Rectangles of the moderation tool, in time order, indexed by the pixels they cover.
+
+    Expanding them to one row per pixel would add millions of rows, so they are kept as
+    columns (one row per rectangle) and found with a segment tree over x whose nodes
+    are segment trees over y of the row numbers, sorted like time. The latest rectangle
+    over a pixel at a time is then a binary search in each of the O(log² n) nodes on the
+    way, `covering` runs in O(log³ n) for n rectangles and no pixel is materialized.
+    """
+
+    def __init__(self, rectangles: Iterable[ModerationRect]):
+        # stable, the later of two rectangles of the same millisecond paints last
+        ordered = sorted(rectangles, key=lambda rect: rect.timestamp)
+        self.times = array("q", [rect.timestamp for rect in ordered])
+        self.x1 = array("h", [rect.x1 for rect in ordered])
+        self.y1 = array("h", [rect.y1 for rect in ordered])
+        self.x2 = array("h", [rect.x2 for rect in ordered])
+        self.y2 = array("h", [rect.y2 for rect in ordered])
+        self.colors = array("b", [rect.color for rect in ordered])
+
+        self.x_tree = SegmentTree(
+            (rect.x1, rect.x2, row) for row, rect in enumerate(ordered)
+        )
+        self.y_trees: Dict[int, SegmentTree] = {
+            node: SegmentTree((self.y1[row], self.y2[row], row) for row in rows)
+            for node, rows in self.x_tree.nodes.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __getitem__(self, row: int) -> ModerationRect:
+        return ModerationRect(
+            self.times[row],
+            self.x1[row],
+            self.y1[row],
+            self.x2[row],
+            self.y2[row],
+            self.colors[row],
+        )
+
+    def covering(self, x: int, y: int, timestamp: int) -> Optional[ModerationRect]:
+        """
+        Latest rectangle over (x, y) applied at or before `timestamp`, if any
+        """
+        # rows are in time order, so the latest is the highest row up to this one
+        last = bisect_right(self.times, timestamp) - 1
+        best = -1
+        for node in self.x_tree.path(x):
+            y_tree = self.y_trees[node]
+            for rows in map(y_tree.nodes.__getitem__, y_tree.path(y)):
+                found = bisect_right(rows, last) - 1
+                if found >= 0 and rows[found] > best:
+                    best = rows[found]
+        return self[best] if best >= 0 else None
+
+    def overwritten(self, x: int, y: int, since: int, until: int) -> bool:
+        """
+        Whether a rectangle painted over (x, y) after `since` and up to `until`, e.g.
+        between a placement and the time the pixel is looked at
+        """
+        rect = self.covering(x, y, until)
+        return rect is not None and rect.timestamp > since
+
+    def between(self, start: int, end: int) -> Iterator[ModerationRect]:
+        """
+        Rectangles applied from `start` (inclusive) to `end` (exclusive), in time order
+        """
+        for row in range(bisect_left(self.times, start), bisect_left(self.times, end)):
+            yield self[row]
+
+    def save(self, folder: str) -> None:
+        """
+        Writes the rectangles as a columnar cache, the tree is rebuilt on load
+        """
+        import numpy as np
+
+        values = (self.times, self.x1, self.y1, self.x2, self.y2, self.colors)
+        arrays: Dict[str, "np.ndarray"] = {
+            name: np.frombuffer(column, dtype=column.typecode).astype(COLUMNS[name])
+            for name, column in zip(COLUMNS, values)
+        }
+        write_columns(folder, arrays)
+
+    @classmethod
+    def load(cls, folder: str) -> "ModerationIndex":
+        data = ColumnarData(folder)
+        values = [data.column(name).tolist() for name in COLUMNS]
+        return cls(ModerationRect(*row) for row in zip(*values))
@@ -0,0 +1,99 @@
+import sys
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, TextIO, Union
+
+
+class Sink:
+    """
+    Collects formatted lines and writes them in large batches.
+
+    Outside of `buffered()` every line is written right away (like print does), inside
+    it lines are joined and written every `buffer_size` lines and once more on exit.
+    When no stream is given, sys.stdout is looked up on every write, so it can be
+    replaced (or patched in tests) after the sink was created.
+    """
+
+    buffer_size: int = 8192
+
+    # whether records are written packed instead of formatted as text
+    binary: bool = False
+
+    def __init__(
+        self,
+        stream: Union[TextIO, None] = None,
+        *,
+        buffer_size: Union[int, None] = None
+    ):
+        self._stream = stream
+        self._lines: List[str] = []
+        self._buffering = False
+        if buffer_size is not None:
+            self.buffer_size = buffer_size
+
+    @property
+    def stream(self) -> TextIO:
+        return self._stream if self._stream is not None else sys.stdout
+
+    def write(self, line: str) -> None:
+        lines = self._lines
+        lines.append(line)
+        if not self._buffering or len(lines) >= self.buffer_size:
+            self.flush()
+
+    def write_record(self, record: Any, format: Callable[[Any], str]) -> None:
+        self.write(format(record))
+
+    def flush(self) -> None:
+        if not self._lines:
+            return
+        self.stream.write("\n".join(self._lines) + "\n")
+        self._lines = []
+
+    def sync(self) -> None:
+        """
+        Flushes the underlying stream too, called when a buffered block ends
+        """
+        self.stream.flush()
+
+    def close(self) -> None:
+        self.flush()
+
+    @contextmanager
+    def buffered(self) -> Iterator["Sink"]:
+        previous, self._buffering = self._buffering, True
+        try:
+            yield self
+        finally:
+            self._buffering = previous
+            self.flush()
+            self.sync()
+
+
+class FileSink(Sink):
+    """
+    Sink writing to a file, the file is truncated when the sink is created
+    """
+
+    def __init__(self, path: str, *, buffer_size: Union[int, None] = None):
+        super().__init__(open(path, "w"), buffer_size=buffer_size)
+
+    def close(self) -> None:
+        super().close()
+        self.stream.close()
+
+
+class ListSink(Sink):
+    """
+    Sink keeping every line in memory, mostly useful for tests
+    """
+
+    def __init__(self, *, buffer_size: Union[int, None] = None):
+        super().__init__(buffer_size=buffer_size)
+        self.lines: List[str] = []
+
+    def flush(self) -> None:
+        self.lines.extend(self._lines)
+        self._lines = []
+
+    def sync(self) -> None:
+        pass
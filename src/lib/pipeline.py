@@ -0,0 +1,147 @@
+from functools import partial
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from src.mappers.abstracts import Mapper
+from src.reducers.abstracts import BaseReducer
+from src.lib.metrics import Metrics
+from src.lib.sort import RECORD_SIZE, SORT_MEMORY, external_sort
+
+Flow = Tuple[Mapper, BaseReducer]
+
+
+def shuffle(
+    records: Iterable[Any],
+    *,
+    key: Callable[[Any], int],
+    memory: int = SORT_MEMORY,
+    folder: Optional[str] = None,
+) -> Iterator[Any]:
+    """
+    Groups records by the numeric value of their key with an external merge sort.
+
+    Runs that do not fit in `memory` are spilled with the binary framing, so records
+    never go back to text between stages.
+    """
+    return external_sort(
+        records,
+        key=key,
+        memory=memory,
+        folder=folder,
+        dump=None,
+        load=None,
+        sizeof=lambda _: RECORD_SIZE,
+    )
+
+
+def map_stage(
+    mapper: Mapper,
+    records: Iterable[Any],
+    *,
+    combiner: Optional[BaseReducer] = None,
+    lines: bool = False,
+    columns: bool = False,
+) -> Iterator[Any]:
+    """
+    Maps (and combines, when there is a combiner) the records, or raw lines when `lines`
+    or the rows of a columnar cache when `columns`
+    """
+    if columns:
+        mapped = mapper.process_columns(records)  # type: ignore[arg-type]
+    elif lines:
+        mapped = mapper.process_lines(records)
+    else:
+        mapped = mapper.process(records)
+
+    if combiner is not None:
+        return combiner.process(mapped)
+
+    return mapped
+
+
+def reduce_stage(
+    mapper: Mapper,
+    reducer: BaseReducer,
+    records: Iterable[Any],
+    *,
+    memory: int = SORT_MEMORY,
+    folder: Optional[str] = None,
+) -> Iterator[Any]:
+    """
+    Shuffles the mapped records when the reducer needs grouped input and reduces them,
+    sorted by the `sort_key` of the mapper
+    """
+    if reducer.grouped:
+        records = shuffle(
+            records,
+            key=mapper.sort_key,
+            memory=memory,
+            folder=folder,
+        )
+
+    return reducer.process(records)
+
+
+def run_pipeline(
+    flows: List[Flow],
+    lines: Iterable[str],
+    *,
+    combiners: Sequence[Optional[BaseReducer]] = (),
+    parsed: bool = False,
+    columns: bool = False,
+    memory: int = SORT_MEMORY,
+    folder: Optional[str] = None,
+    metrics: Optional[Metrics] = None,
+) -> Iterator[Any]:
+    """
+    Runs a chain of flows in a single process, passing typed records between stages.
+
+    Each flow maps the output of the previous one (or the raw lines for the first one),
+    shuffles it when its reducer needs grouped input and reduces it. The records of the
+    last reducer are yielded, use its `format_record` to get the text output.
+
+    `combiners` is aligned with `flows`, when a flow has one it runs right after the
+    mapper so the shuffle only sees pre-aggregated records. With `parsed` the input is
+    already made of records for the first mapper instead of lines, with `columns` it is
+    a ColumnarData (see src/lib/columnar.py). `memory` and
+    `folder` configure the external sort used by the shuffle.
+
+    With `metrics` the input, the output of every mapper, combiner and reducer (by
+    class name) and the records yielded are counted, with the time spent producing them.
+    The records a mapper or a filtering reducer drops count as skipped and an error of
+    the data as errored, like in a single stage. A columnar cache is then read a row
+    at a time, so its mod rows are counted too.
+    """
+    records: Iterable[Any] = lines
+    if metrics is not None:
+        if columns:
+            records = flows[0][0].column_records(records)  # type: ignore[attr-defined]
+            parsed, columns = True, False
+        records = metrics.iterate(records, "input")
+
+    for i, (mapper, reducer) in enumerate(flows):
+        combiner = combiners[i] if i < len(combiners) else None
+        stage = partial(
+            map_stage,
+            mapper,
+            lines=(i == 0 and not parsed),
+            columns=(i == 0 and columns),
+        )
+        if metrics is not None:
+            records = metrics.iterate(
+                metrics.skipping(records, stage), type(mapper).__name__
+            )
+            reducer.metrics = metrics
+        else:
+            records = stage(records)
+        if combiner is not None:
+            records = combiner.process(records)
+            if metrics is not None:
+                records = metrics.iterate(records, type(combiner).__name__)
+        records = reduce_stage(mapper, reducer, records, memory=memory, folder=folder)
+        if metrics is not None:
+            records = metrics.iterate(records, type(reducer).__name__)
+
+    if metrics is not None:
+        records = metrics.iterate(metrics.erroring(records), "emitted")
+
+    return iter(records)
@@ -0,0 +1,108 @@
+import os
+import sys
+import signal
+import cProfile
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from types import CodeType, FrameType
+from typing import Any, Iterator, Optional, Tuple
+
+PROFILERS = ("sampling", "cprofile")
+
+# seconds of cpu time between two samples
+SAMPLE_INTERVAL: float = 0.005
+
+
+@dataclass(frozen=True)
+class ProfileConfig:
+    """
+    Profiler to use and folder of its files, it pickles so pool workers get it too
+    """
+
+    mode: str = "sampling"
+    folder: str = "."
+    interval: float = SAMPLE_INTERVAL
+
+    def path(self, name: str) -> str:
+        extension = "prof" if self.mode == "cprofile" else "collapsed"
+        return os.path.join(self.folder, f"{name}-{os.getpid()}.{extension}")
+
+
+def label(code: CodeType) -> str:
+    return (
+        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    )
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of the main thread every `interval` seconds of cpu time.
+
+    It uses SIGPROF, so it only works on unix and has to be started from the main
+    thread. The samples are written as collapsed stacks, one `frame;frame;... count`
+    line per stack, the input of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples: "Counter[Tuple[CodeType, ...]]" = Counter()
+        self._previous: Any = None
+
+    def _sample(self, signum: int, frame: Optional[FrameType]) -> None:
+        stack = []
+        while frame is not None:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+        self.samples[tuple(stack)] += 1
+
+    def start(self) -> None:
+        self._previous = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self) -> None:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous)
+
+    def collapsed(self) -> Iterator[str]:
+        for stack, count in self.samples.most_common():
+            yield ";".join(label(code) for code in reversed(stack)) + f" {count}"
+
+    def write(self, path: str) -> None:
+        with open(path, "w") as f:
+            f.write("".join(line + "\n" for line in self.collapsed()))
+
+
+@contextmanager
+def profiled(config: Optional[ProfileConfig], name: str) -> Iterator[None]:
+    """
+    Profiles the block into `config.folder`, in a file named after `name` and the pid.
+
+    cprofile writes pstats files, sampling collapsed stacks. Nothing is written to
+    stdout, the path of the file goes to stderr. Without a config it does nothing.
+    """
+    if config is None:
+        yield
+        return
+
+    os.makedirs(config.folder, exist_ok=True)
+    path = config.path(name)
+
+    if config.mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+    else:
+        sampler = SamplingProfiler(config.interval)
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            sampler.write(path)
+
+    print(f"profile written to {path}", file=sys.stderr)
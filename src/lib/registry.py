@@ -0,0 +1,112 @@
+import os
+from importlib import import_module
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+# comma separated modules imported before looking up a flow, they can register more
+PLUGINS_VARIABLE: str = "MDP_FLOWS"
+
+
+@dataclass(frozen=True)
+class FlowPaths:
+    """
+    Import paths (`module:attribute`) of the stages of a flow, resolved on first use.
+
+    `unsorted` marks reducers taking the `unsorted`, `memory` and `folder` keyword
+    arguments, the ones able to hash aggregate an unsorted input. `ids` marks mappers
+    taking the path of a user id dictionary as `ids` (see src/lib/ids.py).
+    """
+
+    mapper: str
+    reducer: str
+    combiner: Optional[str] = None
+    unsorted: bool = False
+    ids: bool = False
+
+
+FLOWS: Dict[str, FlowPaths] = {
+    "user": FlowPaths(
+        "src.mappers.user:UserMapper",
+        "src.reducers.user:UserReducer",
+        combiner="src.combiners.user:UserCombiner",
+        unsorted=True,
+    ),
+    # the user flow over the original export, with hashed user ids
+    "raw": FlowPaths(
+        "src.mappers.raw:RawPlacementMapper",
+        "src.reducers.user:UserReducer",
+        combiner="src.combiners.user:UserCombiner",
+        unsorted=True,
+        ids=True,
+    ),
+    # the user flow with every timeline in order, see TimelineMapper
+    "timeline": FlowPaths(
+        "src.mappers.timeline:TimelineMapper", "src.reducers.timeline:TimelineReducer"
+    ),
+    # per user cooldown scores, in place of the user and quantity flows
+    "cooldown": FlowPaths(
+        "src.mappers.timeline:TimelineMapper", "src.reducers.cooldown:CooldownReducer"
+    ),
+    # per user bot detection features, see FeaturesReducer
+    "features": FlowPaths(
+        "src.mappers.features:FeaturesMapper", "src.reducers.features:FeaturesReducer"
+    ),
+    "quantity": FlowPaths(
+        "src.mappers.quantity:QuantityMapper", "src.reducers.quantity:QuantityReducer"
+    ),
+    "sorter": FlowPaths(
+        "src.mappers.sorter:SorterMapper", "src.reducers.sorter:SorterReducer"
+    ),
+}
+
+_plugins_loaded: bool = False
+
+
+def register_flow(
+    name: str,
+    mapper: str,
+    reducer: str,
+    *,
+    combiner: Optional[str] = None,
+    unsorted: bool = False,
+    ids: bool = False,
+) -> None:
+    """
+    Makes a flow available to --mapper, --reducer, --combiner and --pipeline.
+
+    Stages are given as import paths, so registering a flow imports nothing. Modules
+    listed in the MDP_FLOWS environment variable are imported before the lookup of a
+    flow, they can call this to add flows without editing main.py.
+    """
+    FLOWS[name] = FlowPaths(
+        mapper, reducer, combiner=combiner, unsorted=unsorted, ids=ids
+    )
+
+
+def load_plugins() -> None:
+    global _plugins_loaded
+    if _plugins_loaded:
+        return
+    _plugins_loaded = True
+
+    for module in os.environ.get(PLUGINS_VARIABLE, "").split(","):
+        if module.strip():
+            import_module(module.strip())
+
+
+def flow_names() -> List[str]:
+    load_plugins()
+    return list(FLOWS)
+
+
+def get_flow(name: str) -> Optional[FlowPaths]:
+    load_plugins()
+    return FLOWS.get(name)
+
+
+def load(path: str) -> Any:
+    """
+    Imports the attribute of a `module:attribute` path
+    """
+    module, _, attribute = path.partition(":")
+    return getattr(import_module(module), attribute)
@@ -0,0 +1,200 @@
+import os
+import sys
+import heapq
+import tempfile
+from typing import Any, Callable, Iterable, Iterator, List, Tuple, Union
+
+from src.exceptions.data import LineFormatError
+from src.lib.binary import BinaryFileSink, read_file
+from src.schemas.data import Record
+
+# default memory budget for the in memory runs, in bytes
+SORT_MEMORY: int = 256 * 1024 * 1024
+
+# rough size of a small record dataclass (object, __dict__ and its int fields)
+RECORD_SIZE: int = 256
+
+# runs merged at once, more are merged in passes so the open files stay bounded
+MERGE_FAN_IN: int = 64
+
+
+def line_key(line: str) -> int:
+    """
+    Numeric key of a tab separated line, its first field
+    """
+    key = line.split("\t", 1)[0]
+
+    if not key.isdigit():
+        raise LineFormatError("Key should be an integer", line)
+
+    return int(key)
+
+
+def line_keys(fields: int) -> Callable[[str], Tuple[int, ...]]:
+    """
+    Composite key of tab separated lines, the numeric values of their first `fields`
+    fields (for secondary sorts)
+    """
+
+    def key(line: str) -> Tuple[int, ...]:
+        values = line.split("\t", fields)[:fields]
+
+        if len(values) < fields or not all(value.isdigit() for value in values):
+            raise LineFormatError("Key fields should be integers", line)
+
+        return tuple(map(int, values))
+
+    return key
+
+
+def record_key(record: Record) -> int:
+    return record.user_id  # type: ignore[attr-defined]
+
+
+def record_keys(fields: int) -> Callable[[Record], Tuple[int, ...]]:
+    """
+    Composite key of records, the values of their first `fields` fields
+    """
+    return lambda record: record.values()[:fields]
+
+
+def write_run(
+    items: Iterable[Any], *, folder: str, dump: Union[Callable[[Any], str], None]
+) -> str:
+    fd, path = tempfile.mkstemp(prefix="run-", dir=folder)
+
+    if dump is None:
+        os.close(fd)
+        sink = BinaryFileSink(path)
+        with sink.buffered():
+            for item in items:
+                sink.write_record(item)
+        sink.close()
+        return path
+
+    with os.fdopen(fd, "w") as f:
+        f.writelines(dump(item) + "\n" for item in items)
+    return path
+
+
+def read_run(path: str, *, load: Union[Callable[[str], Any], None]) -> Iterator[Any]:
+    if load is None:
+        yield from read_file(path)
+    else:
+        with open(path) as f:
+            for line in f:
+                yield load(line.rstrip("\n"))
+    os.remove(path)
+
+
+def merge_runs(
+    runs: List[str],
+    *,
+    key: Callable[[Any], Any],
+    load: Union[Callable[[str], Any], None],
+) -> Iterator[Any]:
+    """
+    Items of sorted runs in key order, ties in the order of the runs (so merging
+    consecutive runs keeps the sort stable)
+    """
+    return heapq.merge(*(read_run(path, load=load) for path in runs), key=key)
+
+
+def external_sort(
+    items: Iterable[Any],
+    *,
+    key: Callable[[Any], Any],
+    memory: int = SORT_MEMORY,
+    folder: Union[str, None] = None,
+    dump: Union[Callable[[Any], str], None] = str,
+    load: Union[Callable[[str], Any], None] = str,
+    sizeof: Callable[[Any], int] = sys.getsizeof,
+    fan_in: int = MERGE_FAN_IN,
+) -> Iterator[Any]:
+    """
+    Sorts items that may not fit in memory.
+
+    Items are collected until their estimated size (`sizeof`) reaches `memory`, then the
+    run is sorted and written to a temporary file in `folder` with `dump`. The runs are
+    read back with `load` and merged with a heap, `fan_in` at a time: past that many
+    runs, consecutive ones are merged into longer runs first. Without `dump` and `load` the items
+    must be records and the runs use the binary framing. When everything fits in a
+    single run nothing touches the disk. The sort is stable, so equal keys keep their
+    input order.
+    """
+    run: List[Any] = []
+    used = 0
+
+    with tempfile.TemporaryDirectory(prefix="sort-", dir=folder) as tmp:
+        runs: List[str] = []
+
+        for item in items:
+            run.append(item)
+            used += sizeof(item)
+            if used >= memory:
+                run.sort(key=key)
+                runs.append(write_run(run, folder=tmp, dump=dump))
+                run, used = [], 0
+
+        run.sort(key=key)
+
+        if not runs:
+            yield from run
+            return
+
+        if run:
+            runs.append(write_run(run, folder=tmp, dump=dump))
+            run = []
+
+        while len(runs) > fan_in:
+            runs = [
+                write_run(
+                    merge_runs(runs[i : i + fan_in], key=key, load=load),
+                    folder=tmp,
+                    dump=dump,
+                )
+                for i in range(0, len(runs), fan_in)
+            ]
+
+        yield from merge_runs(runs, key=key, load=load)
+
+
+def sort_records(
+    records: Iterable[Record],
+    *,
+    memory: int = SORT_MEMORY,
+    folder: Union[str, None] = None,
+    fields: int = 1,
+) -> Iterator[Record]:
+    """
+    Sorts records by their user_id (or their first `fields` fields), spilling runs in
+    the binary framing
+    """
+    return external_sort(
+        records,
+        key=record_key if fields == 1 else record_keys(fields),
+        memory=memory,
+        folder=folder,
+        dump=None,
+        load=None,
+        sizeof=lambda _: RECORD_SIZE,
+    )
+
+
+def sort_lines(
+    lines: Iterable[str],
+    *,
+    memory: int = SORT_MEMORY,
+    folder: Union[str, None] = None,
+    fields: int = 1,
+) -> Iterator[str]:
+    """
+    Sorts tab separated lines by the numeric value of their first field (or of their
+    first `fields` fields)
+    """
+    return external_sort(
+        lines,
+        key=line_key if fields == 1 else line_keys(fields),
+        memory=memory,
+        folder=folder,
+    )
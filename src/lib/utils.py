@@ -1,20 +1,203 @@
-from typing import List, Union
-from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Sequence, Union
+from datetime import datetime, timezone
+
+from src.exceptions.data import TimestampParseError
+
+if TYPE_CHECKING:
+    import numpy as np
+
+MS_PER_DAY: int = 24 * 60 * 60 * 1000
+
+# days seen by parse_timestamp, the dataset spans a handful of them
+DAY_CACHE_SIZE: int = 4096
+_day_offsets: Dict[str, int] = {}
 
 
 def str2timestamp(date: str, *, format: List[str]) -> int:
     """
-    Converts a datetime string to a timestamp.
+    Converts a UTC datetime string to a timestamp in seconds.
     Must to be a datetime string in the format specified in the format argument. (or list of it)
     """
-    result: Union[int, None] = None
     for f in format:
         try:
-            result = int(datetime.strptime(date, f).timestamp())
+            parsed = datetime.strptime(date, f).replace(tzinfo=timezone.utc)
         except ValueError:
-            pass
+            continue
+        return int(parsed.timestamp())
+
+    raise ValueError(f"Could not convert {date} to timestamp")
+
+
+def days_from_civil(year: Any, month: Any, day: Any) -> Any:
+    """
+    Days since 1970-01-01 of a proleptic gregorian date (works on numpy arrays too)
+    """
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + 12 * (month <= 2) - 3) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def days_in_month(year: Any, month: Any) -> Any:
+    """
+    Days of a month from 1 to 12, without branches so it works on numpy arrays too
+    """
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    return 30 + (month + month // 8) % 2 - (month == 2) * (2 - leap)
+
+
+def valid_date(year: Any, month: Any, day: Any) -> Any:
+    """
+    Whether the fields are a date of the gregorian calendar (or which are, of arrays)
+    """
+    return (
+        (1 <= month) & (month <= 12) & (1 <= day) & (day <= days_in_month(year, month))
+    )
+
+
+def valid_time(hours: Any, minutes: Any, seconds: Any) -> Any:
+    """
+    Whether the fields are a time of the day (or which are, of arrays)
+    """
+    return (hours <= 23) & (minutes <= 59) & (seconds <= 59)
+
+
+def day_offset(date: str) -> int:
+    """
+    Milliseconds since the epoch of the UTC midnight of a `YYYY-MM-DD` date
+    """
+    offset = _day_offsets.get(date)
+    if offset is not None:
+        return offset
+
+    if not (
+        len(date) == 10
+        and date[4] == date[7] == "-"
+        and (date[:4] + date[5:7] + date[8:]).isdigit()
+    ):
+        raise TimestampParseError("Date should be YYYY-MM-DD", date)
+
+    year, month, day = int(date[:4]), int(date[5:7]), int(date[8:])
+    if not valid_date(year, month, day):
+        raise TimestampParseError("Date out of range", date)
+
+    if len(_day_offsets) >= DAY_CACHE_SIZE:
+        _day_offsets.clear()
+    offset = _day_offsets[date] = days_from_civil(year, month, day) * MS_PER_DAY
+    return offset
+
+
+def parse_timestamp(text: str) -> int:
+    """
+    Milliseconds since the epoch of a `YYYY-MM-DD HH:MM:SS[.fff][ UTC]` UTC timestamp,
+    the format of the r/place dataset.
+
+    The layout is fixed, so fields are sliced instead of going through strptime, and
+    the offset of the day is cached. Anything else raises a TimestampParseError.
+    """
+    if text.endswith(" UTC"):
+        text = text[:-4]
+
+    clock = text[11:19]
+    if not (
+        len(text) >= 19
+        and text[10] in " T"
+        and clock[2] == clock[5] == ":"
+        and (clock[:2] + clock[3:5] + clock[6:]).isdigit()
+    ):
+        raise TimestampParseError("Timestamp should be YYYY-MM-DD HH:MM:SS", text)
+
+    hours, minutes, seconds = int(clock[:2]), int(clock[3:5]), int(clock[6:])
+    if not valid_time(hours, minutes, seconds):
+        raise TimestampParseError("Time out of range", text)
+
+    milliseconds = 0
+    if len(text) > 19:
+        fraction = text[20:]
+        if text[19] != "." or not fraction.isdigit():
+            raise TimestampParseError("Fraction of second should be .fff", text)
+        milliseconds = int(fraction[:3].ljust(3, "0"))
+
+    return (
+        day_offset(text[:10])
+        + hours * 3_600_000
+        + minutes * 60_000
+        + seconds * 1000
+        + milliseconds
+    )
+
+
+def parse_timestamps(texts: Union[Sequence[str], "np.ndarray"]) -> "np.ndarray":
+    """
+    `parse_timestamp` of a whole chunk at once, returns an int64 array.
+
+    The strings are read as a matrix of code points, so every field is computed for
+    all the rows with a few numpy operations, and checked by the same `valid_date`
+    and `valid_time` as a single timestamp. Rows that do not follow the layout or
+    are out of range raise a TimestampParseError.
+    """
+    import numpy as np
+
+    text = np.asarray(texts, dtype=str)
+    if not text.size:
+        return np.zeros(0, dtype=np.int64)
+
+    # zero padded, so the fields past the end of short rows read as missing
+    width = max(text.dtype.itemsize // 4, 20) + 8
+    chars = text.astype(f"U{width}").view(np.uint32).reshape(len(text), width)
+    digits = chars.astype(np.int64) - ord("0")
+    is_digit = (digits >= 0) & (digits <= 9)
+    rows = np.arange(len(text))
+
+    def number(start: int, end: int) -> "np.ndarray":
+        value = np.zeros(len(text), dtype=np.int64)
+        for i in range(start, end):
+            value = value * 10 + digits[:, i]
+        return value
+
+    valid = (
+        is_digit[:, [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]].all(axis=1)
+        & (chars[:, 4] == ord("-"))
+        & (chars[:, 7] == ord("-"))
+        & ((chars[:, 10] == ord(" ")) | (chars[:, 10] == ord("T")))
+        & (chars[:, 13] == ord(":"))
+        & (chars[:, 16] == ord(":"))
+    )
+
+    # the digits after the dot, only the first three count
+    has_fraction = chars[:, 19] == ord(".")
+    fraction = np.cumprod(is_digit[:, 20:], axis=1).sum(axis=1) * has_fraction
+    valid &= ~has_fraction | (fraction > 0)
+    milliseconds = sum(
+        np.where(fraction > i, digits[:, 20 + i], 0) * 10 ** (2 - i) for i in range(3)
+    )
+    end = np.where(has_fraction, 20 + fraction, 19)
+
+    # then nothing, or " UTC" and nothing
+    suffix = chars[rows[:, None], np.minimum(end[:, None] + np.arange(4), width - 1)]
+    utc = (suffix == np.array([ord(c) for c in " UTC"])).all(axis=1)
+    end = np.where(utc, end + 4, end)
+    columns = np.arange(width)
+    valid &= ~((chars != 0) & (columns >= end[:, None])).any(axis=1)
+    if not valid.all():
+        bad = str(text[np.argmin(valid)])
+        raise TimestampParseError("Timestamp should be YYYY-MM-DD HH:MM:SS", bad)
 
-    if result is None:
-        raise ValueError(f"Could not convert {date} to timestamp")
+    year, month, day = number(0, 4), number(5, 7), number(8, 10)
+    hours, minutes, seconds = number(11, 13), number(14, 16), number(17, 19)
+    for in_range, message in [
+        (valid_date(year, month, day), "Date out of range"),
+        (valid_time(hours, minutes, seconds), "Time out of range"),
+    ]:
+        if not in_range.all():
+            raise TimestampParseError(message, str(text[np.argmin(in_range)]))
 
-    return result
+    return (
+        days_from_civil(year, month, day) * MS_PER_DAY
+        + hours * 3_600_000
+        + minutes * 60_000
+        + seconds * 1000
+        + milliseconds
+    )
@@ -0,0 +1,113 @@
+from typing import IO, Dict, Iterator, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.lib.aggregate import UserAggregateTable
+from src.lib.columnar import ColumnarData, is_cache
+from src.lib.metrics import Metrics
+from src.mappers.quantity import QuantityMapper
+from src.schemas.data import UserMinMaxMove, UserMinMaxMoveMapped
+
+# rows parsed at once by pandas
+CHUNK_SIZE: int = 1_000_000
+
+DTYPES = {
+    "time": np.int64,
+    "user_id": np.int64,
+    "x": np.int16,
+    "y": np.int16,
+    "color": np.int8,
+    "mod": np.int8,
+}
+
+
+def aggregate_users(
+    source: Union[str, IO],
+    *,
+    first_ts: int,
+    chunksize: int = CHUNK_SIZE,
+    metrics: Optional[Metrics] = None,
+) -> UserAggregateTable:
+    """
+    Reads the simplified csv (or its columnar cache) in chunks and aggregates the non
+    mod placements per user. `metrics` counts the rows read as input and the mod rows
+    as skipped, like the user mapper does.
+    """
+    table = UserAggregateTable()
+
+    columns = ["time", "user_id", "mod"]
+    chunks: Iterator[Dict[str, np.ndarray]]
+    if isinstance(source, str) and is_cache(source):
+        chunks = ColumnarData(source).chunks(chunksize, columns)
+    else:
+        frames = pd.read_csv(
+            source,
+            header=0,
+            usecols=columns,
+            dtype={name: DTYPES[name] for name in columns},
+            chunksize=chunksize,
+        )
+        chunks = (
+            {name: frame[name].to_numpy() for name in columns} for frame in frames
+        )
+
+    for chunk in chunks:
+        placed = chunk["mod"] == 0
+        if metrics is not None:
+            metrics.count("input", len(placed))
+            metrics.count("skipped", len(placed) - int(np.count_nonzero(placed)))
+        timestamp = chunk["time"][placed].astype(np.int64, copy=False) + first_ts
+        table.update_many(
+            chunk["user_id"][placed].astype(np.int64, copy=False),
+            timestamp,
+            timestamp,
+            np.ones(len(timestamp), dtype=np.int64),
+        )
+
+    return table
+
+
+def user_records(table: UserAggregateTable) -> Iterator[UserMinMaxMove]:
+    """
+    What the user flow outputs: one record per user, in user_id order
+    """
+    for user_id, min_ts, max_ts, moves in table.items():
+        yield UserMinMaxMove(user_id=user_id, min_ts=min_ts, max_ts=max_ts, moves=moves)
+
+
+def quantity_columns(
+    table: UserAggregateTable,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    QuantityMapper and QuantityReducer over the whole table at once
+    """
+    min_ts, max_ts, count = table.arrays()
+    users = np.flatnonzero(count)
+    diff_ts = max_ts[users] - min_ts[users]
+    # the scalar formula of the mapper, applied to the whole column (no copy)
+    max_moves = np.asarray(QuantityMapper.calculate_max_moves(0, diff_ts))
+    moves = count[users]
+
+    keep = (diff_ts != 0) & (max_moves - moves <= 2) & (moves >= 5)
+
+    return users[keep], diff_ts[keep], max_moves[keep], moves[keep]
+
+
+def quantity_records(
+    table: UserAggregateTable, metrics: Optional[Metrics] = None
+) -> Iterator[UserMinMaxMoveMapped]:
+    """
+    What the user -> quantity flows output, in user_id order. `metrics` counts the
+    users the quantity reducer drops as skipped.
+    """
+    columns = quantity_columns(table)
+    if metrics is not None:
+        users = int(np.count_nonzero(table.arrays()[2]))
+        metrics.count("skipped", users - len(columns[0]))
+    for user_id, diff_ts, max_moves, moves in zip(
+        *(column.tolist() for column in columns)
+    ):
+        yield UserMinMaxMoveMapped(
+            user_id=user_id, diff_ts=diff_ts, max_moves=max_moves, moves=moves
+        )
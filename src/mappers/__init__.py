@@ -1,3 +1,21 @@
-from .user import *
-from .quantity import *
-from .abstracts import *
+from importlib import import_module
+from typing import Any
+
+# mappers are imported on first use, so a stage only loads its own module
+MODULES = {
+    "Mapper": ".abstracts",
+    "UserMapper": ".user",
+    "QuantityMapper": ".quantity",
+    "SorterMapper": ".sorter",
+    "RawPlacementMapper": ".raw",
+    "TimelineMapper": ".timeline",
+    "FeaturesMapper": ".features",
+}
+
+__all__ = list(MODULES)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(MODULES[name], __name__), name)
@@ -1,11 +1,26 @@
 import sys
-from typing import TextIO
+from typing import TYPE_CHECKING, Any, BinaryIO, Iterable, Iterator, TextIO, Union
 from abc import ABC, abstractmethod
 
+from src.exceptions.data import DataError
+from src.lib.binary import read_records
+from src.lib.metrics import Metrics, metered_read
+from src.lib.output import Sink
+
+if TYPE_CHECKING:
+    from src.lib.columnar import ColumnarData
+
 
 class Mapper(ABC):
 
     _source = sys.stdin
+    _sink: Union[Sink, None] = None
+
+    # "text" lines or "binary" records, see src/lib/binary.py
+    input_format: str = "text"
+
+    # counters and timings of the stage when set, see src/lib/metrics.py
+    metrics: Union[Metrics, None] = None
 
     @property
     def source(self) -> TextIO:
@@ -15,16 +30,114 @@ class Mapper(ABC):
     def source(self, source: TextIO) -> None:
         self._source = source
 
-    def read(self) -> None:
+    @property
+    def binary_source(self) -> BinaryIO:
+        source: Any = self.source
+        return getattr(source, "buffer", source)
+
+    @property
+    def sink(self) -> Sink:
+        if self._sink is None:
+            self._sink = Sink()
+        return self._sink
+
+    @sink.setter
+    def sink(self, sink: Sink) -> None:
+        self._sink = sink
+
+    def emit(self, record: Any) -> None:
+        self.sink.write_record(record, self.format_record)
+
+    def lines(self) -> Iterator[str]:
         for line in self.source:
             line = line.strip()
             if not line:
                 return
+            yield line
+
+    def read(self) -> None:
+        if self.metrics is not None:
+            return self.read_metered(self.metrics)
+
+        if self.input_format == "binary":
+            for result in self.process(read_records(self.binary_source)):
+                self.emit(result)
+            return
+
+        for line in self.lines():
             self.map(line)
 
+    def read_metered(self, metrics: Metrics) -> None:
+        """
+        `read` going through the checked per record path, counting and timing it
+        """
+        binary = self.input_format == "binary"
+        metered_read(
+            metrics,
+            read_records(self.binary_source) if binary else self.lines(),
+            parse=None if binary else self.parse_line,
+            compute=self.map_record,
+            emit=self.emit,
+        )
+
     def run(self) -> None:
-        self.read()
+        try:
+            with self.sink.buffered():
+                self.read()
+        finally:
+            if self.metrics is not None:
+                self.metrics.close()
+
+    def key(self, record: Any) -> int:
+        """
+        Returns the key used to shuffle the records emitted by this mapper
+        """
+        return record.user_id
+
+    def sort_key(self, record: Any) -> Any:
+        """
+        Returns the key the shuffle sorts by, the same as `key` unless the values of a
+        key have to arrive in order (a secondary sort). Records are still partitioned
+        and grouped by `key`
+        """
+        return self.key(record)
 
-    @abstractmethod
     def map(self, line: str) -> None:
-        ...
+        record = self.parse_line(line)
+
+        if record is None:
+            return
+
+        for result in self.map_record(record):
+            self.emit(result)
+
+    def process(self, records: Iterable[Any]) -> Iterator[Any]:
+        """
+        Maps already parsed records, used to chain stages without text in between
+        """
+        for record in records:
+            yield from self.map_record(record)
+
+    def process_lines(self, lines: Iterable[str]) -> Iterator[Any]:
+        """
+        Parses and maps raw lines, yielding typed records instead of printing them
+        """
+        for line in lines:
+            record = self.parse_line(line)
+            if record is not None:
+                yield from self.map_record(record)
+
+    def process_columns(self, data: "ColumnarData") -> Iterator[Any]:
+        """
+        Maps the rows of a columnar cache (see src/lib/columnar.py) instead of lines
+        """
+        raise DataError("Mapper does not read columnar caches", type(self).__name__)
+
+    @abstractmethod
+    def parse_line(self, line: str) -> Any: ...
+
+    @abstractmethod
+    def map_record(self, record: Any) -> Iterator[Any]: ...
+
+    @abstractmethod
+    def format_record(self, record: Any) -> str: ...
@@ -0,0 +1,55 @@
+from typing import TYPE_CHECKING, Iterator, Tuple
+
+from src.mappers.abstracts import Mapper
+from src.mappers.timeline import TIMESTAMP_WIDTH
+from src.mappers.user import UserMapper
+from src.schemas.data import Placement, UserMove
+
+if TYPE_CHECKING:
+    from src.lib.columnar import ColumnarData
+
+
+class FeaturesMapper(UserMapper):
+    """
+    Maps the placements to `user_id\ttimestamp\tx\ty\tcolor`, keyed like TimelineMapper
+    (grouped by user_id, sorted by user_id and timestamp) for FeaturesReducer.
+    """
+
+    # the fast path of UserMapper only keeps user_id and time
+    fast_parse: bool = False
+
+    def sort_key(self, record: Placement) -> Tuple[int, int]:
+        return record.user_id, record.timestamp
+
+    def read(self) -> None:
+        if self.columns is None or self.metrics is not None:
+            return Mapper.read(self)
+
+        for record in self.process_columns(self.columns):
+            self.emit(record)
+
+    def process_columns(self, data: "ColumnarData") -> Iterator[Placement]:
+        names = ["time", "user_id", "x", "y", "color", "mod"]
+        for chunk in data.chunks(columns=names):
+            placed = chunk["mod"] == 0
+            rows = zip(
+                chunk["user_id"][placed].tolist(),
+                (chunk["time"][placed] + self.first_ts).tolist(),
+                chunk["x"][placed].tolist(),
+                chunk["y"][placed].tolist(),
+                chunk["color"][placed].tolist(),
+            )
+            for user_id, timestamp, x, y, color in rows:
+                yield Placement(user_id, timestamp, x, y, color)
+
+    def map_record(self, move: UserMove) -> Iterator[Placement]:
+        if move.is_mod:
+            return
+
+        yield Placement(move.user_id, move.timestamp, move.x, move.y, move.color)
+
+    def format_record(self, record: Placement) -> str:
+        return (
+            f"{record.user_id}\t{record.timestamp:0{TIMESTAMP_WIDTH}d}"
+            f"\t{record.x}\t{record.y}\t{record.color}"
+        )
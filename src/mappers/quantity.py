@@ -1,6 +1,8 @@
+from typing import Iterator
+
 from src.exceptions.data import LineFormatError
 from src.mappers.abstracts import Mapper
-from src.schemas.data import UserMinMaxMove
+from src.schemas.data import UserMinMaxMove, UserMinMaxMoveMapped
 
 
 class QuantityMapper(Mapper):
@@ -39,7 +41,13 @@ class QuantityMapper(Mapper):
             moves=int(moves),
         )
 
-    def map(self, line: str) -> None:
-        user = self.parse_line(line)
-        max_moves: int = self.calculate_max_moves(user.min_ts, user.max_ts)
-        print(f"{user.user_id}\t{user.max_ts - user.min_ts}\t{max_moves}\t{user.moves}")
+    def map_record(self, user: UserMinMaxMove) -> Iterator[UserMinMaxMoveMapped]:
+        yield UserMinMaxMoveMapped(
+            user_id=user.user_id,
+            diff_ts=user.max_ts - user.min_ts,
+            max_moves=self.calculate_max_moves(user.min_ts, user.max_ts),
+            moves=user.moves,
+        )
+
+    def format_record(self, record: UserMinMaxMoveMapped) -> str:
+        return f"{record.user_id}\t{record.diff_ts}\t{record.max_moves}\t{record.moves}"
@@ -0,0 +1,137 @@
+import os
+from typing import Dict, Iterator, List, Tuple, Union
+
+from src.exceptions.data import LineFormatError
+from src.lib.ids import IdDictionary
+from src.lib.utils import parse_timestamp
+from src.mappers.abstracts import Mapper
+from src.schemas.data import ModerationRect, UserMove, UserMoveMapped
+
+# the 32 colors of r/place 2022 in the order of the game palette, the index is the
+# color of the simplified dataset
+PALETTE: List[str] = [
+    "#6D001A",
+    "#BE0039",
+    "#FF4500",
+    "#FFA800",
+    "#FFD635",
+    "#FFF8B8",
+    "#00A368",
+    "#00CC78",
+    "#7EED56",
+    "#00756F",
+    "#009EAA",
+    "#00CCC0",
+    "#2450A4",
+    "#3690EA",
+    "#51E9F4",
+    "#493AC1",
+    "#6A5CFF",
+    "#94B3FF",
+    "#811E9F",
+    "#B44AC0",
+    "#E4ABFF",
+    "#DE107F",
+    "#FF3881",
+    "#FF99AA",
+    "#6D482F",
+    "#9C6926",
+    "#FFB470",
+    "#000000",
+    "#515252",
+    "#898D90",
+    "#D4D7D9",
+    "#FFFFFF",
+]
+
+COLORS: Dict[str, int] = {color: index for index, color in enumerate(PALETTE)}
+
+
+class RawPlacementMapper(Mapper):
+    """
+    Maps the original export (2022_place_canvas_history.csv) like UserMapper maps the
+    simplified csv, so it can start the user flow.
+
+    Rows look like `2022-04-03 17:38:22.252 UTC,<88 chars hash>,#FF3881,"0,0"`, or have
+    a quoted `"x1,y1,x2,y2"` rectangle for the moderation tool (is_mod, x and y are the
+    upper left corner, `parse_rectangle` gives the whole rectangle). Timestamps become
+    UTC milliseconds, colors their PALETTE index and hashes dense ids through an
+    IdDictionary: the one at `ids` when the file exists, else a new one, written there
+    by `save_ids`.
+    """
+
+    def __init__(self, ids: Union[str, None] = None):
+        self.ids_path = ids
+        self.ids = (
+            IdDictionary.load(ids)
+            if ids is not None and os.path.exists(ids)
+            else IdDictionary()
+        )
+
+    def save_ids(self) -> None:
+        """
+        Writes the dictionary built while mapping to `ids`, a loaded one is kept as is
+        """
+        if self.ids_path is not None and not self.ids.frozen:
+            self.ids.save(self.ids_path)
+
+    def split(self, line: str) -> Union[Tuple[str, str, int, List[int]], None]:
+        """
+        Timestamp, user hash, color index and the 2 or 4 coordinates of a row (None
+        for the header)
+        """
+        if line.startswith("timestamp,"):
+            return None
+
+        data = line.split(",")
+        if len(data) != 5 and len(data) != 7:
+            raise LineFormatError(
+                "Line should have 4 fields, the coordinate quoted", line
+            )
+
+        data[3], data[-1] = data[3].lstrip('"'), data[-1].rstrip('"')
+        if not all(value.isdigit() for value in data[3:]):
+            raise LineFormatError("Coordinates should be integers", line)
+
+        color = COLORS.get(data[2].upper())
+        if color is None:
+            raise LineFormatError("Color should be one of the palette", line)
+
+        return data[0], data[1], color, [int(value) for value in data[3:]]
+
+    def parse_line(self, line: str) -> Union[UserMove, None]:
+        fields = self.split(line)
+        if fields is None:
+            return None
+
+        timestamp, user, color, coordinates = fields
+        return UserMove(
+            timestamp=parse_timestamp(timestamp),
+            user_id=self.ids.intern(user),
+            x=coordinates[0],
+            y=coordinates[1],
+            color=color,
+            is_mod=len(coordinates) == 4,
+        )
+
+    def parse_rectangle(self, line: str) -> Union[ModerationRect, None]:
+        """
+        The whole rectangle of a moderation row, None for placements
+        """
+        fields = self.split(line)
+        if fields is None or len(fields[3]) != 4:
+            return None
+
+        timestamp, _, color, (x1, y1, x2, y2) = fields
+        if x1 > x2 or y1 > y2:
+            raise LineFormatError("Rectangle should go from x1,y1 to x2,y2", line)
+        return ModerationRect(parse_timestamp(timestamp), x1, y1, x2, y2, color)
+
+    def map_record(self, move: UserMove) -> Iterator[UserMoveMapped]:
+        if move.is_mod:
+            return
+
+        yield UserMoveMapped(user_id=move.user_id, timestamp=move.timestamp, count=1)
+
+    def format_record(self, record: UserMoveMapped) -> str:
+        return f"{record.user_id}\t{record.timestamp}\t{record.count}"
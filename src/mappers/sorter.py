@@ -0,0 +1,39 @@
+from typing import Iterator
+
+from src.exceptions.data import LineFormatError
+from src.mappers.abstracts import Mapper
+from src.schemas.data import UserMinMaxMoveMapped
+
+
+class SorterMapper(Mapper):
+    """
+    Keys the output of the quantity flow by its number of moves, so the shuffle sorts
+    the users by moves (Hadoop needs a numeric comparator on the first field)
+    """
+
+    def parse_line(self, line: str) -> UserMinMaxMoveMapped:
+        data = line.split("\t")
+
+        if len(data) != 4:
+            raise LineFormatError("Line should have 4 fields", line)
+
+        if not all(map(lambda x: x.isdigit(), data)):
+            raise LineFormatError("Line should have only digits", line)
+
+        user_id, diff_ts, max_moves, moves = data
+
+        return UserMinMaxMoveMapped(
+            user_id=int(user_id),
+            diff_ts=int(diff_ts),
+            max_moves=int(max_moves),
+            moves=int(moves),
+        )
+
+    def key(self, record: UserMinMaxMoveMapped) -> int:
+        return record.moves
+
+    def map_record(self, user: UserMinMaxMoveMapped) -> Iterator[UserMinMaxMoveMapped]:
+        yield user
+
+    def format_record(self, record: UserMinMaxMoveMapped) -> str:
+        return f"{record.moves}\t{record.user_id}\t{record.diff_ts}\t{record.max_moves}"
@@ -0,0 +1,44 @@
+from typing import Tuple
+
+from src.mappers.user import UserMapper
+from src.schemas.data import UserMoveMapped
+
+# digits of a timestamp in milliseconds until the year 2286, the padding makes the text
+# order of the second key field its numeric order
+TIMESTAMP_WIDTH: int = 13
+
+
+class TimelineMapper(UserMapper):
+    """
+    Maps the placements to `user_id\ttimestamp` (zero padded) for a secondary sort.
+
+    Records are partitioned and grouped by user_id only but sorted by both fields, so
+    the reducer gets the timeline of every user in order. Hadoop needs the
+    KeyFieldBasedPartitioner on the first field and the comparator on both (see the
+    README), `main.py --sort --key-fields 2` does the same.
+    """
+
+    def sort_key(self, record: UserMoveMapped) -> Tuple[int, int]:
+        return record.user_id, record.timestamp
+
+    def read(self) -> None:
+        if (
+            self.metrics is not None
+            or self.sink.binary
+            or (not self.fast_parse and self.columns is None)
+        ):
+            return super().read()
+
+        write = self.sink.write
+        for user_id, timestamp in self.moves():
+            write(f"{user_id}\t{timestamp:0{TIMESTAMP_WIDTH}d}")
+
+    def map(self, line: str) -> None:
+        if not self.fast_parse or self.sink.binary:
+            return super().map(line)
+
+        for user_id, timestamp in self.parse_moves((line,)):
+            self.sink.write(f"{user_id}\t{timestamp:0{TIMESTAMP_WIDTH}d}")
+
+    def format_record(self, record: UserMoveMapped) -> str:
+        return f"{record.user_id}\t{record.timestamp:0{TIMESTAMP_WIDTH}d}"
@@ -1,9 +1,13 @@
-from typing import List, Union
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Tuple, Union
 
-from src.lib.utils import str2timestamp
+from src.lib.metrics import Metrics, metered_read
+from src.lib.utils import parse_timestamp
 from src.mappers.abstracts import Mapper
 from src.exceptions.data import LineFormatError
-from src.schemas.data import UserMove
+from src.schemas.data import UserMove, UserMoveMapped
+
+if TYPE_CHECKING:
+    from src.lib.columnar import ColumnarData
 
 
 class UserMapper(Mapper):
@@ -11,15 +15,14 @@ class UserMapper(Mapper):
     out_sep: str = "\t"
     ts_sep: str = "#"
     first_time: str = "2022-04-01 12:44:10.315"
-    DATETIME_FORMAT_STRING: List[str] = ["%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S"]
+    # the time column counts milliseconds since the first placement, in UTC
+    first_ts: int = parse_timestamp(first_time)
 
-    def __init__(self):
-        # set the first timestamp from the string as seconds
-        self.first_ts = str2timestamp(
-            self.first_time, format=self.DATETIME_FORMAT_STRING
-        )
-        # now to miliseconds
-        self.first_ts *= 1000
+    # skip per field validation and UserMove allocation for all-digit rows
+    fast_parse: bool = True
+
+    # read instead of the source lines when set, see src/lib/columnar.py
+    columns: Union["ColumnarData", None] = None
 
     def parse_line(self, line: str) -> Union[UserMove, None]:
         data = line.split(self.in_sep)
@@ -43,10 +46,115 @@ class UserMapper(Mapper):
             is_mod=bool(int(data[5])),
         )
 
+    def parse_moves(self, lines: Iterable[str]) -> Iterator[Tuple[int, int]]:
+        """
+        Yields (user_id, timestamp) for every non mod placement in lines.
+
+        The common case (6 non empty fields, all digits) is checked with a single scan
+        of the line and only user_id, time and mod are converted. Everything else (the header or a
+        malformed line) falls back to parse_line, which returns None or raises.
+        """
+        sep = self.in_sep
+        first_ts = self.first_ts
+
+        for line in lines:
+            fields = line.split(sep)
+
+            if len(fields) == 6 and all(fields) and line.replace(sep, "").isdigit():
+                try:
+                    if not int(fields[5]):
+                        yield int(fields[1]), int(fields[0]) + first_ts
+                    continue
+                except ValueError:  # a digit int does not read (e.g. "²")
+                    pass
+
+            move = self.parse_line(line)
+            if move is not None and not move.is_mod:
+                yield move.user_id, move.timestamp
+
+    def column_moves(self, data: "ColumnarData") -> Iterator[Tuple[int, int]]:
+        """
+        Yields (user_id, timestamp) for every non mod placement of a columnar cache,
+        filtering a chunk of rows at a time with numpy
+        """
+        for chunk in data.chunks(columns=["time", "user_id", "mod"]):
+            placed = chunk["mod"] == 0
+            user_ids = chunk["user_id"][placed].tolist()
+            timestamps = (chunk["time"][placed] + self.first_ts).tolist()
+            yield from zip(user_ids, timestamps)
+
+    def column_records(self, data: "ColumnarData") -> Iterator[UserMove]:
+        """
+        Yields every row of a columnar cache as a UserMove, mod rows included
+        """
+        names = ["time", "user_id", "x", "y", "color", "mod"]
+        for chunk in data.chunks(columns=names):
+            rows = zip(
+                (chunk["time"] + self.first_ts).tolist(),
+                *(chunk[name].tolist() for name in names[1:]),
+            )
+            for timestamp, user_id, x, y, color, mod in rows:
+                yield UserMove(timestamp, user_id, x, y, color, bool(mod))
+
+    def moves(self) -> Iterator[Tuple[int, int]]:
+        if self.columns is not None:
+            return self.column_moves(self.columns)
+        return self.parse_moves(self.lines())
+
+    def read(self) -> None:
+        if self.metrics is not None:
+            return self.read_metered(self.metrics)
+
+        if self.sink.binary:
+            write_values = self.sink.write_values  # type: ignore[attr-defined]
+            for user_id, timestamp in self.moves():
+                write_values(UserMoveMapped, (user_id, timestamp, 1))
+            return
+
+        if not self.fast_parse and self.columns is None:
+            return super().read()
+
+        write = self.sink.write
+        for user_id, timestamp in self.moves():
+            write(f"{user_id}\t{timestamp}\t1")
+
+    def read_metered(self, metrics: Metrics) -> None:
+        if self.columns is None:
+            return super().read_metered(metrics)
+
+        # a row at a time through map_record, so mod rows count as skipped
+        metered_read(
+            metrics,
+            self.column_records(self.columns),
+            parse=None,
+            compute=self.map_record,
+            emit=self.emit,
+        )
+
     def map(self, line: str) -> None:
-        move = self.parse_line(line)
+        if not self.fast_parse or self.sink.binary:
+            return super().map(line)
 
-        if not move or move.is_mod:
+        for user_id, timestamp in self.parse_moves((line,)):
+            self.sink.write(f"{user_id}\t{timestamp}\t1")
+
+    def process_lines(self, lines: Iterable[str]) -> Iterator[UserMoveMapped]:
+        if not self.fast_parse:
+            yield from super().process_lines(lines)
+            return
+
+        for user_id, timestamp in self.parse_moves(lines):
+            yield UserMoveMapped(user_id=user_id, timestamp=timestamp, count=1)
+
+    def process_columns(self, data: "ColumnarData") -> Iterator[Any]:
+        for user_id, timestamp in self.column_moves(data):
+            yield UserMoveMapped(user_id=user_id, timestamp=timestamp, count=1)
+
+    def map_record(self, move: UserMove) -> Iterator[Any]:
+        if move.is_mod:
             return
 
-        print(f"{move.user_id}\t{move.timestamp}\t1")
+        yield UserMoveMapped(user_id=move.user_id, timestamp=move.timestamp, count=1)
+
+    def format_record(self, record: Any) -> str:
+        return f"{record.user_id}\t{record.timestamp}\t{record.count}"
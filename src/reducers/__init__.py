@@ -1,3 +1,22 @@
-from .user import *
-from .quantity import *
-from .abstracts import *
+from importlib import import_module
+from typing import Any
+
+# reducers are imported on first use, so a stage only loads its own module
+MODULES = {
+    "BaseReducer": ".abstracts",
+    "Reducer": ".abstracts",
+    "UserReducer": ".user",
+    "QuantityReducer": ".quantity",
+    "SorterReducer": ".sorter",
+    "TimelineReducer": ".timeline",
+    "CooldownReducer": ".cooldown",
+    "FeaturesReducer": ".features",
+}
+
+__all__ = list(MODULES)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(MODULES[name], __name__), name)
@@ -1,12 +1,34 @@
 import sys
-from typing import Any, TextIO
+from typing import Any, BinaryIO, Iterable, Iterator, TextIO, Union
 from abc import ABC, abstractmethod
 
+from src.lib.binary import read_records
+from src.lib.metrics import Metrics, metered_finish, metered_read
+from src.lib.output import Sink
 
-class Reducer(ABC):
+
+class BaseReducer(ABC):
+    """
+    A reduce stage: where it reads from and writes to, and how it runs. How the
+    records are reduced is up to `read` and `process`, see Reducer for the stages
+    reducing every record on its own.
+    """
 
     _source = sys.stdin
-    _buffer = ""
+    _sink: Union[Sink, None] = None
+
+    # "text" lines or "binary" records, see src/lib/binary.py
+    input_format: str = "text"
+
+    # whether the input must be grouped (sorted) by key before reducing
+    grouped: bool = False
+
+    # whether records (or timelines) without output are dropped on purpose, the
+    # metrics count them as skipped
+    filters: bool = False
+
+    # counters and timings of the stage when set, see src/lib/metrics.py
+    metrics: Union[Metrics, None] = None
 
     @property
     def source(self) -> TextIO:
@@ -16,18 +38,113 @@ class Reducer(ABC):
     def source(self, source: TextIO) -> None:
         self._source = source
 
+    @property
+    def binary_source(self) -> BinaryIO:
+        source: Any = self.source
+        return getattr(source, "buffer", source)
+
+    @property
+    def sink(self) -> Sink:
+        if self._sink is None:
+            self._sink = Sink()
+        return self._sink
+
+    @sink.setter
+    def sink(self, sink: Sink) -> None:
+        self._sink = sink
+
+    def emit(self, record: Any) -> None:
+        self.sink.write_record(record, self.format_record)
+
+    def run(self) -> Any:
+        try:
+            with self.sink.buffered():
+                self.read()
+
+                if self.metrics is not None:
+                    metered_finish(self.metrics, self.finish(), self.emit)
+                    return
+
+                for result in self.finish():
+                    self.emit(result)
+        finally:
+            if self.metrics is not None:
+                self.metrics.close()
+
+    def finish(self) -> Iterator[Any]:
+        """
+        Yields whatever is still pending once the input is exhausted
+        """
+        return iter(())
+
+    @abstractmethod
+    def read(self) -> Any:
+        """
+        Reduces the whole input from `source`, emitting the results
+        """
+
+    @abstractmethod
+    def process(self, records: Iterable[Any]) -> Iterator[Any]:
+        """
+        Reduces already parsed records, used to chain stages without text in between
+        """
+
+    @abstractmethod
+    def parse_line(self, line: str) -> Any: ...
+
+    @abstractmethod
+    def format_record(self, record: Any) -> str: ...
+
+
+class Reducer(BaseReducer):
+    """
+    A reduce stage that reduces every record on its own, through `reduce_record`
+    """
+
     def read(self) -> Any:
+        if self.metrics is not None:
+            return self.read_metered(self.metrics)
+
+        if self.input_format == "binary":
+            for record in read_records(self.binary_source):
+                for result in self.reduce_record(record):
+                    self.emit(result)
+            return
+
         for line in self.source:
             line = line.strip()
 
             self.reduce(line)
 
-    def run(self) -> Any:
-        self.read()
+    def read_metered(self, metrics: Metrics) -> None:
+        """
+        `read` counting and timing every record
+        """
+        binary = self.input_format == "binary"
+        metered_read(
+            metrics,
+            (
+                read_records(self.binary_source)
+                if binary
+                else (line.strip() for line in self.source)
+            ),
+            parse=None if binary else self.parse_line,
+            compute=self.reduce_record,
+            emit=self.emit,
+            skips=self.filters,
+        )
+
+    def reduce(self, line: str) -> None:
+        for result in self.reduce_record(self.parse_line(line)):
+            self.emit(result)
+
+    def process(self, records: Iterable[Any]) -> Iterator[Any]:
+        metrics = self.metrics if self.filters else None
+        for record in records:
+            results = self.reduce_record(record)
+            yield from results if metrics is None else metrics.skip_empty(results)
 
-        if self._buffer != "":
-            print(self._buffer)
+        yield from self.finish()
 
     @abstractmethod
-    def reduce(self, data: str) -> Any:
-        ...
+    def reduce_record(self, record: Any) -> Iterator[Any]: ...
@@ -0,0 +1,89 @@
+from typing import Iterator
+
+from src.reducers.timeline import TimelineReducer
+from src.schemas.data import UserCooldown
+
+# time between two placements of a verified account, and of an unverified one
+COOLDOWN: int = 5 * 60 * 1000
+LONG_COOLDOWN: int = 20 * 60 * 1000
+
+# a gap this close to a cooldown is a placement as soon as it was allowed
+COOLDOWN_TOLERANCE: int = 5 * 1000
+
+# users with fewer placements are not scored, like in the quantity reducer
+MIN_MOVES: int = 5
+
+
+class CooldownReducer(TimelineReducer):
+    """
+    Scores how closely every user follows the cooldown, from its sorted timeline.
+
+    For each gap between two placements it counts the ones within `tolerance` of the 5
+    and of the 20 minute cooldown, and the longest run of consecutive gaps at either.
+    A bot pausing and then placing at the cooldown has a long run even when its total
+    count looks human, which the max_moves check of the quantity flow misses. Only
+    counters are kept while the timestamps stream by, the memory does not grow with
+    the timeline. Users with less than `min_moves` placements are skipped.
+    """
+
+    filters: bool = True
+
+    def __init__(
+        self, *, tolerance: int = COOLDOWN_TOLERANCE, min_moves: int = MIN_MOVES
+    ):
+        self.tolerance = tolerance
+        self.min_moves = min_moves
+
+    def reduce_timeline(
+        self, user_id: int, timestamps: Iterator[int]
+    ) -> Iterator[UserCooldown]:
+        tolerance = self.tolerance
+        first = previous = next(timestamps)
+        moves = 1
+        min_gap = -1
+        cooldown_gaps = long_cooldown_gaps = 0
+        run = longest_run = 0
+
+        for timestamp in timestamps:
+            gap = timestamp - previous
+            previous = timestamp
+            moves += 1
+            if min_gap < 0 or gap < min_gap:
+                min_gap = gap
+
+            if abs(gap - COOLDOWN) <= tolerance:
+                cooldown_gaps += 1
+            elif abs(gap - LONG_COOLDOWN) <= tolerance:
+                long_cooldown_gaps += 1
+            else:
+                run = 0
+                continue
+
+            run += 1
+            if run > longest_run:
+                longest_run = run
+
+        if moves < self.min_moves:
+            return
+
+        yield UserCooldown(
+            user_id=user_id,
+            moves=moves,
+            span=previous - first,
+            min_gap=min_gap,
+            cooldown_gaps=cooldown_gaps,
+            long_cooldown_gaps=long_cooldown_gaps,
+            longest_run=longest_run,
+        )
+
+    def format_record(self, record: UserCooldown) -> str:
+        gaps = record.moves - 1
+        return "%s\t%s\t%s\t%s\t%.4f\t%.4f\t%s" % (
+            record.user_id,
+            record.moves,
+            record.span,
+            record.min_gap,
+            record.cooldown_gaps / gaps,
+            record.long_cooldown_gaps / gaps,
+            record.longest_run,
+        )
@@ -0,0 +1,102 @@
+from math import log2, sqrt
+from typing import Iterator
+
+from src.exceptions.data import DataError, LineFormatError
+from src.reducers.timeline import TimelineReducer
+from src.schemas.data import CANVAS_SIZE, PALETTE_SIZE, Placement, UserFeatures
+
+
+class FeaturesReducer(TimelineReducer):
+    """
+    Computes the bot detection features of every user in a single pass over its
+    sorted placements.
+
+    The accumulators are online: Welford mean and variance of the gaps between
+    placements, a histogram of the 32 colors (for their entropy, in bits) and a running
+    bounding box. Only the distinct pixels need a set, as large as the pixels the user
+    touched. Written with `--output-format columnar`, the result is a feature matrix
+    indexed by user_id.
+    """
+
+    def parse_line(self, line: str) -> Placement:  # type: ignore[override]
+        data = line.split("\t")
+
+        if len(data) != 5:
+            raise LineFormatError("Line should have 5 fields", line)
+
+        if not all(map(lambda x: x.isdigit(), data)):
+            raise LineFormatError("Line should be all integers", line)
+
+        user_id, timestamp, x, y, color = map(int, data)
+        return Placement(user_id, timestamp, x, y, color)
+
+    def reduce_placements(
+        self, user_id: int, placements: Iterator[Placement]
+    ) -> Iterator[UserFeatures]:
+        first = next(placements)
+        previous = first.timestamp
+        moves = 1
+        gap_mean = gap_m2 = 0.0
+        colors = [0] * PALETTE_SIZE
+        x_min = x_max = first.x
+        y_min = y_max = first.y
+        pixels = set()
+
+        try:
+            colors[first.color] += 1
+            pixels.add(first.y * CANVAS_SIZE + first.x)
+
+            for placement in placements:
+                gap = placement.timestamp - previous
+                previous = placement.timestamp
+                delta = gap - gap_mean
+                gap_mean += delta / moves
+                gap_m2 += delta * (gap - gap_mean)
+                moves += 1
+
+                colors[placement.color] += 1
+                x, y = placement.x, placement.y
+                if x < x_min:
+                    x_min = x
+                elif x > x_max:
+                    x_max = x
+                if y < y_min:
+                    y_min = y
+                elif y > y_max:
+                    y_max = y
+                pixels.add(y * CANVAS_SIZE + x)
+        except IndexError:
+            raise DataError("Color should be an index of the palette", str(user_id))
+
+        yield UserFeatures(
+            user_id=user_id,
+            moves=moves,
+            span=previous - first.timestamp,
+            gap_mean=gap_mean,
+            gap_std=sqrt(gap_m2 / (moves - 1)) if moves > 1 else 0.0,
+            color_entropy=sum(
+                count / moves * log2(moves / count) for count in colors if count
+            ),
+            x_min=x_min,
+            x_max=x_max,
+            y_min=y_min,
+            y_max=y_max,
+            distinct_pixels=len(pixels),
+            distinct_ratio=len(pixels) / moves,
+        )
+
+    def format_record(self, record: UserFeatures) -> str:
+        return "%s\t%s\t%s\t%.4f\t%.4f\t%.4f\t%s\t%s\t%s\t%s\t%s\t%.4f" % (
+            record.user_id,
+            record.moves,
+            record.span,
+            record.gap_mean,
+            record.gap_std,
+            record.color_entropy,
+            record.x_min,
+            record.x_max,
+            record.y_min,
+            record.y_max,
+            record.distinct_pixels,
+            record.distinct_ratio,
+        )
@@ -1,9 +1,14 @@
+from typing import Iterator
+
 from src.exceptions.data import LineFormatError
 from src.reducers.abstracts import Reducer
 from src.schemas.data import UserMinMaxMoveMapped
 
 
 class QuantityReducer(Reducer):
+
+    filters: bool = True
+
     def parse_line(self, line: str) -> UserMinMaxMoveMapped:
         data = line.split("\t")
 
@@ -22,13 +27,16 @@ class QuantityReducer(Reducer):
             moves=int(moves),
         )
 
-    def reduce(self, line: str) -> None:
-        user = self.parse_line(line)
-
+    def reduce_record(
+        self, user: UserMinMaxMoveMapped
+    ) -> Iterator[UserMinMaxMoveMapped]:
         if user.diff_ts == 0 or user.max_moves - user.moves > 2:
             return
 
         if user.moves < 5:
             return
 
-        print(f"{user.user_id}\t{user.diff_ts}\t{user.max_moves}\t{user.moves}")
+        yield user
+
+    def format_record(self, record: UserMinMaxMoveMapped) -> str:
+        return f"{record.user_id}\t{record.diff_ts}\t{record.max_moves}\t{record.moves}"
@@ -0,0 +1,39 @@
+from typing import Iterator
+
+from src.exceptions.data import LineFormatError
+from src.reducers.abstracts import Reducer
+from src.schemas.data import UserMinMaxMoveMapped
+
+
+class SorterReducer(Reducer):
+    """
+    Puts the user_id first again on the records sorted by moves
+    """
+
+    grouped: bool = True
+
+    def parse_line(self, line: str) -> UserMinMaxMoveMapped:
+        data = line.split("\t")
+
+        if len(data) != 4:
+            raise LineFormatError("Line should have 4 fields", line)
+
+        if not all(map(lambda x: x.isdigit(), data)):
+            raise LineFormatError("Line should have only digits", line)
+
+        moves, user_id, diff_ts, max_moves = data
+
+        return UserMinMaxMoveMapped(
+            user_id=int(user_id),
+            diff_ts=int(diff_ts),
+            max_moves=int(max_moves),
+            moves=int(moves),
+        )
+
+    def reduce_record(
+        self, user: UserMinMaxMoveMapped
+    ) -> Iterator[UserMinMaxMoveMapped]:
+        yield user
+
+    def format_record(self, record: UserMinMaxMoveMapped) -> str:
+        return f"{record.user_id}\t{record.diff_ts}\t{record.max_moves}\t{record.moves}"
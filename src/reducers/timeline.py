@@ -0,0 +1,100 @@
+from itertools import groupby
+from operator import attrgetter
+from typing import Any, Iterable, Iterator
+
+from src.exceptions.data import DataError, LineFormatError
+from src.lib.binary import read_records
+from src.reducers.abstracts import BaseReducer
+from src.schemas.data import UserMinMaxMove, UserMoveMapped
+
+
+class TimelineReducer(BaseReducer):
+    """
+    Reduces the timeline of every user, its placement times in order, as it streams by.
+
+    The input must be sorted by user_id and timestamp (see TimelineMapper). Each user
+    is handed to `reduce_timeline` as an iterator over its timestamps, so nothing is
+    buffered; a user_id or timestamp lower than the previous one raises a DataError.
+    This one yields the output of the user reducer, so the quantity flow can follow,
+    subclasses override `reduce_timeline` for other analyses (or `reduce_placements`
+    to get the whole records). Timelines are pulled from the input, so it is not a
+    Reducer of single records.
+    """
+
+    grouped: bool = True
+
+    def parse_line(self, line: str) -> UserMoveMapped:
+        data = line.split("\t")
+
+        if len(data) != 2:
+            raise LineFormatError("Line should be user_id and timestamp by a tab", line)
+
+        if not (data[0].isdigit() and data[1].isdigit()):
+            raise LineFormatError("Line should be all integers", line)
+
+        return UserMoveMapped(user_id=int(data[0]), timestamp=int(data[1]), count=1)
+
+    def ordered(self, records: Iterable[Any]) -> Iterator[Any]:
+        previous = None
+        for record in records:
+            if previous is not None and record.timestamp < previous:
+                raise DataError("Timeline is not sorted", str(record.user_id))
+            previous = record.timestamp
+            yield record
+
+    def timelines(self, records: Iterable[Any]) -> Iterator[Any]:
+        # with `filters` the metrics count the users without output as skipped
+        metrics = self.metrics if self.filters else None
+        previous = None
+        for user_id, group in groupby(records, key=attrgetter("user_id")):
+            if previous is not None and user_id < previous:
+                raise DataError("Input is not sorted by user_id", str(user_id))
+            previous = user_id
+            results = self.reduce_placements(user_id, self.ordered(group))
+            yield from results if metrics is None else metrics.skip_empty(results)
+
+    def reduce_placements(self, user_id: int, records: Iterator[Any]) -> Iterator[Any]:
+        """
+        Reduces the records of a user in order, by default through `reduce_timeline`
+        """
+        return self.reduce_timeline(user_id, map(attrgetter("timestamp"), records))
+
+    def reduce_timeline(self, user_id: int, timestamps: Iterator[int]) -> Iterator[Any]:
+        """
+        Reduces the timestamps of a user, in order, to the records of the stage (a
+        UserMinMaxMove here)
+        """
+        first = last = next(timestamps)
+        moves = 1
+        for last in timestamps:
+            moves += 1
+
+        yield UserMinMaxMove(user_id=user_id, min_ts=first, max_ts=last, moves=moves)
+
+    def read(self) -> None:
+        records: Iterable[UserMoveMapped]
+        if self.input_format == "binary":
+            records = read_records(self.binary_source)  # type: ignore[assignment]
+        else:
+            records = (self.parse_line(line.strip()) for line in self.source)
+        if self.metrics is not None:
+            records = self.metrics.iterate(records, "input")
+
+        results = self.timelines(records)
+        if self.metrics is not None:
+            results = self.metrics.iterate(self.metrics.erroring(results), "emitted")
+
+        for result in results:
+            self.emit(result)
+
+    def process(self, records: Iterable[UserMoveMapped]) -> Iterator[Any]:
+        yield from self.timelines(records)
+        yield from self.finish()
+
+    def format_record(self, record: Any) -> str:
+        return "%s\t%s#%s\t%s" % (
+            record.user_id,
+            record.min_ts,
+            record.max_ts,
+            record.moves,
+        )
@@ -1,41 +1,85 @@
-from typing import Union
+from typing import Iterator, Union
 
-from src.exceptions.data import LineFormatError
+from src.exceptions.data import DataError, LineFormatError
+from src.lib.aggregate import SpillingUserAggregator
+from src.lib.sort import SORT_MEMORY
 from src.reducers.abstracts import Reducer
-from src.schemas.data import UserMoveMapped
+from src.schemas.data import UserMinMaxMove, UserMoveMapped
 
 
 class UserReducer(Reducer):
+    """
+    Reduces the mapped moves to `user_id\tmin#max\tcount` per user.
+
+    The input must be sorted by user_id unless `unsorted` is set, then the users are
+    hash aggregated (spilling to `folder` past `memory` bytes) and emitted in user_id
+    order once the input ends.
+    """
+
+    grouped: bool = True
+
+    unsorted: bool = False
+    aggregator: Union[SpillingUserAggregator, None] = None
 
     current_user: Union[int, None] = None
     current_min_timestamp: int = 0
     current_max_timestamp: int = 0
     current_count: int = 0
 
+    def __init__(
+        self,
+        *,
+        unsorted: bool = False,
+        memory: int = SORT_MEMORY,
+        folder: Union[str, None] = None,
+    ):
+        self.unsorted = unsorted
+        if self.unsorted:
+            self.grouped = False
+            self.aggregator = SpillingUserAggregator(memory=memory, folder=folder)
+
     @property
     def current_timestamp(self) -> str:
         return f"{self.current_min_timestamp}#{self.current_max_timestamp}"
 
     @property
-    def result(self) -> str:
-        return "%s\t%s\t%s" % (
-            self.current_user,
-            self.current_timestamp,
-            self.current_count,
+    def result(self) -> UserMinMaxMove:
+        user_id = self.current_user
+        if user_id is None:
+            raise DataError("No user is being reduced", type(self).__name__)
+
+        return UserMinMaxMove(
+            user_id=user_id,
+            min_ts=self.current_min_timestamp,
+            max_ts=self.current_max_timestamp,
+            moves=self.current_count,
         )
 
-    def parse_line(self, line: str) -> UserMoveMapped:
+    def parse_line(self, line: str) -> Union[UserMoveMapped, UserMinMaxMove]:
         data = line.split("\t")
 
         if len(data) != 3:
             raise LineFormatError("Line should be length of 3 separated by tabs", line)
 
-        if not all(map(lambda x: x.isdigit(), data)):
+        user_id, ts, count = data
+        ts_info = ts.split("#")
+
+        if len(ts_info) > 2:
+            raise LineFormatError("Timestamp should be separated by '#'", line)
+
+        if not all(map(lambda x: x.isdigit(), [user_id, count, *ts_info])):
             raise LineFormatError("Line should be all integers", line)
 
-        return UserMoveMapped(
-            user_id=int(data[0]), timestamp=int(data[1]), count=int(data[2])
-        )
+        # already combined on the map side as min#max
+        if len(ts_info) == 2:
+            return UserMinMaxMove(
+                user_id=int(user_id),
+                min_ts=int(ts_info[0]),
+                max_ts=int(ts_info[1]),
+                moves=int(count),
+            )
+
+        return UserMoveMapped(user_id=int(user_id), timestamp=int(ts), count=int(count))
 
     def set_min_max_ts(self, ts: int) -> None:
         if ts <= self.current_min_timestamp:
@@ -43,20 +87,48 @@ class UserReducer(Reducer):
         if ts >= self.current_max_timestamp:
             self.current_max_timestamp = ts
 
-    def reduce(self, line: str) -> None:
-        data = self.parse_line(line)
+    def reduce_record(
+        self, data: Union[UserMoveMapped, UserMinMaxMove]
+    ) -> Iterator[UserMinMaxMove]:
+        if isinstance(data, UserMinMaxMove):
+            min_ts, max_ts, count = data.min_ts, data.max_ts, data.moves
+        else:
+            min_ts, max_ts, count = data.timestamp, data.timestamp, data.count
+
+        if self.aggregator is not None:
+            self.aggregator.add(data.user_id, min_ts, max_ts, count)
+            return
 
         if data.user_id == self.current_user:
-            self.current_count += data.count
-            self.set_min_max_ts(data.timestamp)
-        else:
-            if self.current_user is not None:
-                print(self.result)
-                self._buffer = ""
-                self.current_user = None
-
-            self.current_count = data.count
-            self.current_user = data.user_id
-            self.current_min_timestamp = data.timestamp
-            self.current_max_timestamp = data.timestamp
-            self._buffer = self.result
+            self.current_count += count
+            self.set_min_max_ts(min_ts)
+            self.set_min_max_ts(max_ts)
+            return
+
+        if self.current_user is not None:
+            yield self.result
+
+        self.current_count = count
+        self.current_user = data.user_id
+        self.current_min_timestamp = min_ts
+        self.current_max_timestamp = max_ts
+
+    def finish(self) -> Iterator[UserMinMaxMove]:
+        if self.aggregator is not None:
+            for user_id, min_ts, max_ts, count in self.aggregator.items():
+                yield UserMinMaxMove(
+                    user_id=user_id, min_ts=min_ts, max_ts=max_ts, moves=count
+                )
+            return
+
+        if self.current_user is not None:
+            yield self.result
+            self.current_user = None
+
+    def format_record(self, record: UserMinMaxMove) -> str:
+        return "%s\t%s#%s\t%s" % (
+            record.user_id,
+            record.min_ts,
+            record.max_ts,
+            record.moves,
+        )
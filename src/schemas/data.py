@@ -1,12 +1,57 @@
-from dataclasses import dataclass
+import struct
+from operator import attrgetter
+from dataclasses import Field, dataclass, fields
+from typing import Any, Callable, ClassVar, Dict, Iterator, Tuple
+
+# side of the 2022 canvas, in pixels, and number of colors of the palette
+CANVAS_SIZE: int = 2000
+PALETTE_SIZE: int = 32
+
+
+class Record:
+    """
+    Base of the records passed between stages, adds the fixed width binary framing.
+
+    Every field is packed as a little endian int64 (float64 for float fields), `TAG`
+    identifies the record type in the header of a binary stream.
+    """
+
+    TAG: ClassVar[int] = 0
+    # set by @dataclass on every record type
+    __dataclass_fields__: ClassVar[Dict[str, "Field[Any]"]]
+    _struct: ClassVar[struct.Struct]
+    _getter: ClassVar[Callable[[Any], Tuple[int, ...]]]
+
+    @classmethod
+    def struct(cls) -> struct.Struct:
+        if "_struct" not in cls.__dict__:
+            names = [field.name for field in fields(cls)]
+            codes = ["d" if field.type is float else "q" for field in fields(cls)]
+            cls._struct = struct.Struct("<" + "".join(codes))
+            cls._getter = attrgetter(*names)
+        return cls._struct
+
+    def values(self) -> Tuple[int, ...]:
+        self.struct()
+        return type(self)._getter(self)
+
+    def pack(self) -> bytes:
+        return self.struct().pack(*self.values())
+
+    @classmethod
+    def unpack_many(cls, buffer: bytes) -> Iterator["Record"]:
+        for values in cls.struct().iter_unpack(buffer):
+            yield cls(*values)
 
 
 @dataclass
-class UserMove:
+class UserMove(Record):
     """
     Data class for a user move in r/place canvas
     """
 
+    TAG: ClassVar[int] = 1
+
     timestamp: int
     user_id: int
     x: int
@@ -16,22 +61,26 @@ class UserMove:
 
 
 @dataclass
-class UserMoveMapped:
+class UserMoveMapped(Record):
     """
     Data class when UserMove was processed by the mapper
     """
 
+    TAG: ClassVar[int] = 2
+
     user_id: int
     timestamp: int
     count: int
 
 
 @dataclass
-class UserMinMaxMove:
+class UserMinMaxMove(Record):
     """
     Data class for a user with min ts and max ts, and number of move that the user made
     """
 
+    TAG: ClassVar[int] = 3
+
     user_id: int
     min_ts: int
     max_ts: int
@@ -39,12 +88,86 @@ class UserMinMaxMove:
 
 
 @dataclass
-class UserMinMaxMoveMapped:
+class UserMinMaxMoveMapped(Record):
     """
     Data class when UserMinMaxMove was processed by the mapper
     """
 
+    TAG: ClassVar[int] = 4
+
     user_id: int
     diff_ts: int
     max_moves: int
     moves: int
+
+
+@dataclass
+class ModerationRect(Record):
+    """
+    Data class for a rectangle of the moderation tool, painted with color from x1, y1
+    to x2, y2 (inclusive)
+    """
+
+    TAG: ClassVar[int] = 5
+
+    timestamp: int
+    x1: int
+    y1: int
+    x2: int
+    y2: int
+    color: int
+
+
+@dataclass
+class UserCooldown(Record):
+    """
+    Data class for the cooldown score of a user: how many of the gaps between its
+    placements match the 5 and 20 minute cooldowns, and the longest run of them
+    """
+
+    TAG: ClassVar[int] = 6
+
+    user_id: int
+    moves: int
+    span: int
+    min_gap: int
+    cooldown_gaps: int
+    long_cooldown_gaps: int
+    longest_run: int
+
+
+@dataclass
+class Placement(Record):
+    """
+    Data class for a placement keyed by its user, with where and what was placed
+    """
+
+    TAG: ClassVar[int] = 7
+
+    user_id: int
+    timestamp: int
+    x: int
+    y: int
+    color: int
+
+
+@dataclass
+class UserFeatures(Record):
+    """
+    Data class for the bot detection features of a user, see FeaturesReducer
+    """
+
+    TAG: ClassVar[int] = 8
+
+    user_id: int
+    moves: int
+    span: int
+    gap_mean: float
+    gap_std: float
+    color_entropy: float
+    x_min: int
+    x_max: int
+    y_min: int
+    y_max: int
+    distinct_pixels: int
+    distinct_ratio: float
@@ -0,0 +1,76 @@
+import unittest
+from io import StringIO
+from unittest.mock import patch
+from src.exceptions.data import LineFormatError
+
+from src.combiners.user import UserCombiner
+from src.reducers.user import UserReducer
+
+
+class TestUserCombiner(unittest.TestCase):
+    """Test Suite for User combiner"""
+
+    def setUp(self):
+        base_ts: int = 1648827850000
+        self.text = (
+            f"0\t{base_ts}\t1\n"
+            f"1\t{21388 + base_ts}\t1\n"
+            f"2\t{16311 + base_ts}\t1\n"
+            f"1\t{12356 + base_ts}\t1\n"
+            f"1\t{34094 + base_ts}\t1\n"
+        )
+        self.expected = (
+            f"0\t{base_ts}#{base_ts}\t1\n"
+            f"1\t{12356 + base_ts}#{34094 + base_ts}\t3\n"
+            f"2\t{16311 + base_ts}#{16311 + base_ts}\t1\n"
+        )
+
+        self.combiner = UserCombiner()
+        self.source = StringIO(self.text)
+
+    def test_fail_format(self):
+        """
+        Should raise a LineFormatError if line has not the correct format
+        """
+        with self.assertRaises(
+            LineFormatError, msg="Line should be formatted property before processing"
+        ):
+            self.combiner.reduce("1\t2\ta")
+
+    def test_use_case(self):
+        """
+        Should collapse every user into one line without sorted input
+        """
+        with patch("sys.stdout", new=StringIO()) as out:
+            self.combiner.source = self.source
+            self.combiner.run()
+            self.assertEqual(out.getvalue(), self.expected)
+
+    def test_flush_when_full(self):
+        """
+        When the table is full it should be flushed, and the reducer should still
+        get the same result from the partial aggregations
+        """
+        with patch("sys.stdout", new=StringIO()) as out:
+            combiner = UserCombiner(max_entries=1)
+            combiner.source = self.source
+            combiner.run()
+            combined = out.getvalue()
+
+        self.assertEqual(len(combined.splitlines()), 4)
+
+        with patch("sys.stdout", new=StringIO()) as out:
+            reducer = UserReducer()
+            reducer.source = StringIO("".join(sorted(combined.splitlines(True))))
+            reducer.run()
+            self.assertEqual(out.getvalue(), self.expected)
+
+    def test_sparse_user_ids(self):
+        """
+        Should hold as many entries as users, not as the largest user_id
+        """
+        combiner = UserCombiner(max_entries=2)
+        combiner.reduce(f"{10**12}\t5\t1")
+        combiner.reduce("3\t7\t1")
+        self.assertEqual(len(combiner.table), 2)
+        self.assertEqual(combiner.table[10**12], [5, 5, 1])
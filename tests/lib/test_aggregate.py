@@ -0,0 +1,128 @@
+import unittest
+
+import numpy as np
+
+from src.exceptions.data import DataError
+from src.lib.aggregate import (
+    OPEN_PARTITIONS,
+    SpillingUserAggregator,
+    UserAggregateTable,
+)
+
+
+class TestUserAggregateTable(unittest.TestCase):
+    """Test Suite for the dense per user aggregation table"""
+
+    def test_add_and_items(self):
+        """
+        Should keep min, max and count per user and yield them in user_id order
+        """
+        table = UserAggregateTable()
+        table.add(5, 10, 10)
+        table.add(1, 7, 9, 2)
+        table.add(5, 3, 3)
+        table.add(5, 20, 20)
+
+        self.assertEqual(len(table), 2)
+        self.assertEqual(list(table.items()), [(1, 7, 9, 2), (5, 3, 20, 3)])
+        self.assertEqual(table.get(0)[2], 0)
+        self.assertEqual(table.get(100)[2], 0)
+        self.assertEqual(table.nbytes, table.size * 24)
+
+    def test_clear(self):
+        """
+        Clearing should forget every user but keep the arrays allocated
+        """
+        table = UserAggregateTable()
+        table.add(3, 1, 1)
+        size = table.size
+        table.clear()
+
+        self.assertEqual(len(table), 0)
+        self.assertEqual(list(table.items()), [])
+        self.assertEqual(table.size, size)
+
+        table.add(3, 5, 5)
+        self.assertEqual(list(table.items()), [(3, 5, 5, 1)])
+
+    def test_update_many(self):
+        """
+        The vectorized update should give the same table as adding one by one
+        """
+        rng = np.random.default_rng(0)
+        user_id = rng.integers(0, 50, 1000)
+        timestamp = rng.integers(0, 10**12, 1000)
+
+        expected = UserAggregateTable()
+        for u, t in zip(user_id.tolist(), timestamp.tolist()):
+            expected.add(u, t, t)
+
+        table = UserAggregateTable()
+        for part in np.array_split(np.arange(1000), 4):
+            ones = np.ones(len(part), dtype=np.int64)
+            table.update_many(user_id[part], timestamp[part], timestamp[part], ones)
+
+        self.assertEqual(list(table.items()), list(expected.items()))
+
+
+class TestSpillingUserAggregator(unittest.TestCase):
+    """Test Suite for the memory bounded per user aggregation"""
+
+    def test_spill(self):
+        """
+        Should give the same result with and without spilling partitions to disk
+        """
+        moves = [((i * 7919) % 50, i, i) for i in range(500)]
+
+        results = []
+        for memory in (1024 * 1024, 24 * 8):
+            aggregator = SpillingUserAggregator(memory=memory)
+            for user_id, min_ts, max_ts in moves:
+                aggregator.add(user_id, min_ts, max_ts)
+            results.append(list(aggregator.items()))
+            self.assertEqual(aggregator.spilled, memory < 1024)
+
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(len(results[0]), 50)
+        self.assertEqual(sum(count for *_, count in results[0]), 500)
+
+    def test_open_partitions(self):
+        """
+        Should keep a bounded number of partition files open, appending to the others
+        """
+        moves = [((i * 7919) % 5000, i, i) for i in range(20000)]
+
+        expected = SpillingUserAggregator(memory=1024 * 1024)
+        aggregator = SpillingUserAggregator(memory=24 * 8)
+        for user_id, min_ts, max_ts in moves:
+            expected.add(user_id, min_ts, max_ts)
+            aggregator.add(user_id, min_ts, max_ts)
+            self.assertLessEqual(len(aggregator.open), OPEN_PARTITIONS)
+
+        self.assertGreater(len(aggregator.partitions), OPEN_PARTITIONS)
+        self.assertEqual(list(aggregator.items()), list(expected.items()))
+
+    def test_stride(self):
+        """
+        Should store the users of a partition densely and give back their user_ids
+        """
+        moves = [(3 + 4 * ((i * 7919) % 50), i, i) for i in range(500)]
+
+        results = []
+        for memory in (1024 * 1024, 24 * 8):
+            aggregator = SpillingUserAggregator(memory=memory, stride=4, residue=3)
+            for user_id, min_ts, max_ts in moves:
+                aggregator.add(user_id, min_ts, max_ts)
+            if not aggregator.spilled:
+                # the arrays double as they grow, a table of the user_ids takes 200
+                self.assertLess(aggregator.table.size, 100)
+            results.append(list(aggregator.items()))
+
+        expected = SpillingUserAggregator(memory=1024 * 1024)
+        for user_id, min_ts, max_ts in moves:
+            expected.add(user_id, min_ts, max_ts)
+        self.assertEqual(results[0], list(expected.items()))
+        self.assertEqual(results[1], results[0])
+
+        with self.assertRaises(DataError):
+            aggregator.add(4, 0, 0)
@@ -0,0 +1,142 @@
+import os
+import tempfile
+import unittest
+from io import BytesIO, StringIO
+
+from src.exceptions.data import DataError
+from src.lib.binary import (
+    BinaryFileSink,
+    BinarySink,
+    read_file,
+    read_record_range,
+    read_records,
+    split_records,
+)
+from src.lib.output import ListSink
+from src.mappers.quantity import QuantityMapper
+from src.mappers.user import UserMapper
+from src.reducers.user import UserReducer
+from src.schemas.data import UserFeatures, UserMinMaxMove, UserMoveMapped
+
+
+class TestBinary(unittest.TestCase):
+    """Test Suite for the binary record format"""
+
+    def test_round_trip(self):
+        """
+        Records written by a BinarySink should be read back as the same records
+        """
+        records = [
+            UserMoveMapped(user_id=i, timestamp=i * 1000, count=1) for i in range(100)
+        ]
+        out = BytesIO()
+        sink = BinarySink(out, buffer_size=7)
+        with sink.buffered():
+            for record in records:
+                sink.write_record(record)
+
+        self.assertEqual(list(read_records(BytesIO(out.getvalue()))), records)
+        self.assertEqual(list(read_records(BytesIO())), [])
+
+    def test_float_fields(self):
+        """
+        Float fields should be packed as float64, not truncated
+        """
+        record = UserFeatures(1, 3, 600, 300.25, 0.5, 1.5, 0, 1, 2, 3, 2, 2 / 3)
+        out = BytesIO()
+        BinarySink(out).write_record(record)
+        self.assertEqual(list(read_records(BytesIO(out.getvalue()))), [record])
+
+    def test_append(self):
+        """
+        A sink appending to a file should write its records after the ones in it
+        """
+        records = [UserMoveMapped(user_id=i, timestamp=i, count=1) for i in range(6)]
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "records.bin")
+            for part in (records[:3], records[3:]):
+                sink = BinaryFileSink(path, append=True)
+                for record in part:
+                    sink.write_record(record)
+                sink.close()
+            self.assertEqual(list(read_file(path)), records)
+
+            sink = BinaryFileSink(path, append=True)
+            with self.assertRaises(DataError):
+                sink.write_record(
+                    UserMinMaxMove(user_id=1, min_ts=1, max_ts=1, moves=1)
+                )
+            sink.close()
+
+            with open(path, "wb") as f:
+                f.write(b"0\t1\n")
+            with self.assertRaises(DataError):
+                BinaryFileSink(path, append=True)
+
+    def test_split_records(self):
+        """
+        Ranges should hold whole records and cover the whole file
+        """
+        records = [UserMoveMapped(user_id=i, timestamp=i, count=1) for i in range(10)]
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "records.bin")
+            sink = BinaryFileSink(path)
+            for record in records:
+                sink.write_record(record)
+            sink.close()
+
+            for parts in (1, 3, 10, 64):
+                ranges = split_records(path, parts)
+                self.assertLessEqual(len(ranges), parts)
+                read = [
+                    record
+                    for start, end in ranges
+                    for record in read_record_range(path, start, end)
+                ]
+                self.assertEqual(read, records)
+
+            open(path, "wb").close()
+            self.assertEqual(split_records(path, 3), [])
+
+    def test_fail_format(self):
+        """
+        Should raise a DataError on mixed, truncated or non binary streams
+        """
+        sink = BinarySink(BytesIO())
+        sink.write_record(UserMoveMapped(user_id=1, timestamp=1, count=1))
+        with self.assertRaises(DataError):
+            sink.write_record(UserMinMaxMove(user_id=1, min_ts=1, max_ts=1, moves=1))
+
+        out = BytesIO()
+        BinarySink(out).write_record(UserMoveMapped(user_id=1, timestamp=1, count=1))
+        with self.assertRaises(DataError):
+            list(read_records(BytesIO(out.getvalue()[:-1])))
+
+        with self.assertRaises(DataError):
+            list(read_records(BytesIO(b"0\t1#1\t1\n")))
+
+    def test_stages_read_and_write_binary(self):
+        """
+        A binary user mapper -> reducer -> quantity mapper chain should give the same
+        records as the text one
+        """
+        mapper = UserMapper()
+        mapper.source = StringIO(
+            "time,user_id,x,y,color,mod\n0,3,0,0,0,0\n600000,3,1,1,1,0\n"
+        )
+        mapper.sink = BinarySink(BytesIO())
+        mapper.run()
+
+        reducer = UserReducer()
+        reducer.input_format = "binary"
+        reducer.source = BytesIO(mapper.sink.stream.getvalue())
+        reducer.sink = BinarySink(BytesIO())
+        reducer.run()
+
+        quantity = QuantityMapper()
+        quantity.input_format = "binary"
+        quantity.source = BytesIO(reducer.sink.stream.getvalue())
+        quantity.sink = ListSink()
+        quantity.run()
+
+        self.assertEqual(quantity.sink.lines, ["3\t600000\t3\t2"])
@@ -0,0 +1,139 @@
+import os
+import ast
+import sys
+import tempfile
+import subprocess
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from src.lib.bundle import BUNDLES, Bundle, Folder, build
+from src.mappers.raw import RawPlacementMapper
+from src.mappers.user import UserMapper
+from src.reducers.user import UserReducer
+
+ROOT: str = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestBundle(unittest.TestCase):
+    """Test Suite for the Hadoop Streaming script bundler"""
+
+    def setUp(self):
+        self.text = (
+            "time,user_id,x,y,color,mod\n"
+            "000000000,00000000,0042,0042,15,0\n"
+            "000012356,00000001,0999,0999,22,0\n"
+            "000016311,00000002,0044,0042,26,0\n"
+            "000021388,00000001,0002,0002,29,0\n"
+            "000040229,00000005,0420,0420,09,1\n"
+        )
+
+    def execute(self, bundle: Bundle, text: str, cwd: str = ".") -> str:
+        return subprocess.run(
+            [sys.executable, "-c", build(bundle)],
+            input=text,
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=cwd,
+        ).stdout
+
+    def test_imports(self):
+        """
+        Every script should compile and import only what it runs
+        """
+        for name, bundle in BUNDLES.items():
+            source = build(bundle)
+            imported = {
+                alias.name if isinstance(node, ast.Import) else node.module
+                for node in ast.parse(source).body
+                if isinstance(node, (ast.Import, ast.ImportFrom))
+                for alias in node.names
+            }
+            # the user id dictionary of the raw mapper has a binary header
+            forbidden = {"abc", "typing", "dataclasses", "struct"}
+            if name == "raw-mapper.py":
+                forbidden.remove("struct")
+            self.assertFalse(imported & forbidden, f"{name} imports {imported}")
+            self.assertNotIn("src", source.split("\n", 2)[2], name)
+
+    def test_same_output(self):
+        """
+        The scripts should write what the flows of src write
+        """
+        with patch("sys.stdout", new=StringIO()) as out:
+            mapper = UserMapper()
+            mapper.source = StringIO(self.text)
+            mapper.run()
+        mapped = out.getvalue()
+        self.assertEqual(self.execute(BUNDLES["user-mapper.py"], self.text), mapped)
+
+        shuffled = "".join(sorted(mapped.splitlines(True), key=lambda x: int(x[0])))
+        with patch("sys.stdout", new=StringIO()) as out:
+            reducer = UserReducer()
+            reducer.source = StringIO(shuffled)
+            reducer.run()
+        self.assertEqual(
+            self.execute(BUNDLES["user-reducer.py"], shuffled), out.getvalue()
+        )
+
+    def test_raw_mapper(self):
+        """
+        The raw mapper script should number the users with the dictionary of a
+        `--mapper=raw --ids users.ids` pass
+        """
+        user = "yTrYCd4LUpBn4rIyNXkkW2+Fac5cQHK2lsDpNghkq0oPu9o//8oPZPlLM4CXQeEIId7S9KqC1ETDNW/vm/hxXQ=="
+        text = (
+            "timestamp,user_id,pixel_color,coordinate\n"
+            '2022-04-01 12:44:10.315 UTC,other,#FF4500,"42,42"\n'
+            f'2022-04-01 12:44:22.671 UTC,{user},#ffffff,"999,999"\n'
+            f'2022-04-04 00:00:00.1 UTC,{user},#FFFFFF,"0,0,1999,1999"\n'
+        )
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "users.ids")
+            with patch("sys.stdout", new=StringIO()) as out:
+                mapper = RawPlacementMapper(ids=path)
+                mapper.source = StringIO(text)
+                mapper.run()
+                mapper.save_ids()
+
+            self.assertEqual(
+                self.execute(BUNDLES["raw-mapper.py"], text, folder), out.getvalue()
+            )
+
+            # a task without the dictionary fails instead of numbering its own users
+            os.remove(path)
+            with self.assertRaises(subprocess.CalledProcessError):
+                self.execute(BUNDLES["raw-mapper.py"], text, folder)
+
+    def test_fold(self):
+        """
+        Should resolve the branches on pinned values and keep the others
+        """
+        source = (
+            "if self.metrics is not None and self.columns is None:\n    a()\n"
+            "if not self.fast_parse or self.sink.binary:\n    b()\nelse:\n    c()\n"
+            "if self.other:\n    d()\n"
+            "if metrics is None or other.metrics is None or self.sink.metrics is None:"
+            "\n    e()\n"
+        )
+        pins = {
+            "self.metrics": None,
+            "self.fast_parse": True,
+            "self.sink.binary": False,
+        }
+        tree = Folder(pins).visit(ast.parse(source))
+        self.assertEqual(
+            ast.unparse(tree),
+            "c()\nif self.other:\n    d()\n"
+            "if metrics is None or other.metrics is None or self.sink.metrics is None:"
+            "\n    e()",
+        )
+
+    def test_up_to_date(self):
+        """
+        The scripts in output/ should be the ones built from src (run main.py build)
+        """
+        for name, bundle in BUNDLES.items():
+            with open(os.path.join(ROOT, "output", name)) as f:
+                self.assertEqual(f.read(), build(bundle), f"output/{name} is stale")
@@ -0,0 +1,160 @@
+import io
+import os
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.exceptions.data import DataError
+from src.lib.canvas import BLANK, CanvasReplayer, line_chunks
+from src.lib.columnar import ColumnarData, convert
+from src.lib.moderation import ModerationIndex
+from src.mappers.user import UserMapper
+from src.schemas.data import ModerationRect
+
+FIRST_TS = UserMapper.first_ts
+
+
+class TestCanvasReplayer(unittest.TestCase):
+    """Test Suite for the replay of the canvas"""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        rng = random.Random(3)
+        self.rows = []
+        time = 0
+        for _ in range(3000):
+            time += rng.randrange(3)
+            x, y, color = rng.randrange(20), rng.randrange(20), rng.randrange(32)
+            self.rows.append((time, rng.randrange(50), x, y, color, 0))
+        # a pixel of the first rectangle, a mod row of the simplified csv
+        self.rows.append((1500, 0, 5, 5, 7, 1))
+        self.rows.sort(key=lambda row: row[0])
+
+        self.rectangles = [
+            ModerationRect(FIRST_TS + 1500, 5, 5, 9, 9, 7),
+            ModerationRect(FIRST_TS + 2400, 0, 0, 19, 3, 2),
+        ]
+        self.csv = "time,user_id,x,y,color,mod\n" + "".join(
+            ",".join(map(str, row)) + "\n" for row in self.rows
+        )
+        self.cache = os.path.join(self.folder.name, "table")
+        convert(io.StringIO(self.csv), self.cache)
+        self.data = ColumnarData(self.cache)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def replayer(self, **kwargs) -> CanvasReplayer:
+        kwargs.setdefault("interval", 500)
+        return CanvasReplayer(
+            os.path.join(self.folder.name, "snapshots"), self.data, **kwargs
+        )
+
+    def replay(self, timestamp: int, rectangles=None) -> np.ndarray:
+        canvas = CanvasReplayer.blank()
+        events = [
+            (FIRST_TS + time, 0, (x, y, x, y, color))
+            for time, _, x, y, color, mod in self.rows
+            if rectangles is None or not mod
+        ]
+        events += [
+            (rect.timestamp, 1, (rect.x1, rect.y1, rect.x2, rect.y2, rect.color))
+            for rect in rectangles or []
+        ]
+        for time, _, (x1, y1, x2, y2, color) in sorted(events, key=lambda e: e[:2]):
+            if time < timestamp:
+                canvas[y1 : y2 + 1, x1 : x2 + 1] = color
+        return canvas
+
+    def test_state_at(self):
+        """
+        Should give the canvas of a replay of every placement before the time
+        """
+        replayer = self.replayer()
+        # the 6 boundaries followed by placements, and the one after the last
+        self.assertEqual(replayer.build(), 7)
+        self.assertEqual(replayer.snapshots[0] % 500, 0)
+
+        for time in [-10, 0, 1, 499, 500, 501, 1500, 1501, 2222, 2999, 5000]:
+            state = replayer.state_at(FIRST_TS + time)
+            np.testing.assert_array_equal(state, self.replay(FIRST_TS + time))
+
+    def test_moderation(self):
+        """
+        Should paint the rectangles after the placements of their millisecond instead
+        of the mod rows
+        """
+        moderation = ModerationIndex(self.rectangles)
+        replayer = self.replayer(moderation=moderation)
+        replayer.build()
+
+        for time in [1500, 1501, 2400, 2401, 5000]:
+            state = replayer.state_at(FIRST_TS + time)
+            expected = self.replay(FIRST_TS + time, self.rectangles)
+            np.testing.assert_array_equal(state, expected)
+
+    def test_last_rectangle(self):
+        """
+        Should paint the last placements and a rectangle after them into a snapshot
+        """
+        rectangles = [*self.rectangles, ModerationRect(FIRST_TS + 4200, 2, 2, 12, 6, 9)]
+        replayer = self.replayer(moderation=ModerationIndex(rectangles))
+        replayer.build()
+
+        last = replayer.snapshots[-1]
+        self.assertEqual(last, (FIRST_TS + 4200) // 500 * 500 + 500)
+        np.testing.assert_array_equal(
+            replayer.load(last), self.replay(FIRST_TS + 5000, rectangles)
+        )
+        for time in [4200, 4201, 5000]:
+            state = replayer.state_at(FIRST_TS + time)
+            np.testing.assert_array_equal(
+                state, self.replay(FIRST_TS + time, rectangles)
+            )
+
+    def test_lines(self):
+        """
+        Should write the same snapshots from the csv lines, whatever the chunk size
+        """
+        replayer = self.replayer()
+        replayer.build()
+        lines = self.replayer(interval=500)
+        lines.folder = os.path.join(self.folder.name, "lines")
+        lines.build(line_chunks(io.StringIO(self.csv), size=700))
+
+        self.assertEqual(lines.snapshots, replayer.snapshots)
+        for timestamp in replayer.snapshots:
+            np.testing.assert_array_equal(
+                lines.load(timestamp), replayer.load(timestamp)
+            )
+
+    def test_last_wins(self):
+        """
+        Should keep the last color of a pixel placed several times in a block
+        """
+        canvas = CanvasReplayer.blank()
+        replayer = self.replayer()
+        chunk = {
+            "time": np.array([1, 2, 3]),
+            "x": np.array([4, 4, 4]),
+            "y": np.array([2, 2, 2]),
+            "color": np.array([5, 6, 7]),
+            "mod": np.array([0, 0, 0]),
+        }
+        replayer.paint(canvas, chunk, 0, 10)
+        self.assertEqual(canvas[2, 4], 7)
+        self.assertEqual(canvas[4, 2], BLANK)
+
+    def test_unordered(self):
+        """
+        Should refuse placements out of time order
+        """
+        lines = io.StringIO("time,user_id,x,y,color,mod\n5,0,1,1,1,0\n4,0,1,1,1,0\n")
+        with self.assertRaises(DataError):
+            self.replayer().build(line_chunks(lines))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import os
+import tempfile
+import unittest
+from io import StringIO
+
+import numpy as np
+
+from src.exceptions.data import DataError
+from src.lib.columnar import (
+    COLUMNS,
+    ColumnarData,
+    ColumnarSink,
+    convert,
+    create_columns,
+    is_cache,
+    write_columns,
+    write_meta,
+)
+from src.lib.data import read_data
+from src.lib.pipeline import run_pipeline
+from src.mappers.user import UserMapper
+from src.reducers.user import UserReducer
+from src.schemas.data import UserFeatures, UserMoveMapped
+
+
+class TestColumnar(unittest.TestCase):
+    """Test Suite for the memory mapped columnar cache"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self.tmp.name, "cache")
+        self.lines = ["time,user_id,x,y,color,mod"]
+        for i in range(100):
+            mod = int(i % 9 == 0)
+            self.lines.append(f"{i * 1000},{i % 7},{i},{1999 - i},{i % 32},{mod}")
+        self.text = "\n".join(self.lines) + "\n"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        """
+        Should keep every value, typed as the narrowest column type
+        """
+        rows = convert(StringIO(self.text), self.folder, chunksize=30)
+        self.assertEqual(rows, 100)
+        self.assertTrue(is_cache(self.folder))
+
+        data = ColumnarData(self.folder)
+        self.assertEqual(len(data), 100)
+        self.assertEqual(data["x"].dtype, np.dtype(COLUMNS["x"]))
+        self.assertEqual(data["y"][:3].tolist(), [1999, 1998, 1997])
+        self.assertEqual(data["time"][-1], 99000)
+
+        chunks = list(data.chunks(40, ["user_id"]))
+        self.assertEqual([len(chunk["user_id"]) for chunk in chunks], [40, 40, 20])
+
+        path = os.path.join(self.tmp.name, "sample.csv")
+        with open(path, "w") as f:
+            f.write(self.text)
+        expected = read_data("sample.csv", folder=self.tmp.name)
+        frame = read_data("cache", folder=self.tmp.name)
+        self.assertEqual(
+            frame.astype(np.int64).values.tolist(), expected.values.tolist()
+        )
+
+    def test_write_columns(self):
+        """
+        Should read arrays written from memory as a cache of their own types
+        """
+        columns = {
+            "start": np.arange(5, dtype=np.int64),
+            "flag": np.array([1, 0, 1, 0, 1], dtype=np.int8),
+        }
+        write_columns(self.folder, columns)
+
+        data = ColumnarData(self.folder)
+        self.assertEqual(data.columns, ["start", "flag"])
+        for name, values in columns.items():
+            self.assertEqual(data[name].dtype, values.dtype)
+            np.testing.assert_array_equal(data[name], values)
+
+        with self.assertRaises(DataError):
+            write_columns(self.folder, {"a": np.arange(2), "b": np.arange(3)})
+
+    def test_create_columns(self):
+        """
+        Should read columns filled in place once their metadata is written
+        """
+        columns = create_columns(self.folder, {"a": "<i8", "b": "<i1"}, 4)
+        self.assertFalse(is_cache(self.folder))
+        columns["a"][[3, 0]] = [30, 1]
+        columns["b"][:] = 2
+        for column in columns.values():
+            column.flush()
+        write_meta(self.folder, 4, {"a": "<i8", "b": "<i1"})
+
+        data = ColumnarData(self.folder)
+        np.testing.assert_array_equal(data["a"], [1, 0, 0, 30])
+        np.testing.assert_array_equal(data["b"], [2, 2, 2, 2])
+
+    def test_sink(self):
+        """
+        Should write the records as columns of their own types, at their index
+        """
+        sink = ColumnarSink(self.folder, index="user_id")
+        for user_id in (3, 0, 5):
+            sink.write_record(
+                UserFeatures(user_id, 70000, 1 << 40, 0.5, 0, 1.25, 0, 1, 0, 1, 2, 0.5)
+            )
+        sink.close()
+
+        data = ColumnarData(self.folder)
+        self.assertEqual(len(data), 6)
+        self.assertEqual(data["user_id"].tolist(), [0, 0, 0, 3, 0, 5])
+        self.assertEqual(data["moves"].dtype, np.dtype("<i4"))
+        self.assertEqual(data["span"].dtype, np.dtype("<i8"))
+        self.assertEqual(data["x_max"].dtype, np.dtype("<i1"))
+        self.assertEqual(data["color_entropy"].tolist(), [1.25, 0, 0, 1.25, 0, 1.25])
+
+        sink = ColumnarSink(self.folder, index="user_id")
+        sink.write_record(UserMoveMapped(1, 2, 1))
+        sink.write_record(UserMoveMapped(1, 3, 1))
+        with self.assertRaises(DataError):
+            sink.close()
+        with self.assertRaises(DataError):
+            sink.write("1\t2\t1")
+
+    def test_overflow(self):
+        """
+        Should raise a DataError when a value does not fit its column type and leave
+        no cache behind
+        """
+        with self.assertRaises(DataError):
+            convert(StringIO(self.text + "0,0,40000,0,0,0\n"), self.folder)
+        self.assertFalse(is_cache(self.folder))
+
+    def test_user_mapper(self):
+        """
+        The user flow should give the same result from the cache as from the csv
+        """
+        convert(StringIO(self.text), self.folder)
+        flows = [(UserMapper(), UserReducer())]
+
+        self.assertEqual(
+            list(run_pipeline(flows, ColumnarData(self.folder), columns=True)),
+            list(run_pipeline(flows, self.lines)),
+        )
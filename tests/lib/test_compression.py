@@ -0,0 +1,122 @@
+import io
+import os
+import bz2
+import gzip
+import time
+import tempfile
+import threading
+import unittest
+
+from src.exceptions.data import DataError
+from src.lib.compression import ThreadedReader, detect_compression, open_input
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class FailingStream(io.BytesIO):
+    def read(self, size=-1):
+        raise OSError("disk went away")
+
+
+class TestCompression(unittest.TestCase):
+    """Test Suite for the transparent decompression of the input"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.text = "".join(f"{i},{i % 7},1,2,3,0\n" for i in range(5000))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def assertReads(self, path: str, compression):
+        self.assertEqual(detect_compression(path), compression)
+        for threaded in (True, False):
+            with open_input(path, threaded=threaded, buffer_size=1000) as source:
+                self.assertEqual(source.read(), self.text)
+
+    def test_plain(self):
+        """
+        Should read plain files as they are
+        """
+        self.assertReads(self.write("plain.gz", self.text.encode()), None)
+
+    def test_gzip_and_bz2(self):
+        """
+        Should detect gzip and bz2 by their magic bytes, whatever the extension
+        """
+        data = self.text.encode()
+        self.assertReads(self.write("data.csv.gzip", gzip.compress(data)), "gzip")
+        self.assertReads(self.write("data.csv", bz2.compress(data)), "bz2")
+
+    @unittest.skipIf(zstandard is None, "zstandard is not installed")
+    def test_zstd(self):
+        """
+        Should decompress zstd files when zstandard is installed
+        """
+        data = zstandard.ZstdCompressor().compress(self.text.encode())
+        self.assertReads(self.write("data.zst", data), "zstd")
+
+    @unittest.skipIf(zstandard is not None, "zstandard is installed")
+    def test_zstd_missing(self):
+        """
+        Should raise a DataError for zstd files without zstandard
+        """
+        path = self.write("data.zst", b"\x28\xb5\x2f\xfd" + bytes(10))
+        with self.assertRaises(DataError):
+            open_input(path)
+
+    def test_pipe(self):
+        """
+        Should detect the compression of a pipe without losing its first bytes
+        """
+        for data in (self.text.encode(), gzip.compress(self.text.encode())):
+            read, write = os.pipe()
+
+            def feed():
+                with os.fdopen(write, "wb") as f:
+                    f.write(data)
+
+            writer = threading.Thread(target=feed)
+            writer.start()
+            with open_input(f"/dev/fd/{read}") as source:
+                self.assertEqual(source.read(), self.text)
+            writer.join()
+            os.close(read)
+
+    def test_short_read(self):
+        """
+        Should detect the compression of a pipe whose first read is shorter than the
+        magic bytes
+        """
+        data = gzip.compress(self.text.encode())
+        read, write = os.pipe()
+
+        def feed():
+            with os.fdopen(write, "wb", buffering=0) as f:
+                f.write(data[:1])
+                time.sleep(0.2)
+                f.write(data[1:])
+
+        writer = threading.Thread(target=feed)
+        writer.start()
+        with open_input(f"/dev/fd/{read}") as source:
+            self.assertEqual(source.read(), self.text)
+        writer.join()
+        os.close(read)
+
+    def test_thread_error(self):
+        """
+        Errors of the reading thread should be raised by the reader
+        """
+        with self.assertRaises(OSError):
+            with io.BufferedReader(ThreadedReader(FailingStream())) as reader:
+                reader.read()
@@ -0,0 +1,100 @@
+import os
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.exceptions.data import DataError
+from src.lib.columnar import convert
+from src.lib.history import PixelHistory
+from src.mappers.user import UserMapper
+
+
+class TestPixelHistory(unittest.TestCase):
+    """Test Suite for the per pixel index of the placements"""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        rng = random.Random(5)
+        self.rows = []
+        time = 0
+        for _ in range(5000):
+            time += rng.randrange(3)
+            x, y = rng.choice([0, 1, 7, 1999]), rng.choice([0, 3, 1999])
+            self.rows.append((time, rng.randrange(100), x, y, rng.randrange(32), 0))
+        self.csv = self.path("table.csv")
+        with open(self.csv, "w") as f:
+            f.write("time,user_id,x,y,color,mod\n")
+            f.writelines(",".join(map(str, row)) + "\n" for row in self.rows)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.folder.name, name)
+
+    def check(self, index: PixelHistory):
+        self.assertEqual(len(index), len(self.rows))
+        for x in [0, 1, 2, 7, 1999]:
+            for y in [0, 3, 4, 1999]:
+                # the build keeps the order of the rows of the same millisecond
+                rows = sorted(
+                    (row for row in self.rows if row[2] == x and row[3] == y),
+                    key=lambda row: row[0],
+                )
+                history = index.history(x, y)
+                self.assertEqual(index.count(x, y), len(rows))
+                np.testing.assert_array_equal(
+                    history["time"], [row[0] + UserMapper.first_ts for row in rows]
+                )
+                np.testing.assert_array_equal(
+                    history["user_id"], [row[1] for row in rows]
+                )
+                np.testing.assert_array_equal(
+                    history["color"], [row[4] for row in rows]
+                )
+
+    def test_history(self):
+        """
+        Should give the placements of a pixel in time order, in chunks or not
+        """
+        self.check(PixelHistory.build(self.csv, self.path("index"), chunksize=333))
+        self.check(PixelHistory.build(self.csv, self.path("whole")))
+
+    def test_cache(self):
+        """
+        Should index a columnar cache like its csv, and load the index again
+        """
+        convert(self.csv, self.path("table"))
+        PixelHistory.build(self.path("table"), self.path("index"), chunksize=1000)
+        self.check(PixelHistory(self.path("index")))
+
+    def test_shuffled(self):
+        """
+        Should sort the placements of every pixel when the rows are not in time order
+        """
+        random.Random(7).shuffle(self.rows)
+        with open(self.csv, "w") as f:
+            f.write("time,user_id,x,y,color,mod\n")
+            f.writelines(",".join(map(str, row)) + "\n" for row in self.rows)
+
+        self.check(PixelHistory.build(self.csv, self.path("index"), chunksize=333))
+        self.check(PixelHistory.build(self.csv, self.path("whole")))
+
+    def test_errors(self):
+        """
+        Should refuse pixels out of the canvas
+        """
+        index = PixelHistory.build(self.csv, self.path("index"))
+        with self.assertRaises(DataError):
+            index.history(2000, 0)
+
+        with open(self.path("bad.csv"), "w") as f:
+            f.write("time,user_id,x,y,color,mod\n5,0,2000,1,1,0\n")
+        with self.assertRaises(DataError):
+            PixelHistory.build(self.path("bad.csv"), self.path("bad"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import base64
+import os
+import tempfile
+import unittest
+
+from src.exceptions.data import DataError
+from src.lib.ids import IdDictionary, key_of
+
+
+class TestIdDictionary(unittest.TestCase):
+    """Test Suite for the user id dictionary"""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, "users.ids")
+        self.users = [f"user-{i}" for i in range(5000)]
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_dense_ids(self):
+        """
+        Should give ids in order of first appearance and the same id again after
+        """
+        ids = IdDictionary(capacity=4)
+        self.assertEqual([ids.intern(user) for user in self.users], list(range(5000)))
+        self.assertEqual([ids.intern(user) for user in self.users], list(range(5000)))
+        self.assertEqual(len(ids), 5000)
+        self.assertGreater(ids.capacity, 5000)
+        self.assertIsNone(ids.get("someone else"))
+
+    def test_dataset_hashes(self):
+        """
+        Should key base64 digests by their first 8 bytes, anything else by a hash
+        """
+        user = "yTrYCd4LUpBn4rIyNXkkW2+Fac5cQHK2lsDpNghkq0oPu9o//8oPZPlLM4CXQeEIId7S9KqC1ETDNW/vm/hxXQ=="
+        digest = base64.b64decode(user)
+        self.assertEqual(key_of(user), int.from_bytes(digest[:8], "little"))
+        self.assertNotEqual(key_of("a"), key_of("b"))
+        self.assertEqual(key_of("a"), key_of("a"))
+
+    def test_save_load(self):
+        """
+        Should load the same ids from the file, frozen unless asked otherwise
+        """
+        ids = IdDictionary()
+        for user in self.users:
+            ids.intern(user)
+        ids.save(self.path)
+
+        loaded = IdDictionary.load(self.path)
+        self.assertTrue(loaded.frozen)
+        self.assertEqual(len(loaded), 5000)
+        self.assertEqual(
+            [loaded.intern(user) for user in self.users], list(range(5000))
+        )
+        with self.assertRaises(DataError):
+            loaded.intern("new user")
+
+        extended = IdDictionary.load(self.path, frozen=False)
+        self.assertEqual(extended.intern("new user"), 5000)
+        self.assertEqual(extended.intern(self.users[42]), 42)
+
+    def test_invalid_file(self):
+        """
+        Should refuse files that are not a whole dictionary
+        """
+        with open(self.path, "wb") as f:
+            f.write(b"time,user_id,x,y,color,mod\n" * 10)
+        with self.assertRaises(DataError):
+            IdDictionary.load(self.path)
+
+        IdDictionary().save(self.path)
+        with open(self.path, "r+b") as f:
+            f.truncate(100)
+        with self.assertRaises(DataError):
+            IdDictionary.load(self.path)
@@ -0,0 +1,138 @@
+import os
+import sys
+import tempfile
+import subprocess
+import unittest
+
+from src.combiners.user import UserCombiner
+from src.exceptions.data import LineFormatError
+from src.lib.binary import BinaryFileSink
+from src.lib.local import partition_of, read_range, run_local, split_ranges
+from src.lib.output import ListSink
+from src.lib.pipeline import run_pipeline
+from src.mappers.quantity import QuantityMapper
+from src.mappers.user import UserMapper
+from src.reducers.quantity import QuantityReducer
+from src.reducers.user import UserReducer
+
+
+class TestLocal(unittest.TestCase):
+    """Test Suite for the multi-core local mode"""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, "table.csv")
+
+        self.lines = ["time,user_id,x,y,color,mod"]
+        for i in range(500):
+            user_id = [0, 3, 9, 12, 27][i % 5]
+            self.lines.append(f"{i * 60000},{user_id},{i % 2000},{i},{i % 32},0")
+
+        with open(self.path, "w") as f:
+            f.write("\n".join(self.lines) + "\n")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_ranges_cover_every_line_once(self):
+        """
+        Ranges should be aligned on new lines and cover the whole file
+        """
+        for parts in (1, 2, 7, 64):
+            ranges = split_ranges(self.path, parts)
+            lines = [
+                line
+                for start, end in ranges
+                for line in read_range(self.path, start, end)
+            ]
+            self.assertEqual(lines, self.lines)
+
+    def test_same_output_as_pipeline(self):
+        """
+        Should give the same output as the single process pipeline
+        """
+        flows = [(UserMapper(), UserReducer()), (QuantityMapper(), QuantityReducer())]
+        expected = [
+            QuantityReducer().format_record(record)
+            for record in run_pipeline(flows, self.lines)
+        ]
+        self.assertNotEqual(expected, [])
+
+        sink = ListSink()
+        run_local(
+            self.path,
+            [
+                (UserMapper, UserReducer, UserCombiner),
+                (QuantityMapper, QuantityReducer, None),
+            ],
+            sink,
+            workers=3,
+        )
+
+        self.assertEqual(sink.lines, expected)
+
+    def test_binary_input(self):
+        """
+        Should split binary records in whole records, like the pipeline reads them
+        """
+        records = list(run_pipeline([(UserMapper(), UserReducer())], self.lines))
+        path = os.path.join(self.folder.name, "users.bin")
+        sink = BinaryFileSink(path)
+        for record in records:
+            sink.write_record(record)
+        sink.close()
+
+        flows = [(QuantityMapper(), QuantityReducer())]
+        expected = [
+            QuantityReducer().format_record(record)
+            for record in run_pipeline(flows, records, parsed=True)
+        ]
+        self.assertNotEqual(expected, [])
+
+        sink = ListSink()
+        run_local(
+            path,
+            [(QuantityMapper, QuantityReducer, None)],
+            sink,
+            workers=3,
+            input_format="binary",
+        )
+        self.assertEqual(sink.lines, expected)
+
+    def test_worker_error(self):
+        """
+        Should raise the error of a worker instead of waiting for it forever
+        """
+        with open(self.path, "a") as f:
+            f.write("1,2,,4,5,0\n")
+
+        with self.assertRaises(LineFormatError) as raised:
+            run_local(
+                self.path,
+                [(UserMapper, UserReducer, None)],
+                ListSink(),
+                workers=2,
+            )
+        self.assertEqual(raised.exception.data, "1,2,,4,5,0")
+
+    def test_partition_of(self):
+        """
+        Should partition str keys the same way in every interpreter
+        """
+        keys = ["a", "user", "9c4f", ""]
+        code = (
+            "from src.lib.local import partition_of;"
+            f"print([partition_of(key, 7) for key in {keys!r}])"
+        )
+        outputs = {
+            subprocess.run(
+                [sys.executable, "-c", code],
+                env={**os.environ, "PYTHONHASHSEED": seed},
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            for seed in ["1", "2", "3"]
+        }
+        self.assertEqual(outputs, {f"{[partition_of(key, 7) for key in keys]}\n"})
+        self.assertEqual(partition_of(12, 5), 2)
@@ -0,0 +1,235 @@
+import os
+import json
+import tempfile
+import unittest
+from io import StringIO
+
+from src.exceptions.data import LineFormatError
+from src.lib.columnar import ColumnarData, convert
+from src.lib.local import run_local
+from src.lib.metrics import Metrics
+from src.lib.output import ListSink, Sink
+from src.lib.pipeline import run_pipeline
+from src.lib.vectorized import aggregate_users, quantity_records
+from src.mappers.quantity import QuantityMapper
+from src.mappers.timeline import TimelineMapper
+from src.mappers.user import UserMapper
+from src.reducers.cooldown import CooldownReducer
+from src.reducers.quantity import QuantityReducer
+from src.reducers.user import UserReducer
+from src.combiners.user import UserCombiner
+
+
+class TestMetrics(unittest.TestCase):
+    """Test Suite for the stage instrumentation"""
+
+    def setUp(self):
+        self.lines = ["time,user_id,x,y,color,mod"]
+        for i in range(40):
+            self.lines.append(f"{i * 300000},{i % 4},1,2,3,{int(i % 10 == 0)}")
+        self.text = "\n".join(self.lines) + "\n"
+
+    def run_mapper(self, metrics: Metrics) -> str:
+        mapper = UserMapper()
+        mapper.source = StringIO(self.text)
+        mapper.sink = Sink(StringIO())
+        mapper.metrics = metrics
+        mapper.run()
+        return mapper.sink.stream.getvalue()  # type: ignore[attr-defined]
+
+    def test_json_summary(self):
+        """
+        Should count the input, emitted and skipped (header and mod) records and write a
+        json summary on exit, without changing the output
+        """
+        stream = StringIO()
+        output = self.run_mapper(Metrics("user-mapper", stream=stream))
+
+        mapper = UserMapper()
+        mapper.source = StringIO(self.text)
+        mapper.sink = Sink(StringIO())
+        mapper.run()
+        self.assertEqual(output, mapper.sink.stream.getvalue())  # type: ignore
+
+        summary = json.loads(stream.getvalue())
+        self.assertEqual(summary["stage"], "user-mapper")
+        self.assertEqual(
+            summary["counters"],
+            {"input": 41, "emitted": 36, "skipped": 5, "errored": 0},
+        )
+        self.assertEqual(set(summary["seconds"]), {"parse", "compute", "emit", "total"})
+
+    def test_hadoop_counters(self):
+        """
+        Should write the increments since the previous report as hadoop counters
+        """
+        stream = StringIO()
+        metrics = Metrics("user-mapper", format="hadoop", stream=stream)
+        metrics.count("input", 3)
+        metrics.report()
+        metrics.count("input", 2)
+        metrics.count("errored")
+        metrics.close()
+
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(lines[0], "reporter:counter:user-mapper,input,3")
+        self.assertIn("reporter:counter:user-mapper,input,2", lines)
+        self.assertIn("reporter:counter:user-mapper,errored,1", lines)
+        self.assertTrue(lines[-1].startswith("reporter:status:user-mapper"))
+
+    def test_errored(self):
+        """
+        Should count the record that failed and still report on exit
+        """
+        stream = StringIO()
+        reducer = QuantityReducer()
+        reducer.source = StringIO("1\t2\t3\t4\nbad\n")
+        reducer.sink = Sink(StringIO())
+        reducer.metrics = Metrics("quantity-reducer", stream=stream)
+
+        with self.assertRaises(LineFormatError):
+            reducer.run()
+
+        counters = json.loads(stream.getvalue())["counters"]
+        self.assertEqual(counters["input"], 2)
+        self.assertEqual(counters["errored"], 1)
+        self.assertEqual(counters["skipped"], 1)
+
+    def test_value_error(self):
+        """
+        Should count the records whose fields int() cannot convert as errored
+        """
+        stream = StringIO()
+        self.text += "0,1,2,3,4,\u00b2\n"
+        with self.assertRaises(ValueError):
+            self.run_mapper(Metrics("user-mapper", stream=stream))
+
+        counters = json.loads(stream.getvalue())["counters"]
+        self.assertEqual(counters["input"], 42)
+        self.assertEqual(counters["errored"], 1)
+
+    def test_columnar(self):
+        """
+        Should count the rows of a columnar input like the lines of its csv
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            convert(StringIO(self.text), os.path.join(folder, "cache"))
+            data = ColumnarData(os.path.join(folder, "cache"))
+            for mapper in (UserMapper(), TimelineMapper()):
+                stream = StringIO()
+                mapper.columns = data
+                mapper.sink = Sink(StringIO())
+                mapper.metrics = Metrics("mapper", stream=stream)
+                mapper.run()
+
+                counters = json.loads(stream.getvalue())["counters"]
+                self.assertEqual(
+                    counters, {"input": 40, "emitted": 36, "skipped": 4, "errored": 0}
+                )
+                self.assertEqual(len(mapper.sink.stream.getvalue().splitlines()), 36)
+
+    def test_pipeline(self):
+        """
+        Should count the records of every stage of a pipeline
+        """
+        metrics = Metrics("pipeline", stream=StringIO())
+        flows = [(UserMapper(), UserReducer()), (QuantityMapper(), QuantityReducer())]
+        records = list(run_pipeline(flows, self.lines, metrics=metrics))
+
+        self.assertEqual(metrics.counters["input"], 41)
+        self.assertEqual(metrics.counters["UserMapper"], 36)
+        self.assertEqual(metrics.counters["UserReducer"], 4)
+        self.assertEqual(metrics.counters["emitted"], len(records))
+        self.assertTrue(all(value >= 0 for value in metrics.seconds.values()))
+
+        # the mapper counts its own records, not the ones of the combiner
+        metrics = Metrics("pipeline", stream=StringIO())
+        flows = [(UserMapper(), UserReducer())]
+        list(
+            run_pipeline(flows, self.lines, combiners=[UserCombiner()], metrics=metrics)
+        )
+        self.assertEqual(metrics.counters["UserMapper"], 36)
+        self.assertEqual(metrics.counters["UserCombiner"], 4)
+
+    def test_pipeline_skipped(self):
+        """
+        Should count what the mappers and the filtering reducers of a pipeline drop,
+        the same in every engine
+        """
+        metrics = Metrics("pipeline", stream=StringIO())
+        flows = [(UserMapper(), UserReducer()), (QuantityMapper(), QuantityReducer())]
+        records = list(run_pipeline(flows, self.lines, metrics=metrics))
+        expected = {
+            "input": 41,
+            "emitted": len(records),
+            # the header, the mod rows and the users of the quantity reducer
+            "skipped": 5 + 4 - len(records),
+            "errored": 0,
+        }
+        self.assertEqual({name: metrics.counters[name] for name in expected}, expected)
+
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "table.csv")
+            with open(path, "w") as f:
+                f.write(self.text)
+            metrics = Metrics("local", stream=StringIO())
+            run_local(
+                path,
+                [
+                    (UserMapper, UserReducer, UserCombiner),
+                    (QuantityMapper, QuantityReducer, None),
+                ],
+                ListSink(),
+                workers=2,
+                metrics=metrics,
+            )
+            self.assertEqual(metrics.counters, expected)
+
+            convert(StringIO(self.text), os.path.join(folder, "cache"))
+            data = ColumnarData(os.path.join(folder, "cache"))
+            metrics = Metrics("pipeline", stream=StringIO())
+            flows = [
+                (UserMapper(), UserReducer()),
+                (QuantityMapper(), QuantityReducer()),
+            ]
+            self.assertEqual(
+                list(run_pipeline(flows, data, columns=True, metrics=metrics)), records
+            )
+            # a cache has no header
+            self.assertEqual(metrics.counters["input"], 40)
+            self.assertEqual(metrics.counters["skipped"], expected["skipped"] - 1)
+
+        metrics = Metrics("vectorized", stream=StringIO())
+        table = aggregate_users(
+            StringIO(self.text), first_ts=UserMapper.first_ts, metrics=metrics
+        )
+        self.assertEqual(len(list(quantity_records(table, metrics))), len(records))
+        self.assertEqual(metrics.counters["input"], 40)
+        self.assertEqual(metrics.counters["skipped"], expected["skipped"] - 1)
+
+    def test_pipeline_errored(self):
+        """
+        Should count the record a pipeline failed on
+        """
+        metrics = Metrics("pipeline", stream=StringIO())
+        flows = [(UserMapper(), UserReducer())]
+        with self.assertRaises(LineFormatError):
+            list(run_pipeline(flows, self.lines + ["1,2,,4,5,0"], metrics=metrics))
+        self.assertEqual(metrics.counters["errored"], 1)
+
+    def test_timeline_skipped(self):
+        """
+        Should count the users a filtering timeline reducer drops as skipped
+        """
+        stream = StringIO()
+        reducer = CooldownReducer(min_moves=3)
+        lines = ["1\t1000", "1\t2000", "2\t1000", "2\t2000", "2\t3000"]
+        reducer.source = StringIO("\n".join(lines) + "\n")
+        reducer.sink = Sink(StringIO())
+        reducer.metrics = Metrics("cooldown-reducer", stream=stream)
+        reducer.run()
+
+        counters = json.loads(stream.getvalue())["counters"]
+        self.assertEqual(counters["input"], 5)
+        self.assertEqual(counters["emitted"], 1)
+        self.assertEqual(counters["skipped"], 1)
@@ -0,0 +1,97 @@
+import os
+import random
+import tempfile
+import unittest
+
+from src.lib.columnar import is_cache
+from src.lib.moderation import ModerationIndex
+from src.schemas.data import ModerationRect
+
+
+class TestModerationIndex(unittest.TestCase):
+    """Test Suite for the index of moderation rectangles"""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        rng = random.Random(7)
+        self.rectangles = []
+        for _ in range(200):
+            x1, y1 = rng.randrange(100), rng.randrange(100)
+            self.rectangles.append(
+                ModerationRect(
+                    timestamp=rng.randrange(1000),
+                    x1=x1,
+                    y1=y1,
+                    x2=x1 + rng.randrange(30),
+                    y2=y1 + rng.randrange(30),
+                    color=rng.randrange(32),
+                )
+            )
+        self.index = ModerationIndex(self.rectangles)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def scan(self, x: int, y: int, timestamp: int):
+        latest = None
+        for rect in sorted(self.rectangles, key=lambda rect: rect.timestamp):
+            if rect.timestamp <= timestamp and rect.x1 <= x <= rect.x2:
+                if rect.y1 <= y <= rect.y2:
+                    latest = rect
+        return latest
+
+    def test_covering(self):
+        """
+        Should find the latest rectangle over a pixel like a scan of all of them
+        """
+        rng = random.Random(11)
+        for _ in range(2000):
+            x, y, t = (
+                rng.randrange(-5, 135),
+                rng.randrange(-5, 135),
+                rng.randrange(1100),
+            )
+            self.assertEqual(self.index.covering(x, y, t), self.scan(x, y, t))
+
+    def test_edges(self):
+        """
+        Should include both corners and the millisecond of the rectangle
+        """
+        index = ModerationIndex([ModerationRect(100, 10, 20, 12, 25, 3)])
+        self.assertEqual(index.covering(10, 20, 100).color, 3)
+        self.assertEqual(index.covering(12, 25, 100).color, 3)
+        self.assertIsNone(index.covering(13, 25, 100))
+        self.assertIsNone(index.covering(12, 26, 100))
+        self.assertIsNone(index.covering(10, 20, 99))
+
+        self.assertTrue(index.overwritten(11, 21, 50, 150))
+        self.assertFalse(index.overwritten(11, 21, 100, 150))
+        self.assertIsNone(ModerationIndex([]).covering(0, 0, 0))
+
+    def test_between(self):
+        """
+        Should give the rectangles of a time range in time order
+        """
+        rects = list(self.index.between(200, 400))
+        self.assertEqual(
+            rects,
+            sorted(
+                (rect for rect in self.rectangles if 200 <= rect.timestamp < 400),
+                key=lambda rect: rect.timestamp,
+            ),
+        )
+
+    def test_save_load(self):
+        """
+        Should answer the same after a round trip through a columnar cache
+        """
+        folder = os.path.join(self.folder.name, "mods")
+        self.index.save(folder)
+        self.assertTrue(is_cache(folder))
+
+        loaded = ModerationIndex.load(folder)
+        self.assertEqual(len(loaded), 200)
+        self.assertEqual(
+            list(loaded.between(0, 1000)), list(self.index.between(0, 1000))
+        )
+        self.assertEqual(loaded.covering(50, 50, 500), self.index.covering(50, 50, 500))
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from src.lib.output import FileSink, ListSink, Sink
+from src.mappers.user import UserMapper
+from src.reducers.user import UserReducer
+
+
+class TestSink(unittest.TestCase):
+    """Test Suite for output sinks"""
+
+    def test_write_through_outside_buffered(self):
+        """
+        Outside of a buffered block every line should be written right away
+        """
+        out = StringIO()
+        sink = Sink(out)
+        sink.write("a")
+        self.assertEqual(out.getvalue(), "a\n")
+
+    def test_batches_inside_buffered(self):
+        """
+        Inside a buffered block lines should be written every buffer_size lines
+        and the rest on exit
+        """
+        out = StringIO()
+        sink = Sink(out, buffer_size=2)
+        with sink.buffered():
+            sink.write("a")
+            self.assertEqual(out.getvalue(), "")
+            sink.write("b")
+            self.assertEqual(out.getvalue(), "a\nb\n")
+            sink.write("c")
+            self.assertEqual(out.getvalue(), "a\nb\n")
+        self.assertEqual(out.getvalue(), "a\nb\nc\n")
+
+    def test_defaults_to_current_stdout(self):
+        """
+        Without a stream it should write to whatever sys.stdout is at write time
+        """
+        sink = Sink()
+        with patch("sys.stdout", new=StringIO()) as out:
+            sink.write("a")
+            self.assertEqual(out.getvalue(), "a\n")
+
+    def test_file_sink(self):
+        """
+        FileSink should write every line to the file once closed
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "out.tsv")
+            sink = FileSink(path)
+            with sink.buffered():
+                sink.write("a")
+                sink.write("b")
+            sink.close()
+
+            with open(path) as f:
+                self.assertEqual(f.read(), "a\nb\n")
+
+    def test_list_sink_on_mapper_and_reducer(self):
+        """
+        Mappers and reducers should write their results to the configured sink
+        """
+        mapper = UserMapper()
+        mapper.sink = ListSink()
+        mapper.source = StringIO("0,2,3,4,5,0\n1,2,3,4,5,0\n")
+        mapper.run()
+
+        reducer = UserReducer()
+        reducer.sink = ListSink()
+        reducer.source = StringIO("\n".join(mapper.sink.lines))
+        reducer.run()
+
+        first_ts = mapper.first_ts
+        self.assertEqual(
+            mapper.sink.lines, [f"2\t{first_ts}\t1", f"2\t{first_ts + 1}\t1"]
+        )
+        self.assertEqual(reducer.sink.lines, [f"2\t{first_ts}#{first_ts + 1}\t2"])
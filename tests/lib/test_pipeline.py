@@ -0,0 +1,80 @@
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from src.lib.pipeline import run_pipeline
+from src.lib.sort import sort_lines
+from src.mappers.quantity import QuantityMapper
+from src.mappers.user import UserMapper
+from src.reducers.quantity import QuantityReducer
+from src.reducers.user import UserReducer
+
+
+class TestPipeline(unittest.TestCase):
+    """Test Suite for the in-process pipeline"""
+
+    def setUp(self):
+        rows = ["time,user_id,x,y,color,mod"]
+        for i in range(60):
+            user_id = (i // 10) * 4
+            rows.append(f"{i * 300000},{user_id},{i},{i},{i % 32},{int(i % 17 == 0)}")
+        self.text = "\n".join(rows) + "\n"
+
+    def run_shell(self) -> str:
+        """
+        Emulates `mapper | main.py --sort | reducer | mapper | reducer` through text
+        """
+        stages = [
+            UserMapper(),
+            "sort",
+            UserReducer(),
+            QuantityMapper(),
+            QuantityReducer(),
+        ]
+        text = self.text
+        for stage in stages:
+            if stage == "sort":
+                text = "".join(line + "\n" for line in sort_lines(text.splitlines()))
+                continue
+            with patch("sys.stdout", new=StringIO()) as out:
+                stage.source = StringIO(text)
+                stage.run()
+                text = out.getvalue()
+        return text
+
+    def test_same_output_as_shell(self):
+        """
+        Running the chain in a single process should give the exact same text
+        """
+        flows = [(UserMapper(), UserReducer()), (QuantityMapper(), QuantityReducer())]
+        reducer = flows[-1][1]
+
+        mapper = flows[0][0]
+        mapper.source = StringIO(self.text)
+        result = "".join(
+            reducer.format_record(record) + "\n"
+            for record in run_pipeline(flows, mapper.lines())
+        )
+
+        self.assertNotEqual(result, "")
+        self.assertEqual(result, self.run_shell())
+
+    def test_single_flow(self):
+        """
+        A single flow should behave like mapper | sort | reducer, with numeric keys
+        """
+        base_ts = UserMapper().first_ts
+        lines = ["0,1,0,0,0,0", "5,10,0,0,0,0", "3,1,0,0,0,0", "7,9,0,0,0,0"]
+        result = [
+            UserReducer().format_record(record)
+            for record in run_pipeline([(UserMapper(), UserReducer())], lines)
+        ]
+
+        self.assertEqual(
+            result,
+            [
+                f"1\t{base_ts}#{base_ts + 3}\t2",
+                f"9\t{base_ts + 7}#{base_ts + 7}\t1",
+                f"10\t{base_ts + 5}#{base_ts + 5}\t1",
+            ],
+        )
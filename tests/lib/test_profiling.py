@@ -0,0 +1,62 @@
+import os
+import pstats
+import tempfile
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from src.lib.profiling import ProfileConfig, profiled
+
+
+def busy() -> int:
+    return sum(i * i for i in range(300_000))
+
+
+class TestProfiling(unittest.TestCase):
+    """Test Suite for the profiler hook"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def profile(self, mode: str) -> str:
+        config = ProfileConfig(mode=mode, folder=self.tmp.name, interval=0.001)
+        with patch("sys.stdout", new=StringIO()) as out:
+            with patch("sys.stderr", new=StringIO()):
+                with profiled(config, "stage"):
+                    for _ in range(5):
+                        busy()
+            self.assertEqual(out.getvalue(), "", "Profiling should not touch stdout")
+        return config.path("stage")
+
+    def test_sampling(self):
+        """
+        Should write collapsed stacks, root frame first and a count at the end
+        """
+        path = self.profile("sampling")
+        self.assertTrue(os.path.basename(path).startswith(f"stage-{os.getpid()}"))
+
+        with open(path) as f:
+            lines = f.read().splitlines()
+
+        self.assertNotEqual(lines, [])
+        stack, count = lines[0].rsplit(" ", 1)
+        self.assertTrue(count.isdigit())
+        self.assertTrue(any("busy (test_profiling.py" in line for line in lines))
+
+    def test_cprofile(self):
+        """
+        Should write a pstats file
+        """
+        stats = pstats.Stats(self.profile("cprofile"))
+        self.assertTrue(any(name == "busy" for _, _, name in stats.stats))
+
+    def test_disabled(self):
+        """
+        Should do nothing without a config
+        """
+        with profiled(None, "stage"):
+            busy()
+        self.assertEqual(os.listdir(self.tmp.name), [])
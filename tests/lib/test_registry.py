@@ -0,0 +1,76 @@
+import os
+import sys
+import tempfile
+import subprocess
+import unittest
+from unittest.mock import patch
+
+from src.lib import registry
+
+ROOT: str = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestRegistry(unittest.TestCase):
+    """Test Suite for the lazy flow registry"""
+
+    def test_builtin_flows(self):
+        """
+        Every registered path should resolve to a class
+        """
+        for name in registry.flow_names():
+            flow = registry.get_flow(name)
+            for path in filter(None, (flow.mapper, flow.reducer, flow.combiner)):
+                self.assertTrue(isinstance(registry.load(path), type), path)
+
+    def test_plugin(self):
+        """
+        Modules in MDP_FLOWS should be able to register flows
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, "my_flows.py"), "w") as f:
+                f.write(
+                    "from src.lib.registry import register_flow\n"
+                    "register_flow('mine', 'src.mappers.quantity:QuantityMapper', "
+                    "'src.reducers.quantity:QuantityReducer')\n"
+                )
+            with patch.dict(os.environ, {registry.PLUGINS_VARIABLE: "my_flows"}):
+                with patch.object(sys, "path", [folder, *sys.path]):
+                    with patch.object(registry, "_plugins_loaded", False):
+                        with patch.dict(registry.FLOWS):
+                            self.assertIsNone(registry.FLOWS.get("mine"))
+                            flow = registry.get_flow("mine")
+                            self.assertEqual(
+                                flow.reducer.split(":")[1], "QuantityReducer"
+                            )
+
+    def test_lazy_imports(self):
+        """
+        A stage should not import the other flows, nor the modes it does not run
+        """
+        script = (
+            "import sys, runpy\n"
+            "sys.argv = ['main.py', '--reducer=quantity']\n"
+            "runpy.run_path('main.py', run_name='__main__')\n"
+            "sys.stderr.write(' '.join(sys.modules))\n"
+        )
+        modules = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=ROOT,
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stderr.split()
+
+        self.assertIn("src.reducers.quantity", modules)
+        for module in (
+            "src.mappers.user",
+            "src.reducers.user",
+            "src.lib.local",
+            "src.lib.compression",
+            "src.lib.columnar",
+            "src.lib.pipeline",
+            "multiprocessing",
+            "datetime",
+        ):
+            self.assertNotIn(module, modules)
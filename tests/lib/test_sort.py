@@ -0,0 +1,94 @@
+import random
+import unittest
+
+from src.exceptions.data import LineFormatError
+from src.lib.sort import external_sort, sort_lines, sort_records
+from src.schemas.data import UserMoveMapped
+
+
+class TestSort(unittest.TestCase):
+    """Test Suite for the external merge sort"""
+
+    def setUp(self):
+        rng = random.Random(42)
+        self.lines = [f"{rng.randint(0, 1000)}\t{i}\t1" for i in range(2000)]
+
+    def test_numeric_order(self):
+        """
+        Keys should be compared as numbers, so 9 goes before 10
+        """
+        self.assertEqual(
+            list(sort_lines(["10\ta", "9\tb", "100\tc"])), ["9\tb", "10\ta", "100\tc"]
+        )
+
+    def test_spills_to_disk(self):
+        """
+        With a small memory budget runs should be merged into the same stable result
+        """
+        expected = sorted(self.lines, key=lambda line: int(line.split("\t")[0]))
+        self.assertEqual(list(sort_lines(self.lines, memory=4096)), expected)
+        self.assertEqual(list(sort_lines(self.lines)), expected)
+
+    def test_records(self):
+        """
+        Any item can be sorted as long as it can be dumped and loaded back
+        """
+        items = [(i * 7919) % 1000 for i in range(1000)]
+        result = external_sort(
+            items, key=lambda x: x, memory=100, dump=str, load=int, sizeof=lambda _: 1
+        )
+        self.assertEqual(list(result), sorted(items))
+
+    def test_fan_in(self):
+        """
+        Should merge more runs than the fan in through intermediate runs, stable
+        """
+        expected = sorted(self.lines, key=lambda line: int(line.split("\t")[0]))
+        result = external_sort(
+            self.lines,
+            key=lambda line: int(line.split("\t")[0]),
+            memory=10,
+            sizeof=lambda _: 1,
+            fan_in=3,
+        )
+        self.assertEqual(list(result), expected)
+
+        records = [UserMoveMapped(i % 7, (i * 7919) % 1000, 1) for i in range(500)]
+        result = external_sort(
+            records,
+            key=lambda record: record.user_id,
+            memory=5,
+            dump=None,
+            load=None,
+            sizeof=lambda _: 1,
+            fan_in=4,
+        )
+        self.assertEqual(
+            list(result), sorted(records, key=lambda record: record.user_id)
+        )
+
+    def test_fail_format(self):
+        """
+        Should raise a LineFormatError when the key is not an integer
+        """
+        with self.assertRaises(LineFormatError):
+            list(sort_lines(["a\t1"]))
+
+    def test_key_fields(self):
+        """
+        Should sort by the first fields as a composite numeric key, spilling or not
+        """
+        expected = sorted(
+            self.lines, key=lambda line: tuple(map(int, line.split("\t")[:2]))
+        )
+        self.assertEqual(list(sort_lines(self.lines, fields=2)), expected)
+        self.assertEqual(list(sort_lines(self.lines, memory=4096, fields=2)), expected)
+
+        records = [UserMoveMapped(i % 7, (i * 7919) % 1000, 1) for i in range(500)]
+        self.assertEqual(
+            list(sort_records(records, memory=4096, fields=2)),
+            sorted(records, key=lambda record: (record.user_id, record.timestamp)),
+        )
+
+        with self.assertRaises(LineFormatError):
+            list(sort_lines(["1\ta\t1"], fields=2))
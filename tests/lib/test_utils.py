@@ -0,0 +1,85 @@
+import unittest
+from datetime import datetime, timezone
+
+from src.exceptions.data import TimestampParseError
+from src.lib.utils import parse_timestamp, parse_timestamps, str2timestamp
+
+
+def reference(text: str) -> int:
+    text = text.replace(" UTC", "")
+    layout = "%Y-%m-%d %H:%M:%S.%f" if "." in text else "%Y-%m-%d %H:%M:%S"
+    parsed = datetime.strptime(text, layout).replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp()) * 1000 + parsed.microsecond // 1000
+
+
+class TestTimestamps(unittest.TestCase):
+    """Test Suite for the timestamp parsers"""
+
+    def setUp(self):
+        self.valid = [
+            "2022-04-01 12:44:10.315",
+            "2022-04-03 17:38:22.252 UTC",
+            "2022-04-04 00:53:51 UTC",
+            "2022-04-04 00:53:51.1 UTC",
+            "2022-04-04 00:53:51.123456",
+            "2000-02-29 23:59:59.999",
+            "1969-12-31 23:59:59",
+            "2024-02-29 00:00:00",
+        ]
+        self.invalid = [
+            "2022-04-01",
+            "2022-04-01 12:44:10.",
+            "2022-04-01 12:44:10 UTC+3",
+            "2022-04-01 12:4:10",
+            "2022-13-01 12:44:10",
+            "2022-04-01 12:44:10.31x",
+            "x",
+            "",
+            "2022-02-31 99:99:99",
+            "2022-02-29 12:44:10",
+            "2022-04-31 12:44:10",
+            "2022-04-01 24:00:00",
+            "2022-04-01 12:60:10",
+            "2022-04-01 12:44:60",
+        ]
+
+    def test_parse_timestamp(self):
+        """
+        Should read the dataset layout as UTC milliseconds, like strptime does
+        """
+        for text in self.valid:
+            self.assertEqual(parse_timestamp(text), reference(text), text)
+
+        for text in self.invalid:
+            with self.assertRaises(TimestampParseError, msg=text):
+                parse_timestamp(text)
+
+    def test_parse_timestamps(self):
+        """
+        The vectorized parser should agree with the scalar one, range checks included
+        """
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            self.skipTest("numpy is not installed")
+
+        self.assertEqual(
+            parse_timestamps(self.valid).tolist(), [reference(t) for t in self.valid]
+        )
+        self.assertEqual(len(parse_timestamps([])), 0)
+
+        for text in self.invalid:
+            with self.assertRaises(TimestampParseError, msg=text):
+                parse_timestamps([self.valid[0], text])
+            # on its own too, short rows are not wider than the layout
+            with self.assertRaises(TimestampParseError, msg=text):
+                parse_timestamps([text])
+
+    def test_str2timestamp_utc(self):
+        """
+        Should not depend on the timezone of the host
+        """
+        self.assertEqual(
+            str2timestamp("2022-04-01 12:44:10", format=["%Y-%m-%d %H:%M:%S"]),
+            1648817050,
+        )
@@ -0,0 +1,46 @@
+import unittest
+from io import StringIO
+
+from src.lib.pipeline import run_pipeline
+from src.lib.vectorized import aggregate_users, quantity_records, user_records
+from src.mappers.quantity import QuantityMapper
+from src.mappers.user import UserMapper
+from src.reducers.quantity import QuantityReducer
+from src.reducers.user import UserReducer
+
+
+class TestVectorized(unittest.TestCase):
+    """Test Suite for the vectorized engine"""
+
+    def setUp(self):
+        self.lines = ["time,user_id,x,y,color,mod"]
+        for i in range(300):
+            user_id = [0, 3, 9, 12, 27, 40][i % 6] + (i % 53 == 0)
+            self.lines.append(
+                f"{i * 50000:09d},{user_id:08d},0001,0002,03,{int(i % 97 == 0)}"
+            )
+        self.text = "\n".join(self.lines) + "\n"
+        self.first_ts = UserMapper().first_ts
+
+    def test_same_as_user_flow(self):
+        """
+        Should give the same records as the streaming user flow
+        """
+        expected = list(run_pipeline([(UserMapper(), UserReducer())], self.lines))
+        aggregation = aggregate_users(
+            StringIO(self.text), first_ts=self.first_ts, chunksize=7
+        )
+        self.assertEqual(list(user_records(aggregation)), expected)
+
+    def test_same_as_quantity_flow(self):
+        """
+        Should give the same records as the streaming user -> quantity flows
+        """
+        flows = [(UserMapper(), UserReducer()), (QuantityMapper(), QuantityReducer())]
+        expected = list(run_pipeline(flows, self.lines))
+        self.assertNotEqual(expected, [])
+
+        aggregation = aggregate_users(
+            StringIO(self.text), first_ts=self.first_ts, chunksize=50
+        )
+        self.assertEqual(list(quantity_records(aggregation)), expected)
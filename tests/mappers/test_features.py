@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from src.lib.columnar import ColumnarData, convert
+from src.mappers.features import FeaturesMapper
+from src.schemas.data import Placement
+
+
+class TestFeaturesMapper(unittest.TestCase):
+    """Test Suite for Features mapper"""
+
+    def setUp(self):
+        self.text = (
+            "time,user_id,x,y,color,mod\n"
+            "000000000,00000000,0042,0043,15,0\n"
+            "000012356,00000001,0999,0998,22,0\n"
+            "000040229,00000005,0420,0420,09,1\n"
+        )
+        self.mapper = FeaturesMapper()
+
+    def test_use_case(self):
+        """
+        Should print the placements keyed by user and padded timestamp, without mods
+        """
+        with patch("sys.stdout", new=StringIO()) as out:
+            self.mapper.source = StringIO(self.text)
+            self.mapper.run()
+            self.assertEqual(
+                out.getvalue(),
+                "0\t1648817050315\t42\t43\t15\n1\t1648817062671\t999\t998\t22\n",
+            )
+
+        record = Placement(3, 42, 1, 2, 3)
+        self.assertEqual(self.mapper.key(record), 3)
+        self.assertEqual(self.mapper.sort_key(record), (3, 42))
+
+    def test_columnar(self):
+        """
+        Should map the rows of a columnar cache like the csv lines
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            cache = os.path.join(folder, "cache")
+            convert(StringIO(self.text), cache)
+            self.assertEqual(
+                list(self.mapper.process_columns(ColumnarData(cache))),
+                list(self.mapper.process_lines(self.text.splitlines())),
+            )
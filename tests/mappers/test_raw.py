@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from src.exceptions.data import LineFormatError
+from src.mappers.raw import PALETTE, RawPlacementMapper
+from src.schemas.data import ModerationRect
+
+
+class TestRawPlacementMapper(unittest.TestCase):
+    """Test Suite for the mapper of the original export"""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, "users.ids")
+        self.alice = "yTrYCd4LUpBn4rIyNXkkW2+Fac5cQHK2lsDpNghkq0oPu9o//8oPZPlLM4CXQeEIId7S9KqC1ETDNW/vm/hxXQ=="
+        self.bob = "Ctg5wmoGqaARxY6RlbQu8ahd7p/fdLnYG9MUSnXcqcX/o7LpW3Hg4VfCvlBnv7SfHdswC+d4nX60zyHdxIvmKQ=="
+        self.text = (
+            "timestamp,user_id,pixel_color,coordinate\n"
+            f'2022-04-01 12:44:10.315 UTC,{self.alice},#FF4500,"42,42"\n'
+            f'2022-04-01 12:44:22.671 UTC,{self.bob},#ffffff,"999,999"\n'
+            f'2022-04-01 12:44:30 UTC,{self.alice},#000000,"2,2"\n'
+            f'2022-04-04 00:00:00.1 UTC,{self.bob},#FFFFFF,"0,0,1999,1999"\n'
+        )
+        self.expected = (
+            "0\t1648817050315\t1\n" "1\t1648817062671\t1\n" "0\t1648817070000\t1\n"
+        )
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_parse_line(self):
+        """
+        Should give dense user ids, UTC milliseconds and palette colors
+        """
+        mapper = RawPlacementMapper()
+        self.assertIsNone(mapper.parse_line("timestamp,user_id,pixel_color,coordinate"))
+
+        move = mapper.parse_line(self.text.splitlines()[1])
+        self.assertEqual(
+            (move.timestamp, move.user_id, move.x, move.y, move.color, move.is_mod),
+            (1648817050315, 0, 42, 42, 2, False),
+        )
+
+        mod = mapper.parse_line(self.text.splitlines()[4])
+        self.assertEqual(
+            (mod.user_id, mod.x, mod.y, mod.color, mod.is_mod), (1, 0, 0, 31, True)
+        )
+        self.assertEqual(len(PALETTE), 32)
+
+    def test_parse_rectangle(self):
+        """
+        Should give the whole rectangle of moderation rows and None for placements
+        """
+        mapper = RawPlacementMapper()
+        lines = self.text.splitlines()
+        self.assertIsNone(mapper.parse_rectangle(lines[0]))
+        self.assertIsNone(mapper.parse_rectangle(lines[1]))
+        self.assertEqual(
+            mapper.parse_rectangle(lines[4]),
+            ModerationRect(1649030400100, 0, 0, 1999, 1999, 31),
+        )
+
+        with self.assertRaises(LineFormatError):
+            mapper.parse_rectangle(
+                f'2022-04-04 00:00:00 UTC,{self.bob},#FFFFFF,"9,0,1,9"'
+            )
+
+    def test_fail_format(self):
+        """
+        Should raise a LineFormatError on missing fields, coordinates or colors
+        """
+        mapper = RawPlacementMapper()
+        for line in [
+            "some",
+            f'2022-04-01 12:44:10 UTC,{self.alice},#FF4500,"42"',
+            f'2022-04-01 12:44:10 UTC,{self.alice},#FF4500,"a,42"',
+            f'2022-04-01 12:44:10 UTC,{self.alice},#123456,"42,42"',
+        ]:
+            with self.assertRaises(LineFormatError, msg=line):
+                mapper.parse_line(line)
+
+    def test_use_case(self):
+        """
+        Should print the user mapper output without the moderation rectangles
+        """
+        with patch("sys.stdout", new=StringIO()) as out:
+            mapper = RawPlacementMapper()
+            mapper.source = StringIO(self.text)
+            mapper.run()
+            self.assertEqual(out.getvalue(), self.expected)
+
+    def test_shared_ids(self):
+        """
+        Should write a new dictionary to `ids` and reuse it when it exists
+        """
+        with patch("sys.stdout", new=StringIO()):
+            mapper = RawPlacementMapper(ids=self.path)
+            mapper.source = StringIO(self.text)
+            mapper.run()
+            mapper.save_ids()
+
+        # another worker, seeing bob first, gets the same ids
+        lines = self.text.splitlines()
+        with patch("sys.stdout", new=StringIO()) as out:
+            worker = RawPlacementMapper(ids=self.path)
+            self.assertTrue(worker.ids.frozen)
+            worker.source = StringIO("\n".join([lines[2], lines[1]]) + "\n")
+            worker.run()
+            self.assertEqual(
+                out.getvalue(), "1\t1648817062671\t1\n0\t1648817050315\t1\n"
+            )
@@ -0,0 +1,36 @@
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from src.exceptions.data import LineFormatError
+from src.mappers.sorter import SorterMapper
+
+
+class TestSorterMapper(unittest.TestCase):
+    """Test Suite for Sorter mapper"""
+
+    def setUp(self):
+        self.mapper = SorterMapper()
+
+    def test_fail_format(self):
+        """
+        Should raise a LineFormatError unless the line has 4 integer fields
+        """
+        with self.assertRaises(LineFormatError):
+            self.mapper.map("1\t2\t3")
+        with self.assertRaises(LineFormatError):
+            self.mapper.map("1\t2\t3\ta")
+
+    def test_moves_first(self):
+        """
+        Should key the quantity output by moves
+        """
+        with patch("sys.stdout", new=StringIO()) as out:
+            self.mapper.source = StringIO("2\t3000000\t10\t10\n3\t30000000\t100\t98\n")
+            self.mapper.run()
+            self.assertEqual(
+                out.getvalue(), "10\t2\t3000000\t10\n98\t3\t30000000\t100\n"
+            )
+
+        record = self.mapper.parse_line("2\t3000000\t10\t10")
+        self.assertEqual(self.mapper.key(record), 10)
@@ -0,0 +1,59 @@
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from src.exceptions.data import LineFormatError
+from src.mappers.timeline import TimelineMapper
+from src.schemas.data import UserMoveMapped
+
+
+class TestTimelineMapper(unittest.TestCase):
+    """Test Suite for Timeline mapper"""
+
+    def setUp(self):
+        self.text = (
+            "time,user_id,x,y,color,mod\n"
+            "000000000,00000000,0042,0042,15,0\n"
+            "000012356,00000001,0999,0999,22,0\n"
+            "000040229,00000005,0420,0420,09,1\n"
+        )
+        self.expected = "0\t1648817050315\n1\t1648817062671\n"
+        self.mapper = TimelineMapper()
+
+    def test_use_case(self):
+        """
+        Should print user_id and timestamp, without mods, like the checked path
+        """
+        for fast_parse in (True, False):
+            with patch("sys.stdout", new=StringIO()) as out:
+                mapper = TimelineMapper()
+                mapper.fast_parse = fast_parse
+                mapper.source = StringIO(self.text)
+                mapper.run()
+                self.assertEqual(out.getvalue(), self.expected)
+
+    def test_empty_field(self):
+        """
+        Should refuse an empty x, y or color on the fast path too
+        """
+        for line in ["1,2,,4,5,0", "1,2,3,,5,0", "1,2,3,4,,0"]:
+            mapper = TimelineMapper()
+            mapper.source = StringIO(line + "\n")
+            with patch("sys.stdout", new=StringIO()):
+                with self.assertRaises(LineFormatError, msg=line):
+                    mapper.run()
+
+    def test_padded_timestamp(self):
+        """
+        Should pad the timestamp, so a text sort of the second field is numeric
+        """
+        record = UserMoveMapped(user_id=3, timestamp=42, count=1)
+        self.assertEqual(self.mapper.format_record(record), "3\t0000000000042")
+
+    def test_secondary_key(self):
+        """
+        Should group by user_id but sort by user_id and timestamp
+        """
+        record = UserMoveMapped(user_id=3, timestamp=42, count=1)
+        self.assertEqual(self.mapper.key(record), 3)
+        self.assertEqual(self.mapper.sort_key(record), (3, 42))
@@ -10,7 +10,7 @@ class TestUserMapper(unittest.TestCase):
     """Test Suite for User mapper"""
 
     def setUp(self):
-        base_ts: int = 1648827850000
+        base_ts: int = 1648817050315
         self.text = (
             "time,user_id,x,y,color,mod\n"
             "000000000,00000000,0042,0042,15,0\n"
@@ -78,7 +78,7 @@ class TestUserMapper(unittest.TestCase):
         with patch("sys.stdout", new=StringIO()) as out:
             self.mapper.map("0,2,3,4,5,0")
 
-            expected = "2\t1648827850000\t1\n"
+            expected = "2\t1648817050315\t1\n"
             result = out.getvalue()
 
             self.assertEqual(len(result.split("\t")), 3)
@@ -92,3 +92,37 @@ class TestUserMapper(unittest.TestCase):
             self.mapper.source = self.source
             self.mapper.run()
             self.assertEqual(out.getvalue(), self.expected)
+
+    def test_fast_parse_same_as_checked(self):
+        """
+        The fast path should give the same output and errors as parse_line
+        """
+        lines = [
+            "time,user_id,x,y,color,mod",
+            "000000000,00000000,0042,0042,15,0",
+            "000040229,00000005,0420,0420,09,1",
+            "000040229,00000005,0420,0420,09,2",
+        ]
+        checked = UserMapper()
+        checked.fast_parse = False
+
+        self.assertEqual(
+            list(self.mapper.process_lines(lines)),
+            list(checked.process_lines(lines)),
+        )
+
+        invalid = [
+            "1,2,3,4,5",
+            "1,2,3,4,5,a",
+            "-1,2,3,4,5,0",
+            "1,,3,4,5,0",
+            "1,2,,4,5,0",
+            "1,2,3,,5,0",
+            "1,2,3,4,,0",
+            "1,2,3,4,5,",
+        ]
+        for line in invalid:
+            with self.assertRaises(LineFormatError, msg=line):
+                list(self.mapper.process_lines([line]))
+            with self.assertRaises(LineFormatError, msg=line):
+                list(checked.process_lines([line]))
@@ -0,0 +1,83 @@
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from src.lib.pipeline import run_pipeline
+from src.mappers.timeline import TimelineMapper
+from src.reducers.cooldown import COOLDOWN, LONG_COOLDOWN, CooldownReducer
+from src.schemas.data import UserCooldown
+
+
+class TestCooldownReducer(unittest.TestCase):
+    """Test Suite for Cooldown reducer"""
+
+    def setUp(self):
+        self.reducer = CooldownReducer()
+
+    def score(self, timestamps):
+        return list(self.reducer.reduce_timeline(7, iter(timestamps)))
+
+    def test_paused_bot(self):
+        """
+        Should find the run of a user placing at the cooldown after a pause
+        """
+        timestamps = [0, 40_000, 3_600_000]
+        for i in range(1, 13):
+            timestamps.append(3_600_000 + i * COOLDOWN + (i % 3) * 1000)
+
+        (score,) = self.score(timestamps)
+        self.assertEqual(
+            score,
+            UserCooldown(
+                user_id=7,
+                moves=15,
+                span=timestamps[-1],
+                min_gap=40_000,
+                cooldown_gaps=12,
+                long_cooldown_gaps=0,
+                longest_run=12,
+            ),
+        )
+
+    def test_runs(self):
+        """
+        Should count both cooldowns in a run and reset it on any other gap
+        """
+        gaps = [COOLDOWN, LONG_COOLDOWN, COOLDOWN + 4000, 1000, COOLDOWN, COOLDOWN]
+        timestamps = [0]
+        for gap in gaps:
+            timestamps.append(timestamps[-1] + gap)
+
+        (score,) = self.score(timestamps)
+        self.assertEqual(score.cooldown_gaps, 4)
+        self.assertEqual(score.long_cooldown_gaps, 1)
+        self.assertEqual(score.longest_run, 3)
+        self.assertEqual(score.min_gap, 1000)
+
+        (strict,) = CooldownReducer(tolerance=1000).reduce_timeline(7, iter(timestamps))
+        self.assertEqual(strict.longest_run, 2)
+
+    def test_few_moves(self):
+        """
+        Should skip users with less than min_moves placements
+        """
+        self.assertEqual(self.score([0, COOLDOWN, 2 * COOLDOWN, 3 * COOLDOWN]), [])
+        self.assertEqual(len(self.score([i * COOLDOWN for i in range(5)])), 1)
+
+    def test_use_case(self):
+        """
+        Should write one score line per user from the timeline mapper output
+        """
+        lines = ["time,user_id,x,y,color,mod"]
+        for i in range(6):
+            lines.append(f"{i * COOLDOWN},1,0,0,0,0")
+            lines.append(f"{i * 1000},2,0,0,0,0")
+
+        with patch("sys.stdout", new=StringIO()) as out:
+            for record in run_pipeline([(TimelineMapper(), self.reducer)], lines):
+                self.reducer.emit(record)
+            self.assertEqual(
+                out.getvalue(),
+                f"1\t6\t{5 * COOLDOWN}\t{COOLDOWN}\t1.0000\t0.0000\t5\n"
+                "2\t6\t5000\t1000\t0.0000\t0.0000\t0\n",
+            )
@@ -0,0 +1,69 @@
+import unittest
+from io import StringIO
+from math import log2
+from statistics import mean, pstdev
+from unittest.mock import patch
+
+from src.exceptions.data import DataError
+from src.reducers.features import FeaturesReducer
+from src.schemas.data import Placement
+
+
+class TestFeaturesReducer(unittest.TestCase):
+    """Test Suite for Features reducer"""
+
+    def setUp(self):
+        self.reducer = FeaturesReducer()
+        self.placements = [
+            Placement(7, 0, 10, 20, 1),
+            Placement(7, 300_000, 12, 20, 1),
+            Placement(7, 600_500, 10, 20, 2),
+            Placement(7, 1_900_000, 11, 25, 3),
+        ]
+
+    def test_features(self):
+        """
+        Should compute the online statistics like the offline ones
+        """
+        (features,) = self.reducer.reduce_placements(7, iter(self.placements))
+        gaps = [300_000, 300_500, 1_299_500]
+
+        self.assertEqual(features.moves, 4)
+        self.assertEqual(features.span, 1_900_000)
+        self.assertAlmostEqual(features.gap_mean, mean(gaps))
+        self.assertAlmostEqual(features.gap_std, pstdev(gaps))
+        self.assertAlmostEqual(
+            features.color_entropy, -(0.5 * log2(0.5) + 0.5 * log2(0.25))
+        )
+        self.assertEqual(
+            (features.x_min, features.x_max, features.y_min, features.y_max),
+            (10, 12, 20, 25),
+        )
+        self.assertEqual(features.distinct_pixels, 3)
+        self.assertEqual(features.distinct_ratio, 0.75)
+
+        (single,) = self.reducer.reduce_placements(7, iter(self.placements[:1]))
+        self.assertEqual(
+            (single.gap_mean, single.gap_std, single.color_entropy), (0, 0, 0)
+        )
+
+    def test_bad_color(self):
+        """
+        Should raise a DataError for colors out of the palette
+        """
+        with self.assertRaises(DataError):
+            list(self.reducer.reduce_placements(7, iter([Placement(7, 0, 0, 0, 32)])))
+
+    def test_use_case(self):
+        """
+        Should write one line of features per user from the mapper output
+        """
+        with patch("sys.stdout", new=StringIO()) as out:
+            self.reducer.source = StringIO(
+                "1\t0000000000010\t5\t5\t0\n1\t0000000000030\t5\t5\t0\n"
+            )
+            self.reducer.run()
+            self.assertEqual(
+                out.getvalue(),
+                "1\t2\t20\t20.0000\t0.0000\t0.0000\t5\t5\t5\t5\t1\t0.5000\n",
+            )
@@ -0,0 +1,31 @@
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from src.exceptions.data import LineFormatError
+from src.reducers.sorter import SorterReducer
+
+
+class TestSorterReducer(unittest.TestCase):
+    """Test Suite for Sorter reducer"""
+
+    def setUp(self):
+        self.reducer = SorterReducer()
+
+    def test_fail_format(self):
+        """
+        Should raise a LineFormatError unless the line has 4 integer fields
+        """
+        with self.assertRaises(LineFormatError):
+            self.reducer.reduce("1\t2\t3")
+
+    def test_user_first(self):
+        """
+        Should write the sorted records in the quantity output format
+        """
+        with patch("sys.stdout", new=StringIO()) as out:
+            self.reducer.source = StringIO("10\t2\t3000000\t10\n98\t3\t30000000\t100\n")
+            self.reducer.run()
+            self.assertEqual(
+                out.getvalue(), "2\t3000000\t10\t10\n3\t30000000\t100\t98\n"
+            )
@@ -0,0 +1,84 @@
+import unittest
+from io import StringIO
+from typing import Iterator, Tuple
+from unittest.mock import patch
+
+from src.exceptions.data import DataError, LineFormatError
+from src.lib.pipeline import run_pipeline
+from src.mappers.timeline import TimelineMapper
+from src.mappers.user import UserMapper
+from src.reducers.timeline import TimelineReducer
+from src.reducers.user import UserReducer
+
+
+class Gaps(TimelineReducer):
+    def reduce_timeline(
+        self, user_id: int, timestamps: Iterator[int]
+    ) -> Iterator[Tuple[int, int]]:
+        previous = next(timestamps)
+        for timestamp in timestamps:
+            yield user_id, timestamp - previous
+            previous = timestamp
+
+
+class TestTimelineReducer(unittest.TestCase):
+    """Test Suite for Timeline reducer"""
+
+    def setUp(self):
+        self.reducer = TimelineReducer()
+        self.lines = ["time,user_id,x,y,color,mod"]
+        for i in range(300):
+            # every user comes back out of order in the file
+            self.lines.append(f"{(300 - i) * 1000},{i % 7},{i},{i},{i % 32},0")
+
+    def test_fail_format(self):
+        """
+        Should raise a LineFormatError unless the line is user_id and timestamp
+        """
+        with self.assertRaises(LineFormatError):
+            self.reducer.parse_line("1\t2\t3")
+        with self.assertRaises(LineFormatError):
+            self.reducer.parse_line("1\ta")
+
+    def test_use_case(self):
+        """
+        Should write the user reducer output from the sorted timelines
+        """
+        with patch("sys.stdout", new=StringIO()) as out:
+            self.reducer.source = StringIO(
+                "1\t0000000000010\n1\t0000000000020\n1\t0000000000035\n4\t0000000000007\n"
+            )
+            self.reducer.run()
+            self.assertEqual(out.getvalue(), "1\t10#35\t3\n4\t7#7\t1\n")
+
+    def test_unsorted(self):
+        """
+        Should raise a DataError when users or timestamps go back
+        """
+        with self.assertRaises(DataError):
+            list(
+                self.reducer.process(
+                    self.reducer.parse_line(line) for line in ["1\t5", "1\t4"]
+                )
+            )
+        with self.assertRaises(DataError):
+            list(
+                self.reducer.process(
+                    self.reducer.parse_line(line) for line in ["2\t5", "1\t6"]
+                )
+            )
+
+    def test_pipeline(self):
+        """
+        Should get every timeline in order through the shuffle, spilling or not
+        """
+        expected = list(run_pipeline([(UserMapper(), UserReducer())], self.lines))
+        for memory in (1024, 1 << 20):
+            result = run_pipeline(
+                [(TimelineMapper(), TimelineReducer())], self.lines, memory=memory
+            )
+            self.assertEqual(list(result), expected)
+
+        gaps = list(run_pipeline([(TimelineMapper(), Gaps())], self.lines))
+        self.assertEqual(len(gaps), 300 - 7)
+        self.assertTrue(all(gap == 7000 for _, gap in gaps))
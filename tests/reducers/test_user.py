@@ -1,7 +1,7 @@
 import unittest
 from io import StringIO
 from unittest.mock import patch
-from src.exceptions.data import LineFormatError
+from src.exceptions.data import DataError, LineFormatError
 
 from src.reducers.user import UserReducer
 
@@ -49,6 +49,13 @@ class TestUserReducer(unittest.TestCase):
             self.reducer.run()
             self.assertNotEqual(out.getvalue(), "")
 
+    def test_no_result_before_input(self):
+        """
+        Should not make a result before reading a user
+        """
+        with self.assertRaises(DataError):
+            UserReducer().result
+
     def test_print_stdout_separated_by_tabs(self):
         """
         After processing data, should print the data separated by tabs
@@ -67,6 +74,17 @@ class TestUserReducer(unittest.TestCase):
             )
             self.assertEqual(out.getvalue(), expected)
 
+    def test_combined_input(self):
+        """
+        Should accept records already aggregated by the combiner as min#max
+        """
+        with patch("sys.stdout", new=StringIO()) as out:
+            self.reducer.source = StringIO(
+                "1\t20#30\t2\n" "1\t25\t1\n" "1\t10#22\t4\n" "2\t5#5\t1\n"
+            )
+            self.reducer.run()
+            self.assertEqual(out.getvalue(), "1\t10#30\t7\n2\t5#5\t1\n")
+
     def test_use_case(self):
         """
         After processing the test data, should print the expected output
@@ -75,3 +93,19 @@ class TestUserReducer(unittest.TestCase):
             self.reducer.source = self.source
             self.reducer.run()
             self.assertEqual(out.getvalue(), self.expected)
+
+    def test_unsorted(self):
+        """
+        With unsorted, should aggregate input in any order and print it by user_id,
+        spilling to disk when the users do not fit in memory
+        """
+        lines = self.text.splitlines()
+        shuffled = "\n".join([lines[4], lines[1], lines[0], lines[3], lines[2]])
+
+        for memory in (1024 * 1024, 24):
+            with patch("sys.stdout", new=StringIO()) as out:
+                reducer = UserReducer(unsorted=True, memory=memory)
+                reducer.source = StringIO(shuffled)
+                reducer.run()
+                self.assertEqual(out.getvalue(), self.expected)
+                self.assertEqual(reducer.aggregator.spilled, memory == 24)